@@ -36,12 +36,14 @@ from __future__ import (
     )
 
 import re
+import sys
 import logging
 from operator import attrgetter
 from itertools import chain, groupby
-from collections import Mapping, Sequence
+from collections import Mapping, Sequence, defaultdict
 
-from dbsuite.parser import format_size, format_ident
+from dbsuite.parser import format_size, format_ident, split_ident
+from dbsuite.tuples import DatatypeRef
 
 
 __all__ = [
@@ -79,8 +81,10 @@ class DictProxy(Mapping):
 
     This abstract class acts like a read-only dictionary of objects from the
     database hierarchy. It is initialized from a list of identifiers which are
-    used to lookup the actual objects from the hierarchy. This class is
-    overridden below to implement dictionaries of relations, indexes, etc.
+    used to lookup the actual objects from the hierarchy when the dictionary is
+    first accessed (the objects may not exist when the dictionary is
+    constructed). This class is overridden below to implement dictionaries of
+    relations, indexes, etc.
     """
 
     def __init__(self, items, key=None):
@@ -95,7 +99,18 @@ class DictProxy(Mapping):
         super(DictProxy, self).__init__()
         if key is None:
             key = lambda x: x
-        self._keys = set((key(i) for i in items))
+        self._keys = frozenset(key(i) for i in items)
+        self._items = None
+
+    def _objects(self):
+        """Returns a dictionary of the objects keyed by their identifiers.
+
+        The identifiers are converted on the first call only, after which the
+        dictionary is simply returned.
+        """
+        if self._items is None:
+            self._items = dict((k, self._convert(k)) for k in self._keys)
+        return self._items
 
     def _convert(self, item):
         """Converts the tuple into a "real" database object.
@@ -109,14 +124,16 @@ class DictProxy(Mapping):
     def __len__(self):
         return len(self._keys)
 
+    def __contains__(self, key):
+        return key in self._keys
+
     def __getitem__(self, key):
         if not key in self._keys:
             raise KeyError(key)
-        return self._convert(key)
+        return self._objects()[key]
 
     def __iter__(self):
-        for k in self._keys:
-            yield k
+        return iter(self._keys)
 
 
 class ListProxy(Sequence):
@@ -124,8 +141,10 @@ class ListProxy(Sequence):
 
     This abstract class acts like a read-only list of objects from the database
     hierarchy. It is initialized from a list of identifiers which are used to
-    lookup the actual objects from the hierarchy. This class is overridden
-    below to implement lists of relations, indexes, etc.  """
+    lookup the actual objects from the hierarchy when the list is first
+    accessed (the objects may not exist when the list is constructed). This
+    class is overridden below to implement lists of relations, indexes, etc.
+    """
 
     def __init__(self, items, key=None):
         """Initializes the list from a list of tuples.
@@ -139,7 +158,20 @@ class ListProxy(Sequence):
         super(ListProxy, self).__init__()
         if key is None:
             key = lambda x: x
-        self._items = [key(i) for i in items]
+        self._keys = tuple(key(i) for i in items)
+        self._items = None
+
+    def _objects(self):
+        """Returns a tuple of the objects in the list.
+
+        The identifiers are converted on the first call only, after which the
+        tuple is simply returned. The identifiers are discarded at this point
+        as they are no longer required.
+        """
+        if self._items is None:
+            self._items = tuple(self._convert(i) for i in self._keys)
+            self._keys = None
+        return self._items
 
     def _convert(self, item):
         """Converts the tuple into a "real" database object.
@@ -151,14 +183,21 @@ class ListProxy(Sequence):
         raise NotImplementedError
 
     def __len__(self):
+        if self._items is None:
+            return len(self._keys)
         return len(self._items)
 
     def __getitem__(self, key):
-        return self._convert(self._items[key])
+        return self._objects()[key]
 
     def __iter__(self):
-        for i in self._items:
-            yield self._convert(i)
+        return iter(self._objects())
+
+    def __contains__(self, value):
+        return value in self._objects()
+
+    def index(self, value):
+        return self._objects().index(value)
 
 
 class RelationsDict(DictProxy):
@@ -300,11 +339,30 @@ class ForeignKeyFieldsList(ListProxy):
         return (self._table.fields[field], parent_table.fields[parent])
 
 
+# PRIVATE FUNCTIONS ###########################################################
+
+def _name_key(parts):
+    """Returns the key of an object in the Database name index.
+
+    Given a tuple of the names which qualify an object, returns the key of the
+    object in the index used by Database.find(). If none of the names contain a
+    period or quotation mark, this is simply the names joined by periods (i.e.
+    the unquoted qualified name, which is how find() is almost always called).
+    Otherwise the tuple itself is the key.
+    """
+    for part in parts:
+        if '.' in part or '"' in part:
+            return parts
+    return '.'.join(parts)
+
+
 # ABSTRACT BASE CLASSES #######################################################
 
 class DatabaseObject(object):
     """Base class for all documented database objects"""
 
+    __slots__ = ('parent', 'name', 'description', '_system', '_parent_index')
+
     config_names = ['all']
 
     def __init__(self, parent, name, system=False, description=None):
@@ -360,12 +418,17 @@ class DatabaseObject(object):
         this object does not have a parent_list, querying this property raises
         an exception.
         """
-        if self.parent_list is None:
-            raise NotImplementedError
-        elif self._parent_index is None:
-            # Cache the result as this is a potentially expensive lookup and
-            # parent_list is not permitted to change after construction
-            self._parent_index = self.parent_list.index(self)
+        if self._parent_index is None:
+            parent_list = self.parent_list
+            if parent_list is None:
+                raise NotImplementedError
+            # Number all the siblings at once (parent_list is not permitted to
+            # change after construction), so that walking the list with next
+            # and prior is O(1) per step instead of a search of parent_list
+            for (index, sibling) in enumerate(parent_list):
+                sibling._parent_index = index
+            if self._parent_index is None:
+                raise ValueError('%s is not in its parent_list' % self.qualified_name)
         return self._parent_index
 
     def _get_identifier(self):
@@ -410,10 +473,11 @@ class DatabaseObject(object):
         last object in the list, or if it is not a member of a list, the result
         is None.
         """
-        if self.parent_list is None:
+        parent_list = self.parent_list
+        if parent_list is None:
             return None
         try:
-            return self.parent_list[self.parent_index + 1]
+            return parent_list[self.parent_index + 1]
         except IndexError:
             return None
 
@@ -425,14 +489,13 @@ class DatabaseObject(object):
         first object in the list, or if it is not a member of a list, the
         result is None.
         """
-        if self.parent_list is None:
+        parent_list = self.parent_list
+        if parent_list is None:
             return None
-        try:
-            if self.parent_index > 0:
-                return self.parent_list[self.parent_index - 1]
-            else:
-                return None
-        except IndexError:
+        index = self.parent_index
+        if index > 0:
+            return parent_list[index - 1]
+        else:
             return None
 
     def _get_first(self):
@@ -443,9 +506,10 @@ class DatabaseObject(object):
         object in the parent_list). If it is not a member of a list, the result
         is None.
         """
-        if self.parent_list is None:
+        parent_list = self.parent_list
+        if parent_list is None:
             return None
-        return self.parent_list[0]
+        return parent_list[0]
 
     def _get_last(self):
         """Returns the last sibling of this object.
@@ -455,9 +519,10 @@ class DatabaseObject(object):
         in the parent_list). If it is not a member of a list, the result is
         None.
         """
-        if self.parent_list is None:
+        parent_list = self.parent_list
+        if parent_list is None:
             return None
-        return self.parent_list[-1]
+        return parent_list[-1]
 
     def _get_create_sql(self):
         """Returns the SQL required to create the object.
@@ -500,53 +565,64 @@ class DatabaseObject(object):
 class SchemaObject(DatabaseObject):
     """Base class for database objects that belong directly to a schema"""
 
+    __slots__ = ()
+
     config_names = []
 
     def __init__(self, parent, name, system=False, description=None):
         """Initializes an instance of the class"""
         assert isinstance(parent, Schema)
         super(SchemaObject, self).__init__(parent, name, system, description)
-        self.schema = parent
 
     def _get_database(self):
         return self.parent.parent
 
+    schema = property(attrgetter('parent'))
+
 
 class RelationObject(DatabaseObject):
     """Base class for database objects that belong directly to a relation"""
 
+    __slots__ = ()
+
     config_names = []
 
     def __init__(self, parent, name, system=False, description=None):
         """Initializes an instance of the class"""
         assert isinstance(parent, Relation)
         super(RelationObject, self).__init__(parent, name, system, description)
-        self.relation = self.parent
-        self.schema = self.parent.parent
 
     def _get_database(self):
         return self.parent.parent.parent
 
+    relation = property(attrgetter('parent'))
+    schema = property(attrgetter('parent.parent'))
+
 
 class RoutineObject(DatabaseObject):
     """Base class for database objects that belong directly to a routine"""
 
+    __slots__ = ()
+
     config_names = []
 
     def __init__(self, parent, name, system=False, description=None):
         """Initializes an instance of the class"""
         assert isinstance(parent, Routine)
         super(RoutineObject, self).__init__(parent, name, system, description)
-        self.routine = self.parent
-        self.schema = self.parent.parent
 
     def _get_database(self):
         return self.parent.parent.parent
 
+    routine = property(attrgetter('parent'))
+    schema = property(attrgetter('parent.parent'))
+
 
 class Relation(SchemaObject):
     """Base class for relations that belong in a schema (e.g. tables, views, etc.)"""
 
+    __slots__ = ()
+
     config_names = ['relation', 'relations']
 
     def _get_identifier(self):
@@ -597,6 +673,8 @@ class Relation(SchemaObject):
 class Routine(SchemaObject):
     """Base class for routines that belong in a schema (functions, procedures, etc.)"""
 
+    __slots__ = ('specific_name',)
+
     config_names = ['routine', 'routines']
 
     def __init__(self, parent, name, specific_name, system=False, description=None):
@@ -683,12 +761,9 @@ class Routine(SchemaObject):
 class Constraint(RelationObject):
     """Base class for constraints that belong in a relation (e.g. primary keys, checks, etc.)"""
 
-    config_names = ['constraint', 'constraints']
+    __slots__ = ()
 
-    def __init__(self, parent, name, system=False, description=None):
-        """Initializes an instance of the class"""
-        super(Constraint, self).__init__(parent, name, system, description)
-        self.table = self.parent
+    config_names = ['constraint', 'constraints']
 
     def _get_identifier(self):
         return "constraint_%s_%s_%s" % (self.schema.name, self.relation.name, self.name)
@@ -726,6 +801,7 @@ class Constraint(RelationObject):
     def _get_parent_list(self):
         return self.table.constraint_list
 
+    table = property(attrgetter('parent'))
     fields = property(lambda self: self._get_fields(), doc=_get_fields.__doc__)
     prototype = property(lambda self: self._get_prototype(), doc=_get_prototype.__doc__)
 
@@ -736,25 +812,49 @@ class Constraint(RelationObject):
 class Database(DatabaseObject):
     """Class representing a DB2 database"""
 
+    __slots__ = (
+        'source', 'lazy', 'schema_list', 'schemas', 'tablespace_list',
+        'tablespaces', '_schema_groups', '_shared', '_names', '_indexed',
+        '_registry', '_classes', '_size',
+    )
+
     config_names = ['database', 'databases', 'db', 'dbs']
 
-    def __init__(self, input):
-        """Initializes an instance of the class"""
+    def __init__(self, input, lazy=False):
+        """Initializes an instance of the class.
+
+        If lazy is True, the objects within each schema are not constructed
+        until one of the schema's attributes (e.g. table_list) is first
+        accessed, which means that a run that only requires a few objects
+        doesn't pay for constructing the whole hierarchy. Only construction is
+        deferred: retrieval is not, and every property of the input plugin is
+        read in full during construction (call the plugin's prefetch() method
+        beforehand to retrieve them concurrently), so the plugin may be closed
+        afterward as usual.
+        """
         super(Database, self).__init__(None, input.name)
         self.source = input
+        self.lazy = lazy
+        self._schema_groups = {}
+        self._shared = {}
+        self._registry = None
+        self._classes = None
+        self._size = None
+        if lazy:
+            # Read every property the schemas may need now, before the plugin
+            # is closed
+            for name in chain(input.prefetch_properties, input.derived_properties):
+                getattr(input, name)
         self.tablespace_list = [Tablespace(self, input, t) for t in input.tablespaces]
         self.tablespaces = dict((t.name, t) for t in self.tablespace_list)
-        self.schema_list = [Schema(self, input, s) for s in input.schemas]
-        # Prune completely empty schemas
+        # Prune completely empty schemas (before construction, so that their
+        # contents needn't be built to find out they're empty)
         self.schema_list = [
-            s for s in self.schema_list
-            if sum([
-                len(s.relation_list),
-                len(s.routine_list),
-                len(s.trigger_list),
-                len(s.index_list),
-                len(s.datatype_list),
-            ]) > 0
+            Schema(self, input, s) for s in input.schemas
+            if sum(
+                len(self._schema_rows(attr, s.name))
+                for attr in Schema.sources
+            ) > 0
         ]
         self.schemas = dict((s.name, s) for s in self.schema_list)
         # Prune completely empty tablespaces
@@ -766,6 +866,91 @@ class Database(DatabaseObject):
             ]) > 0
         ]
         self.tablespaces = dict((t.name, t) for t in self.tablespace_list)
+        # Build the index of qualified names used by find(). Schemas take
+        # precedence over tablespaces so they're added last. The contents of
+        # each schema are added as the schema is built (on first lookup in a
+        # lazy database)
+        self._names = {}
+        self._indexed = set()
+        for tablespace in self.tablespace_list:
+            self._names[_name_key((tablespace.name,))] = tablespace
+        for schema in self.schema_list:
+            self._names[_name_key((schema.name,))] = schema
+        if not lazy:
+            for schema in self.schema_list:
+                self._index_schema(schema)
+
+    def _schema_rows(self, attr, schema):
+        """Returns the rows of the named input property within schema.
+
+        The rows of the input plugin's property named by attr (e.g. "tables")
+        are grouped by schema on first use, so that building each schema does
+        not require a search of every row.
+        """
+        try:
+            groups = self._schema_groups[attr]
+        except KeyError:
+            groups = defaultdict(list)
+            for row in getattr(self.source, attr):
+                groups[row.schema].append(row)
+            self._schema_groups[attr] = groups
+        return groups.get(schema, [])
+
+    def _share(self, value):
+        """Returns a single shared copy of the immutable value.
+
+        Many objects have identical attribute values (e.g. the datatype of most
+        fields is one of a handful of combinations of type, size and
+        codepage). This method returns the first instance of value passed to
+        it, so that such objects can all refer to a single tuple.
+        """
+        return self._shared.setdefault(value, value)
+
+    def _index_schema(self, schema):
+        """Adds the objects within schema to the index of qualified names.
+
+        Objects are keyed by the names which qualify them (see _name_key). As
+        in find(), objects sharing a name are added in reverse order of
+        precedence so that the object which takes precedence overwrites the
+        others. The fields of aliases are not added; find() resolves these by
+        following the alias.
+        """
+        names = self._names
+        prefix = schema.name
+        self._indexed.add(prefix)
+        try:
+            for (name, routines) in schema.routines.iteritems():
+                names[_name_key((prefix, name))] = routines
+            for index in schema.index_list:
+                names[_name_key((prefix, index.name))] = index
+            for relation in schema.relation_list:
+                names[_name_key((prefix, relation.name))] = relation
+                if isinstance(relation, Table):
+                    for constraint in relation.constraint_list:
+                        names[_name_key((prefix, relation.name, constraint.name))] = constraint
+                if not isinstance(relation, Alias):
+                    for field in relation.field_list:
+                        names[_name_key((prefix, relation.name, field.name))] = field
+        except:
+            # A lazy schema which failed to build is indexed again next time
+            self._indexed.discard(prefix)
+            raise
+
+    def _lookup(self, parts):
+        """Returns the object qualified by the tuple of names in parts"""
+        if len(parts) > 1 and not parts[0] in self._indexed:
+            try:
+                schema = self.schemas[parts[0]]
+            except KeyError:
+                return None
+            self._index_schema(schema)
+        result = self._names.get(_name_key(parts))
+        if result is None and len(parts) == 3:
+            relation = self._names.get(_name_key(parts[:2]))
+            if isinstance(relation, Alias):
+                relation = relation.final_relation
+                result = self._lookup((relation.schema.name, relation.name, parts[2]))
+        return result
 
     def find(self, qualified_name):
         """Find an object in the hierarchy by its qualified name.
@@ -786,40 +971,81 @@ class Database(DatabaseObject):
         Hence, if a schema shares a name with a tablespace, the schema will
         be returned in preference to the tablespace. Likewise, if an index
         shares a name with a table, the table will be returned in preference
-        to the index.
+        to the index. Names within qualified_name may be quoted (e.g.
+        'SCHEMA."My.Table"'), in which case they may contain periods. For a
+        routine name, the result is a list of the routines which share that
+        name. If no object is found, the result is None.
         """
-        # XXX This is wrong: delimited names can contain the . separator
-        parts = qualified_name.split(".")
-        if len(parts) == 1:
-            return self.schemas.get(parts[0],
-                self.tablespaces.get(parts[0],
-                None))
-        elif len(parts) == 2:
-            try:
-                schema = self.schemas[parts[0]]
-            except KeyError:
-                return None
-            else:
-                return schema.relations.get(parts[1],
-                    schema.indexes.get(parts[1],
-                    schema.routines.get(parts[1],
-                    None)))
-        elif len(parts) == 3:
-            try:
-                relation = self.schemas[parts[0]].relations[parts[1]]
-            except KeyError:
-                return None
-            else:
-                if isinstance(relation, Alias):
-                    relation = relation.final_relation
-                if isinstance(relation, Table):
-                    return relation.fields.get(parts[2],
-                        relation.constraints.get(parts[2],
-                        None))
-                else:
-                    return relation.fields.get(parts[2], None)
-        else:
+        # Unquoted names are keyed by themselves in the index (see _name_key)
+        # so the common case requires no parsing at all
+        try:
+            return self._names[qualified_name]
+        except KeyError:
+            pass
+        try:
+            parts = split_ident(qualified_name)
+        except ValueError:
             return None
+        return self._lookup(parts)
+
+    def find_many(self, qualified_names):
+        """Find several objects in the hierarchy by their qualified names.
+
+        Returns a dictionary mapping each of the (distinct) names in the
+        iterable qualified_names to the result of find() for that name. This
+        is intended for resolving all the references in a set of documents at
+        once, which typically contain a great many repeated names.
+        """
+        result = {}
+        for qualified_name in qualified_names:
+            if not qualified_name in result:
+                result[qualified_name] = self.find(qualified_name)
+        return result
+
+    def objects(self, cls=DatabaseObject):
+        """Returns a tuple of all objects in the database of the class cls.
+
+        Objects are registered by class the first time this method (or
+        count()) is called, with a single walk of the hierarchy, so that
+        output plugins can process one type of object at a time without
+        walking the whole hierarchy (and dispatching on the class of each
+        object) repeatedly. In a lazy database, this builds every schema.
+
+        The result includes instances of subclasses of cls, e.g.
+        objects(Relation) returns all tables, views and aliases. Objects of
+        each class are returned in the order they are yielded by iterating over
+        the database; where cls has several subclasses, objects are grouped by
+        class. Like the rest of the hierarchy, the result is not permitted to
+        change, and is cached.
+        """
+        if self._registry is None:
+            registry = {}
+            seen = set()
+            for dbobject in self:
+                # The fields of aliases are those of the aliased relation, so
+                # iteration yields those more than once
+                if not dbobject in seen:
+                    seen.add(dbobject)
+                    registry.setdefault(type(dbobject), []).append(dbobject)
+            self._classes = tuple(sorted(registry, key=lambda c: c.__name__))
+            self._registry = dict(
+                (c, tuple(dbobjects))
+                for (c, dbobjects) in registry.iteritems()
+            )
+        try:
+            return self._registry[cls]
+        except KeyError:
+            result = self._registry[cls] = tuple(chain.from_iterable(
+                self._registry[c] for c in self._classes if issubclass(c, cls)
+            ))
+            return result
+
+    def count(self, cls=DatabaseObject):
+        """Returns the number of objects in the database of the class cls.
+
+        See objects() for further details.
+        """
+        return len(self.objects(cls))
 
     def __iter__(self):
         """Returns a generator which iterates over all objects in the database.
@@ -878,17 +1104,11 @@ class Database(DatabaseObject):
         return self
 
     def _get_size(self):
-        return sum(
-            table.size
-            for schema in self.schema_list
-            for table in schema.table_list
-            if table.size is not None
-        ) + sum(
-            index.size
-            for schema in self.schema_list
-            for index in schema.index_list
-            if index.size is not None
-        )
+        # Every table and index belongs to exactly one schema, so the schemas'
+        # (cached) sizes can simply be totalled
+        if self._size is None:
+            self._size = sum(schema.size for schema in self.schema_list)
+        return self._size
 
     size = property(lambda self: self._get_size(), doc=_get_size.__doc__)
 
@@ -896,6 +1116,11 @@ class Database(DatabaseObject):
 class Tablespace(DatabaseObject):
     """Class representing a tablespace"""
 
+    __slots__ = (
+        'owner', 'created', 'type', 'table_list', 'tables', 'index_list',
+        'indexes', '_size',
+    )
+
     config_names = ['tablespace', 'tablespaces']
 
     def __init__(self, database, input, row):
@@ -904,6 +1129,7 @@ class Tablespace(DatabaseObject):
         self.owner = row.owner
         self.created = row.created
         self.type = row.type
+        self._size = None
         self.table_list = RelationsList(
             self.database, input.tablespace_tables.get((self.name,), []),
             key=attrgetter('schema', 'name')
@@ -934,15 +1160,19 @@ class Tablespace(DatabaseObject):
         return self.database.tablespace_list
 
     def _get_size(self):
-        return sum(
-            table.size
-            for table in self.table_list
-            if table.size is not None
-        ) + sum(
-            index.size
-            for index in self.index_list
-            if index.size is not None
-        )
+        # The contents of a tablespace or schema are not permitted to change
+        # after construction, so the total is only calculated once
+        if self._size is None:
+            self._size = sum(
+                table.size
+                for table in self.table_list
+                if table.size is not None
+            ) + sum(
+                index.size
+                for index in self.index_list
+                if index.size is not None
+            )
+        return self._size
 
     size = property(lambda self: self._get_size(), doc=_get_size.__doc__)
 
@@ -952,60 +1182,102 @@ class Schema(DatabaseObject):
 
     config_names = ['schema', 'schemas']
 
+    # The input properties from which the objects in a schema are built
+    sources = (
+        'datatypes',
+        'tables',
+        'views',
+        'aliases',
+        'indexes',
+        'functions',
+        'procedures',
+        'triggers',
+    )
+
+    # The attributes built by _build() (on first access in a lazy database)
+    members = frozenset((
+        'datatype_list', 'datatypes',
+        'table_list', 'tables',
+        'view_list', 'views',
+        'alias_list', 'aliases',
+        'relation_list', 'relations',
+        'index_list', 'indexes',
+        'function_list', 'functions', 'specific_functions',
+        'procedure_list', 'procedures', 'specific_procedures',
+        'routine_list', 'routines', 'specific_routines',
+        'trigger_list', 'triggers',
+    ))
+
+    __slots__ = ('owner', 'created', '_built', '_size') + tuple(sorted(members))
+
     def __init__(self, database, input, row):
         """Initializes an instance of the class from a input row"""
         super(Schema, self).__init__(database, row.name, row.system, row.description)
         self.owner = row.owner
         self.created = row.created
-        self.datatype_list = [
-            Datatype(self, input, i)
-            for i in input.datatypes
-            if i.schema == self.name
-        ]
+        self._size = None
+        self._built = False
+        if not database.lazy:
+            self._build()
+
+    def __getattr__(self, name):
+        # Only called when normal lookup fails, i.e. when a member of a lazily
+        # constructed schema is accessed for the first time
+        if name in Schema.members and not getattr(self, '_built', True):
+            try:
+                self._build()
+            except AttributeError:
+                # An AttributeError escaping from here would look like a
+                # missing member (e.g. to hasattr), so report it as a failure
+                (exc_type, exc_value, exc_tb) = sys.exc_info()
+                raise RuntimeError('Failed to build schema %s: %s' % (self.name, exc_value)), None, exc_tb
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def _build(self):
+        """Constructs the objects contained by the schema"""
+        # Set first, so that accessing a member during construction raises
+        # AttributeError instead of recursing
+        self._built = True
+        try:
+            self._build_members()
+        except:
+            # Undo the partial construction, so that the next access to a
+            # member tries again instead of finding the schema half-built
+            exc_info = sys.exc_info()
+            for name in Schema.members:
+                try:
+                    delattr(self, name)
+                except AttributeError:
+                    pass
+            self._built = False
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    def _build_members(self):
+        database = self.database
+        input = database.source
+        rows = lambda attr: database._schema_rows(attr, self.name)
+        self.datatype_list = [Datatype(self, input, i) for i in rows('datatypes')]
         self.datatypes = dict((i.name, i) for i in self.datatype_list)
-        self.table_list = [
-            Table(self, input, i)
-            for i in input.tables
-            if i.schema == self.name
-        ]
+        self.table_list = [Table(self, input, i) for i in rows('tables')]
         self.tables = dict((i.name, i) for i in self.table_list)
-        self.view_list = [
-            View(self, input, i)
-            for i in input.views
-            if i.schema == self.name
-        ]
+        self.view_list = [View(self, input, i) for i in rows('views')]
         self.views = dict((i.name, i) for i in self.view_list)
-        self.alias_list = [
-            Alias(self, input, i)
-            for i in input.aliases
-            if i.schema == self.name
-        ]
+        self.alias_list = [Alias(self, input, i) for i in rows('aliases')]
         self.aliases = dict((i.name, i) for i in self.alias_list)
         self.relation_list = sorted(
             chain(self.table_list, self.view_list, self.alias_list),
             key=attrgetter('name')
         )
         self.relations = dict((i.name, i) for i in self.relation_list)
-        self.index_list = [
-            Index(self, input, i)
-            for i in input.indexes
-            if i.schema == self.name
-        ]
+        self.index_list = [Index(self, input, i) for i in rows('indexes')]
         self.indexes = dict((i.name, i) for i in self.index_list)
-        self.function_list = [
-            Function(self, input, i)
-            for i in input.functions
-            if i.schema == self.name
-        ]
+        self.function_list = [Function(self, input, i) for i in rows('functions')]
         self.functions = sorted(self.function_list, key=attrgetter('name', 'specific_name'))
         self.functions = groupby(self.functions, key=attrgetter('name'))
         self.functions = dict((name, list(funcs)) for (name, funcs) in self.functions)
         self.specific_functions = dict((i.specific_name, i) for i in self.function_list)
-        self.procedure_list = [
-            Procedure(self, input, i)
-            for i in input.procedures
-            if i.schema == self.name
-        ]
+        self.procedure_list = [Procedure(self, input, i) for i in rows('procedures')]
         self.procedures = sorted(self.procedure_list, key=attrgetter('name', 'specific_name'))
         self.procedures = groupby(self.procedures, key=attrgetter('name'))
         self.procedures = dict((name, list(procs)) for (name, procs) in self.procedures)
@@ -1019,11 +1291,7 @@ class Schema(DatabaseObject):
         self.routines = dict((name, list(routines)) for (name, routines) in self.routines)
         self.specific_routines = dict((i.specific_name, i) for i in self.routine_list)
         # XXX Add support for sequences
-        self.trigger_list = [
-            Trigger(self, input, i)
-            for i in input.triggers
-            if i.schema == self.name
-        ]
+        self.trigger_list = [Trigger(self, input, i) for i in rows('triggers')]
         self.triggers = dict((i.name, i) for i in self.trigger_list)
 
     def _get_identifier(self):
@@ -1040,15 +1308,19 @@ class Schema(DatabaseObject):
         return self.database.schema_list
 
     def _get_size(self):
-        return sum(
-            table.size
-            for table in self.table_list
-            if table.size is not None
-        ) + sum(
-            index.size
-            for index in self.index_list
-            if index.size is not None
-        )
+        # The contents of a tablespace or schema are not permitted to change
+        # after construction, so the total is only calculated once
+        if self._size is None:
+            self._size = sum(
+                table.size
+                for table in self.table_list
+                if table.size is not None
+            ) + sum(
+                index.size
+                for index in self.index_list
+                if index.size is not None
+            )
+        return self._size
 
     size = property(lambda self: self._get_size(), doc=_get_size.__doc__)
 
@@ -1056,6 +1328,15 @@ class Schema(DatabaseObject):
 class Table(Relation):
     """Class representing a table"""
 
+    __slots__ = (
+        'owner', 'created', 'last_stats', 'cardinality', 'size',
+        '_tablespace', '_field_list', '_fields', '_dependents',
+        '_dependent_list', 'indexes', 'index_list', 'triggers', 'trigger_list',
+        'trigger_dependents', 'trigger_dependent_list', 'unique_key_list',
+        'primary_key', 'unique_keys', 'foreign_key_list', 'foreign_keys',
+        'check_list', 'checks', 'constraint_list', 'constraints',
+    )
+
     config_names = ['table', 'tables']
 
     def __init__(self, schema, input, row):
@@ -1188,6 +1469,13 @@ class Table(Relation):
 class View(Relation):
     """Class representing a view"""
 
+    __slots__ = (
+        'owner', 'created', 'read_only', 'sql', '_field_list', '_fields',
+        '_dependents', '_dependent_list', 'dependencies', 'dependency_list',
+        'triggers', 'trigger_list', 'trigger_dependents',
+        'trigger_dependent_list',
+    )
+
     config_names = ['view', 'views']
 
     def __init__(self, schema, input, row):
@@ -1262,6 +1550,12 @@ class View(Relation):
 class Alias(Relation):
     """Class representing a alias"""
 
+    __slots__ = (
+        'owner', 'created', '_relation_schema', '_relation_name',
+        '_dependents', '_dependent_list', 'trigger_dependents',
+        'trigger_dependent_list',
+    )
+
     config_names = ['alias', 'aliases']
 
     def __init__(self, schema, input, row):
@@ -1341,6 +1635,11 @@ class Alias(Relation):
 class Index(SchemaObject):
     """Class representing an index"""
 
+    __slots__ = (
+        'owner', 'created', 'last_stats', 'cardinality', 'size', 'unique',
+        '_table_schema', '_table_name', '_tablespace', 'fields', 'field_list',
+    )
+
     config_names = ['index', 'indexes', 'indices']
 
     def __init__(self, schema, input, row):
@@ -1419,6 +1718,12 @@ class Index(SchemaObject):
 class Trigger(SchemaObject):
     """Class representing an index"""
 
+    __slots__ = (
+        'owner', 'created', '_relation_schema', '_relation_name',
+        'trigger_time', 'trigger_event', 'granularity', 'sql', 'dependencies',
+        'dependency_list',
+    )
+
     config_names = ['trigger', 'triggers']
 
     def __init__(self, schema, input, row):
@@ -1466,6 +1771,12 @@ class Trigger(SchemaObject):
 class Function(Routine):
     """Class representing a function"""
 
+    __slots__ = (
+        'owner', 'created', 'type', 'deterministic', 'external_action',
+        'null_call', 'sql_access', 'sql', '_param_list', '_params',
+        '_return_list', '_returns',
+    )
+
     config_names = ['function', 'functions', 'func', 'funcs']
 
     def __init__(self, schema, input, row):
@@ -1544,6 +1855,11 @@ class Function(Routine):
 class Procedure(Routine):
     """Class representing a procedure"""
 
+    __slots__ = (
+        'owner', 'created', 'deterministic', 'external_action', 'null_call',
+        'sql_access', 'sql', '_param_list', '_params',
+    )
+
     config_names = ['procedure', 'procedures', 'proc', 'procs']
 
     def __init__(self, schema, input, row):
@@ -1605,6 +1921,11 @@ class Procedure(Routine):
 class Datatype(SchemaObject):
     """Class representing a datatype"""
 
+    __slots__ = (
+        'owner', 'created', 'variable_size', 'variable_scale', 'size', 'scale',
+        '_source_schema', '_source_name',
+    )
+
     config_names = ['datatype', 'datatypes', 'type', 'types']
 
     def __init__(self, schema, input, row):
@@ -1639,18 +1960,20 @@ class Datatype(SchemaObject):
 class Field(RelationObject):
     """Class representing a field in a relation"""
 
+    __slots__ = (
+        'identity', 'nullable', 'cardinality', 'null_cardinality', 'generated',
+        'default', 'position', '_type',
+    )
+
     config_names = ['field', 'fields', 'column', 'columns', 'col', 'cols']
 
     def __init__(self, relation, input, position, row):
         """Initializes an instance of the class from a input row"""
         # XXX DB2 specific assumption: some databases have system columns (e.g. OID)
         super(Field, self).__init__(relation, row.name, False, row.description)
-        self._datatype_schema = row.type_schema
-        self._datatype_name = row.type_name
+        self._type = relation.database._share(DatatypeRef(
+            row.type_schema, row.type_name, row.size, row.scale, row.codepage))
         self.identity = row.identity
-        self._size = row.size
-        self._scale = row.scale
-        self.codepage = row.codepage
         self.nullable = row.nullable
         self.cardinality = row.cardinality
         self.null_cardinality = row.null_card
@@ -1711,7 +2034,7 @@ class Field(RelationObject):
 
     def _get_datatype(self):
         """Returns the object representing the field's datatype"""
-        return self.database.schemas[self._datatype_schema].datatypes[self._datatype_name]
+        return self.database.schemas[self._type.type_schema].datatypes[self._type.type_name]
 
     def _get_datatype_str(self):
         """Returns a string representation of the datatype of the field.
@@ -1728,23 +2051,23 @@ class Field(RelationObject):
                 format_ident(self.datatype.name)
             )
         if self.datatype.variable_size:
-            result += '(%s' % (format_size(self._size))
+            result += '(%s' % (format_size(self._type.size))
             if self.datatype.variable_scale:
-                result += ',%d' % (self._scale)
+                result += ',%d' % (self._type.scale)
             result += ')'
         return result
 
     def _get_size(self):
         """Returns the size of the field"""
         if self.datatype.variable_size:
-            return self._size
+            return self._type.size
         else:
             return None
 
     def _get_scale(self):
         """Returns the scale of the field"""
         if self.datatype.variable_scale:
-            return self._scale
+            return self._type.scale
         else:
             return None
 
@@ -1766,6 +2089,7 @@ class Field(RelationObject):
     datatype_str = property(_get_datatype_str)
     size = property(_get_size)
     scale = property(_get_scale)
+    codepage = property(lambda self: self._type.codepage)
     key_index = property(_get_key_index)
     key = property(_get_key)
     prototype = property(_get_prototype)
@@ -1774,6 +2098,11 @@ class Field(RelationObject):
 class UniqueKey(Constraint):
     """Class representing a unique key in a table"""
 
+    __slots__ = (
+        'owner', 'created', 'dependents', 'dependent_list', '_anonymous',
+        '_fields',
+    )
+
     config_names = ['unique_key', 'unique_keys', 'uniquekey', 'uniquekeys',
         'unique', 'uniques']
 
@@ -1816,6 +2145,8 @@ class UniqueKey(Constraint):
 class PrimaryKey(UniqueKey):
     """Class representing a primary key in a table"""
 
+    __slots__ = ()
+
     config_names = ['primary_key', 'primary_keys', 'primarykey', 'primarykeys',
         'primary', 'primaries', 'key', 'keys', 'pk', 'pks']
 
@@ -1829,6 +2160,11 @@ class PrimaryKey(UniqueKey):
 class ForeignKey(Constraint):
     """Class representing a foreign key in a table"""
 
+    __slots__ = (
+        'owner', 'created', 'delete_rule', 'update_rule', '_ref_table_schema',
+        '_ref_table_name', '_ref_key_name', '_anonymous', '_fields',
+    )
+
     config_names = ['foreign_key', 'foreign_keys', 'foreignkey', 'foreignkeys',
         'reference', 'references', 'fk', 'fks']
 
@@ -1888,6 +2224,8 @@ class ForeignKey(Constraint):
 class Check(Constraint):
     """Class representing a check constraint in a table"""
 
+    __slots__ = ('owner', 'created', 'expression', '_anonymous', '_fields')
+
     config_names = ['check', 'checks', 'ck', 'cks']
 
     def __init__(self, table, input, row):
@@ -1916,6 +2254,8 @@ class Check(Constraint):
 class Param(RoutineObject):
     """Class representing a parameter in a routine in a DB2 database"""
 
+    __slots__ = ('type', 'position', '_type')
+
     config_names = ['parameter', 'parameters', 'param', 'parameters',
         'parm', 'parms']
 
@@ -1927,11 +2267,8 @@ class Param(RoutineObject):
         # parameter" in any RDBMS?
         super(Param, self).__init__(routine, row.name or ('P%d' % position), False, row.description)
         self.type = row.direction
-        self._datatype_schema = row.type_schema
-        self._datatype_name = row.type_name
-        self.size = row.size
-        self.scale = row.scale
-        self.codepage = row.codepage
+        self._type = routine.database._share(DatatypeRef(
+            row.type_schema, row.type_name, row.size, row.scale, row.codepage))
         self.position = position
 
     def _get_identifier(self):
@@ -1943,7 +2280,7 @@ class Param(RoutineObject):
 
     def _get_datatype(self):
         """Returns the object representing the parameter's datatype"""
-        return self.database.schemas[self._datatype_schema].datatypes[self._datatype_name]
+        return self.database.schemas[self._type.type_schema].datatypes[self._type.type_name]
 
     def _get_datatype_str(self):
         """Returns a string representation of the datatype of the parameter.
@@ -1968,3 +2305,6 @@ class Param(RoutineObject):
 
     datatype = property(_get_datatype)
     datatype_str = property(_get_datatype_str)
+    size = property(lambda self: self._type.size)
+    scale = property(lambda self: self._type.scale)
+    codepage = property(lambda self: self._type.codepage)
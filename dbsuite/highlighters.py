@@ -32,10 +32,53 @@ from __future__ import (
     )
 
 import re
+import math
 import logging
 
 from dbsuite.tokenizer import Token, TokenTypes as TT
-from dbsuite.parser import ParseTokenError
+from dbsuite.parser import ParseError, ParseTokenError
+
+
+def _public_state(obj):
+    """Returns a picklable description of a tokenizer or parser instance."""
+    return (obj.__class__, dict(
+        (name, value) for (name, value) in obj.__dict__.iteritems()
+        if not name.startswith('_')
+    ))
+
+def _init_worker(tokenizer, formatter):
+    """Initializes the tokenizer and parser of a parse_batch() worker."""
+    global _worker
+    instances = []
+    for (cls, state) in (tokenizer, formatter):
+        instance = cls()
+        instance.__dict__.update(state)
+        instances.append(instance)
+    _worker = tuple(instances)
+
+def _parse_batch(batch):
+    """Tokenizes and parses a batch of statements in a worker process.
+
+    Returns the result of the parser's parse_batch() method, or None if the
+    batch could not be tokenized or parsed, or if the tokens show that the
+    batch doesn't end where split() claimed a statement ends (in which case
+    next_terminator, the terminator the following batch begins with, is not
+    None).
+    """
+    (sql, terminator, next_terminator, line_split) = batch
+    (tokenizer, formatter) = _worker
+    formatter.line_split = line_split
+    tokens = tokenizer.parse(sql, terminator, line_split)
+    if any(token.type == TT.ERROR for token in tokens):
+        return None
+    if next_terminator is not None and not (
+            tokens and tokens[-1].type == TT.TERMINATOR and
+            tokenizer.terminator == next_terminator):
+        return None
+    try:
+        return formatter.parse_batch(tokens)
+    except ParseError:
+        return None
 
 
 class CommentHighlighter(object):
@@ -180,14 +223,31 @@ class SQLHighlighter(object):
     highlighter can obtain a tokenizer and parser for the SQL dialect of the
     plugin's particular database engine.  The class defines various handler
     stubs for converting the result tokens into markup.
+
+    If the cache attribute (shared by all instances unless overridden) is set
+    to a ParseCache, the reformatted tokens of any SQL that was successfully
+    tokenized and parsed are stored in it, and looked up by parse() before
+    tokenizing anything.
     """
 
+    cache = None
+
     def __init__(self, plugin, for_scripts=False):
         """Initializes an instance of the class"""
         super(SQLHighlighter, self).__init__()
         self.tokenizer = plugin.tokenizer()
         self.formatter = plugin.parser(for_scripts=for_scripts)
         self.tokenizer.raise_errors = False
+        self._pool = None
+        self._pool_key = None
+
+    def close(self):
+        """Terminates the pool of processes started by parse(), if any."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._pool_key = None
 
     def format_line(self, index, line):
         """Stub handler for a line of tokens"""
@@ -197,7 +257,7 @@ class SQLHighlighter(object):
         """Stub handler for a token"""
         return token.source
 
-    def parse(self, sql, terminator=';', line_split=False):
+    def parse(self, sql, terminator=';', line_split=False, jobs=1):
         """Converts the provided SQL into another markup language.
 
         The sql parameter contains the SQL to be converted into markup. The
@@ -211,6 +271,13 @@ class SQLHighlighter(object):
         is a single line of tokens in the input. This provides the opportunity
         for descendent classes to perform by-line handling, e.g. converting the
         SQL into a two-column table with line numbers in the left column.
+
+        If the optional jobs parameter is greater than 1, the script is split
+        into batches of statements which are reformatted by a pool of jobs
+        processes (if jobs is 0, one per CPU). The result is the same as
+        reformatting the script in this process, which is also what happens if
+        any batch contains an error. The pool is reused by later calls until
+        close() is called.
         """
         def excerpt(tokens):
             if len(tokens) > 10:
@@ -220,24 +287,40 @@ class SQLHighlighter(object):
             return ''.join(token.source for token in excerpt)
 
         self.formatter.line_split = line_split
-        tokens = self.tokenizer.parse(sql, terminator, line_split)
-        # Check for errors in the tokens
-        errors = [token for token in tokens if token.type == TT.ERROR]
-        if errors:
-            # If errors were found, log a warning for each error and return the
-            # SQL highlighted from the tokenized stream without reformatting
-            logging.warning('While tokenizing %s' % excerpt(tokens))
-            for error in errors:
-                logging.warning('error %s found at line %d, column %d' % (error.value, error.line, error.column))
-        else:
-            # If the SQL tokenized successfully, attempt to reformat it nicely
-            # but if an error occurs, just warn about it and continue with the
-            # SQL highlighted from the tokenized stream
-            try:
-                tokens = self.formatter.parse(tokens)
-            except ParseTokenError, e:
-                logging.warning('While formatting %s' % excerpt(tokens))
-                logging.warning('error %s found at line %d, column %d' % (str(e), e.line, e.column))
+        tokens = None
+        if self.cache is not None:
+            key = self.cache.key(
+                repr(sorted(_public_state(self.tokenizer)[1].iteritems())),
+                self.formatter.cache_options(),
+                terminator, sql)
+            tokens = self.cache.get(key)
+        if tokens is None and jobs != 1:
+            tokens = self._parse_parallel(sql, terminator, line_split, jobs)
+            if tokens is not None and self.cache is not None:
+                self.cache.put(key, tokens)
+        if tokens is None:
+            tokens = self.tokenizer.parse(sql, terminator, line_split)
+            # Check for errors in the tokens
+            errors = [token for token in tokens if token.type == TT.ERROR]
+            if errors:
+                # If errors were found, log a warning for each error and return
+                # the SQL highlighted from the tokenized stream without
+                # reformatting
+                logging.warning('While tokenizing %s' % excerpt(tokens))
+                for error in errors:
+                    logging.warning('error %s found at line %d, column %d' % (error.value, error.line, error.column))
+            else:
+                # If the SQL tokenized successfully, attempt to reformat it
+                # nicely but if an error occurs, just warn about it and
+                # continue with the SQL highlighted from the tokenized stream
+                try:
+                    tokens = self.formatter.parse(tokens)
+                except ParseTokenError, e:
+                    logging.warning('While formatting %s' % excerpt(tokens))
+                    logging.warning('error %s found at line %d, column %d' % (str(e), e.line, e.column))
+                else:
+                    if self.cache is not None:
+                        self.cache.put(key, tokens)
         if tokens:
             if line_split:
                 return (
@@ -249,6 +332,70 @@ class SQLHighlighter(object):
         else:
             return ()
 
+    def _parse_parallel(self, sql, terminator, line_split, jobs):
+        """Reformats the provided SQL with a pool of processes.
+
+        The script is split between statements (see the tokenizer's split()
+        method), noting the terminator in effect at the start of each batch of
+        statements. Each worker process tokenizes and parses its batches with
+        its own tokenizer and parser, configured like those of the
+        highlighter, and the results are reassembled in order by the parser's
+        finish_batches() method. Returns None if the script is too short to be
+        worth splitting, or if any batch failed to tokenize or parse.
+
+        Each worker also checks that its batch ends with a TERMINATOR token
+        and that the terminator then in effect is the one the next batch
+        begins with; if split() ever disagrees with the tokenizer about where
+        a statement ends, the script is reformatted serially instead.
+
+        The only state carried from one batch to the next is the statement
+        terminator. Anything else a script establishes for later statements
+        (e.g. the current schema or connection) is not known to a batch. The
+        reformatting performed here doesn't depend on such state, but anything
+        which comes to depend on it must not be run in batches.
+
+        The pool is kept for subsequent calls (see close()), and is replaced
+        if the number of jobs or the configuration of the tokenizer or parser
+        changes.
+        """
+        # Imported here as most invocations never start a pool
+        import multiprocessing
+        if jobs < 1:
+            jobs = multiprocessing.cpu_count()
+        spans = list(self.tokenizer.split(sql, terminator, terminators=True))
+        if jobs < 2 or len(spans) < 2:
+            return None
+        # Several batches per process evens out the load when some statements
+        # are much more complex than others
+        size = int(math.ceil(len(spans) / (jobs * 4)))
+        batches = [
+            (
+                sql[spans[i][0]:spans[min(i + size, len(spans)) - 1][1]],
+                spans[i][2],
+                spans[i + size][2] if i + size < len(spans) else None,
+                line_split,
+            )
+            for i in xrange(0, len(spans), size)
+        ]
+        results = self._get_pool(jobs).map(_parse_batch, batches, chunksize=1)
+        if None in results:
+            return None
+        return self.formatter.finish_batches(results)
+
+    def _get_pool(self, jobs):
+        """Returns a pool of jobs processes for _parse_parallel()."""
+        import multiprocessing
+        tokenizer = _public_state(self.tokenizer)
+        formatter = _public_state(self.formatter)
+        # line_split is passed with each batch
+        formatter[1].pop('line_split', None)
+        key = (jobs, tokenizer, formatter)
+        if self._pool is None or self._pool_key != key:
+            self.close()
+            self._pool = multiprocessing.Pool(jobs, _init_worker, (tokenizer, formatter))
+            self._pool_key = key
+        return self._pool
+
     def parse_prototype(self, sql):
         """Utility routine for marking up a routine prototype (as opposed to a complete SQL script)"""
         self.tokenizer.line_split = False
@@ -256,9 +403,9 @@ class SQLHighlighter(object):
         tokens = self.formatter.parse_routine_prototype(self.tokenizer.parse(sql))
         return [self.format_token(token) for token in tokens]
 
-    def parse_to_string(self, sql, terminator=';', line_split=False):
+    def parse_to_string(self, sql, terminator=';', line_split=False, jobs=1):
         """Utility routine which returns the result of parse() as a single string"""
-        return ''.join(self.parse(sql, terminator, line_split))
+        return ''.join(self.parse(sql, terminator, line_split, jobs))
 
     def parse_prototype_to_string(self, sql):
         """Utility routine which returns the result of parse_prototype() as a single string"""
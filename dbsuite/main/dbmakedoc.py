@@ -23,6 +23,7 @@ from __future__ import (
     division,
     )
 
+import os
 import optparse
 import ConfigParser
 import logging
@@ -31,6 +32,8 @@ from operator import itemgetter
 import dbsuite.db
 import dbsuite.plugins
 import dbsuite.main
+import dbsuite.parser
+import dbsuite.highlighters
 
 
 class MakeDocUtility(dbsuite.main.Utility):
@@ -45,7 +48,14 @@ class MakeDocUtility(dbsuite.main.Utility):
 
     def __init__(self):
         super(MakeDocUtility, self).__init__()
-        self.parser.set_defaults(test=False, config=None, plugin=None)
+        self.parser.set_defaults(test=False, config=None, plugin=None,
+            cache_dir=os.path.join(
+                os.environ.get('XDG_CACHE_HOME', os.path.expanduser(os.path.join('~', '.cache'))),
+                'dbsuite'),
+            cache_size=100, snapshot_dir=None, full_refresh=False, lazy=False)
+        self.snapshots = None
+        self.full_refresh = False
+        self.lazy = False
         self.parser.add_option(
             '', '--list-plugins', dest='plugin', action='store_const', const='*',
             help='list the available input and output plugins')
@@ -55,6 +65,29 @@ class MakeDocUtility(dbsuite.main.Utility):
         self.parser.add_option(
             '-n', '--dry-run', dest='test', action='store_true',
             help='test a configuration without actually executing anything')
+        self.parser.add_option(
+            '', '--cache-dir', dest='cache_dir',
+            help='specify the directory in which reformatted SQL is cached '
+            '(default=%default)')
+        self.parser.add_option(
+            '', '--cache-size', dest='cache_size', type='int',
+            help='specify the maximum size of the cache in megabytes '
+            '(default=%default)')
+        self.parser.add_option(
+            '', '--no-cache', dest='cache_dir', action='store_const', const=None,
+            help='disable the cache of reformatted SQL')
+        self.parser.add_option(
+            '', '--snapshot-dir', dest='snapshot_dir',
+            help='specify a directory in which to keep a snapshot of the '
+            'catalog of each input; subsequent runs retrieve only the schemas '
+            'that have changed since (default is not to keep snapshots)')
+        self.parser.add_option(
+            '', '--full-refresh', dest='full_refresh', action='store_true',
+            help='ignore existing snapshots and retrieve the catalog in full')
+        self.parser.add_option(
+            '', '--lazy', dest='lazy', action='store_true',
+            help='construct the objects of each schema only when an output '
+            'first requires them; the catalog is still retrieved in full')
         # retained for backward compatibility
         self.parser.add_option(
             '', '--help-plugins', dest='plugin', action='store_const', const='*',
@@ -71,7 +104,19 @@ class MakeDocUtility(dbsuite.main.Utility):
         elif options.test:
             self.test_config(args)
         else:
-            self.make_docs(args)
+            if options.cache_dir:
+                dbsuite.highlighters.SQLHighlighter.cache = dbsuite.parser.ParseCache(
+                    options.cache_dir, options.cache_size * 1024 * 1024)
+            if options.snapshot_dir:
+                self.snapshots = dbsuite.plugins.CatalogSnapshot(options.snapshot_dir)
+                self.full_refresh = options.full_refresh
+            self.lazy = options.lazy
+            try:
+                self.make_docs(args)
+            finally:
+                if dbsuite.highlighters.SQLHighlighter.cache is not None:
+                    dbsuite.highlighters.SQLHighlighter.cache.log_stats()
+                    dbsuite.highlighters.SQLHighlighter.cache = None
         return 0
 
     def process_config(self, config_file):
@@ -147,6 +192,15 @@ class MakeDocUtility(dbsuite.main.Utility):
         is the routine to call (ignore parse_cmdline which does other stuff
         like fiddling around with logging and exception hooks, which you
         probably don't want).
+
+        If the snapshots attribute is set to a CatalogSnapshot instance, the
+        information retrieved by each input section is stored in it, and only
+        those schemas which have changed since are retrieved by subsequent
+        runs (unless the full_refresh attribute is set).
+
+        If the lazy attribute is set, each database is constructed lazily (see
+        dbsuite.db.Database). This only defers the construction of objects;
+        the catalog is still retrieved in full before the input is closed.
         """
         for config_file in config_files:
             (inputs, outputs) = self.process_config(config_file)
@@ -154,7 +208,18 @@ class MakeDocUtility(dbsuite.main.Utility):
                 logging.info('Executing input section [%s]' % section)
                 input.open()
                 try:
-                    db = dbsuite.db.Database(input)
+                    if self.snapshots is not None:
+                        key = '%s:%s' % (
+                            os.path.abspath(config_file)
+                            if isinstance(config_file, basestring) else
+                            getattr(config_file, 'name', '<unknown>'),
+                            section)
+                        input.refresh(
+                            None if self.full_refresh else self.snapshots.load(key))
+                    input.prefetch()
+                    db = dbsuite.db.Database(input, lazy=self.lazy)
+                    if self.snapshots is not None:
+                        self.snapshots.save(key, input.take_snapshot())
                 finally:
                     input.close()
                 for (section, output) in outputs:
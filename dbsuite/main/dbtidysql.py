@@ -29,6 +29,8 @@ import logging
 import dbsuite.highlighters
 import dbsuite.plugins
 import dbsuite.main
+from dbsuite.tokenizer import TokenTypes as TT
+from dbsuite.parser import ParseTokenError, ParserProfile
 
 
 class TidySqlUtility(dbsuite.main.Utility):
@@ -38,15 +40,29 @@ class TidySqlUtility(dbsuite.main.Utility):
     the db2makedoc application uses for generating SQL in documentation. Either
     specify the names of files containing the SQL to reformat, or specify - to
     indicate that stdin should be read. The reformatted SQL will be written to
-    stdout in either case. The available command line options are listed below.
+    stdout in either case. If --check is specified, the SQL is only checked for
+    errors, which are logged, and the exit code is 1 if any were found. The
+    available command line options are listed below.
     """
 
     def __init__(self):
         super(TidySqlUtility, self).__init__()
-        self.parser.set_defaults(terminator=';')
+        self.parser.set_defaults(terminator=';', jobs=1, check=False,
+            profile_parser=False)
         self.parser.add_option(
             '-t', '--terminator', dest='terminator',
             help='specify the statement terminator (default=";")')
+        self.parser.add_option(
+            '-j', '--jobs', dest='jobs', type='int',
+            help='specify the number of processes to reformat with; 0 '
+            'indicates one per CPU (default=1)')
+        self.parser.add_option(
+            '-c', '--check', dest='check', action='store_true',
+            help='check that the SQL parses without reformatting it')
+        self.parser.add_option(
+            '', '--profile-parser', dest='profile_parser', action='store_true',
+            help='write statistics about the grammar rules of the parser to '
+            'stderr (implies --jobs=1)')
 
     def main(self, options, args):
         super(TidySqlUtility, self).main(options, args)
@@ -54,20 +70,64 @@ class TidySqlUtility(dbsuite.main.Utility):
         # XXX Add method to select input plugin
         plugin = dbsuite.plugins.load_plugin('db2.luw')()
         highlighter = dbsuite.highlighters.SQLHighlighter(plugin, for_scripts=True)
-        for sql_file in args:
-            if sql_file == '-':
-                if not done_stdin:
-                    done_stdin = True
-                    sql_file = sys.stdin
+        if options.profile_parser:
+            profile = ParserProfile(highlighter.formatter)
+            profile.install()
+            options.jobs = 1
+        result = 0
+        try:
+            for sql_file in args:
+                name = sql_file
+                if sql_file == '-':
+                    if not done_stdin:
+                        done_stdin = True
+                        sql_file = sys.stdin
+                    else:
+                        raise IOError('Cannot read input from stdin multiple times')
+                else:
+                    sql_file = open(sql_file, 'rU')
+                sql = sql_file.read()
+                if options.check:
+                    if not self.check(highlighter, name, sql, options.terminator):
+                        result = 1
                 else:
-                    raise IOError('Cannot read input from stdin multiple times')
-            else:
-                sql_file = open(sql_file, 'rU')
-            sql = sql_file.read()
-            sql = highlighter.parse_to_string(sql, terminator=options.terminator)
-            sys.stdout.write(sql)
-            sys.stdout.flush()
-        return 0
+                    sql = highlighter.parse_to_string(sql, terminator=options.terminator,
+                        jobs=options.jobs)
+                    sys.stdout.write(sql)
+                    sys.stdout.flush()
+        finally:
+            highlighter.close()
+        if options.profile_parser:
+            profile.remove()
+            self.write_profile(profile)
+        return result
+
+    def write_profile(self, profile):
+        """Writes the report of the specified ParserProfile to stderr."""
+        sys.stderr.write('%-40s %10s %10s %10s %10s\n' % (
+            'rule', 'calls', 'time', 'backtracks', 'tokens'))
+        for stats in profile.report():
+            sys.stderr.write('%-40s %10d %10.3f %10d %10d\n' % stats)
+
+    def check(self, highlighter, name, sql, terminator):
+        """Checks that the specified SQL tokenizes and parses.
+
+        Errors are logged, prefixed with name. The parser's validate() method
+        is used, which is considerably faster than reformatting the SQL.
+        Returns True if no errors were found.
+        """
+        tokens = highlighter.tokenizer.parse(sql, terminator)
+        errors = [token for token in tokens if token.type == TT.ERROR]
+        for error in errors:
+            logging.error('%s: error %s found at line %d, column %d' % (name, error.value, error.line, error.column))
+        if errors:
+            return False
+        try:
+            highlighter.formatter.validate(tokens)
+        except ParseTokenError, e:
+            logging.error('%s: error %s found at line %d, column %d' % (name, str(e), e.line, e.column))
+            return False
+        return True
 
 main = TidySqlUtility()
 
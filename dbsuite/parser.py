@@ -32,14 +32,23 @@ from __future__ import (
     division,
     )
 
-import pdb
 import re
+import os
 import sys
 import math
+import zlib
+import errno
+import hashlib
+import logging
+import cPickle as pickle
 from decimal import Decimal
+from functools import wraps
+from timeit import default_timer
 from itertools import tee, izip
+from collections import OrderedDict, namedtuple
 
-from dbsuite.tokenizer import TokenTypes, Token, Error, TokenError, sql92_namechars, sql92_identchars
+from dbsuite import __version__
+from dbsuite.tokenizer import TokenTypes, Token, TokenBuffer, Error, TokenError, sql92_namechars, sql92_identchars
 
 __all__ = [
     'dump',
@@ -47,14 +56,17 @@ __all__ = [
     'quote_str',
     'format_ident',
     'format_param',
+    'split_ident',
     'format_size',
     'recalc_positions',
     'format_tokens',
     'convert_indent',
     'convert_valign',
+    'align_tokens',
     'merge_whitespace',
     'strip_whitespace',
     'split_lines',
+    'index_templates',
     'Connection',
     'Error',
     'ParseError',
@@ -63,6 +75,11 @@ __all__ = [
     'ParseExpectedOneOfError',
     'ParseExpectedSequenceError',
     'BaseParser',
+    'ParseCache',
+    'ParserProfile',
+    'RuleStats',
+    'memoized',
+    'iterative',
 ]
 
 # Add some custom token types used by the formatter
@@ -83,6 +100,17 @@ for (type, name) in (
     TT.add(type, name)
 
 ctrlchars = re.compile(ur'([\x00-\x1F\x7F-\xFF]+)')
+# Token type transformations that are permitted to occur in order to obtain a
+# successful match (e.g. if we're expecting a DATATYPE but find an IDENTIFIER,
+# BaseParser._cmp_tokens may mutate the IDENTIFIER token into a DATATYPE token
+# and return it, indicating a successful match)
+token_transforms = {
+    TT.KEYWORD:     (TT.IDENTIFIER, TT.DATATYPE, TT.REGISTER, TT.SCHEMA, TT.RELATION, TT.ROUTINE),
+    TT.IDENTIFIER:  (TT.DATATYPE, TT.REGISTER, TT.SCHEMA, TT.RELATION, TT.ROUTINE),
+    TT.STRING:      (TT.PASSWORD,),
+    TT.TERMINATOR:  (TT.STATEMENT,),
+    TT.EOF:         (TT.STATEMENT,),
+}
 def quote_str(s, quotechar="'"):
     """Quotes a string, doubling all quotation characters within it.
 
@@ -160,6 +188,48 @@ def format_param(param, namechars=set(sql92_namechars)):
     else:
         return ':%s' % (format_ident(param, namechars=namechars))
 
+# Patterns matching a single name within a qualified identifier, compiled by
+# split_ident on demand and keyed by quotation character
+ident_parts = {}
+
+def split_ident(name, quotechar='"'):
+    """Splits a qualified SQL identifier into its component names.
+
+    The name parameter provides a (possibly qualified) identifier, e.g.
+    'SCHEMA.TABLE' or 'SCHEMA."My.Table"'. The result is a tuple of the names
+    separated by periods, with the quotes removed from (and doubled quotation
+    characters restored within) any quoted names. Unquoted names are returned
+    as given; no case folding is performed. A ValueError is raised if name is
+    not a valid identifier (e.g. if it contains a blank name or an unterminated
+    quoted name).
+    """
+    if not quotechar in name:
+        # Fast path for the common case of no quoted names
+        result = tuple(name.split('.'))
+        if '' in result:
+            raise ValueError('Invalid identifier %s' % name)
+        return result
+    pattern = ident_parts.get(quotechar)
+    if pattern is None:
+        q = re.escape(quotechar)
+        pattern = ident_parts[quotechar] = re.compile(
+            r'(?:%s((?:[^%s]|%s%s)+)%s|([^.%s]+))(?:\.|(\Z))' % (
+                q, q, q, q, q, q), re.UNICODE)
+    result = []
+    pos = 0
+    while True:
+        match = pattern.match(name, pos)
+        if not match:
+            raise ValueError('Invalid identifier %s' % name)
+        quoted, unquoted, end = match.groups()
+        if quoted is None:
+            result.append(unquoted)
+        else:
+            result.append(quoted.replace(quotechar * 2, quotechar))
+        if end is not None:
+            return tuple(result)
+        pos = match.end()
+
 def format_size(value, for_sql=True):
     """Formats sizes with standard K/M/G/T/etc. suffixes.
 
@@ -199,13 +269,14 @@ def recalc_positions(tokens):
     line = 1
     column = 1
     for token in tokens:
-        yield Token(token.type, token.value, token.source, line, column)
-        for char in token.source:
-            if char == '\n':
-                line += 1
-                column = 1
-            else:
-                column += 1
+        source = token.source
+        yield Token(token.type, token.value, source, line, column)
+        breaks = source.count('\n')
+        if breaks:
+            line += breaks
+            column = len(source) - source.rindex('\n')
+        else:
+            column += len(source)
 
 def format_tokens(tokens, reformat=[], terminator=';', statement=';', namechars=set(sql92_namechars)):
     """Changes token source to a canonical format.
@@ -267,10 +338,53 @@ def convert_valign(tokens):
     """Converts VALIGN and VAPPLY tokens into WHITESPACE.
 
     This generator function converts VALIGN and VAPPLY tokens into WHITESPACE
-    tokens.  Multiple passes are used to convert the VALIGN tokens; each pass
-    converts the first VALIGN token found on a set of lines prior to a VAPPLY
-    token into a WHITESPACE token. The final result will require recalculation
-    of positions if any tokens have been replaced.
+    tokens. Tokens are buffered a line at a time, or for as long as a block of
+    VALIGN tokens awaits a VAPPLY token, and each buffered run of lines is
+    converted by align_tokens(). The final result will require recalculation
+    of positions.
+    """
+    chunk = []
+    aligning = applied = False
+    for token in tokens:
+        if '\n' in token.source and chunk:
+            # At the start of a line, pass on everything buffered unless it
+            # includes an unapplied VALIGN block. A chunk which starts with a
+            # line break is aligned independently of prior tokens
+            if not aligning:
+                for t in chunk:
+                    yield t
+                chunk = []
+            elif applied:
+                applied = False
+                result = align_tokens(chunk)
+                if result is not None:
+                    for t in result:
+                        yield t
+                    chunk = []
+                    aligning = False
+        chunk.append(token)
+        if token.type == TT.VALIGN:
+            aligning = True
+            applied = False
+        elif token.type == TT.VAPPLY and aligning:
+            applied = True
+    if aligning:
+        chunk = align_tokens(chunk)
+        # If the result is None, then we encountered VALIGNs without a
+        # corresponding VAPPLY (parser bug)
+        assert chunk is not None
+    for t in chunk:
+        yield t
+
+def align_tokens(tokens):
+    """Converts VALIGN and VAPPLY tokens in a list into WHITESPACE.
+
+    This function converts the VALIGN and VAPPLY tokens in the provided list
+    into WHITESPACE tokens, returning a new list. Multiple passes are used to
+    convert the VALIGN tokens; each pass converts the first VALIGN token found
+    on a set of lines prior to a VAPPLY token into a WHITESPACE token. If any
+    pass ends with VALIGN tokens lacking a corresponding VAPPLY token, None is
+    returned.
     """
     indexes = []
     aligncol = alignline = 0
@@ -308,9 +422,8 @@ def convert_valign(tokens):
                     result[-1] = Token(TT.WHITESPACE, None, '', 0, 0)
                     indexes = []
                     aligncol = alignline = 0
-        # If indexes isn't blank, then we encountered VALIGNs without a
-        # corresponding VAPPLY (parser bug)
-        assert not indexes
+        if indexes:
+            return None
         tokens = result
     return result
 
@@ -391,6 +504,37 @@ def split_lines(tokens):
         if source or type not in (TT.WHITESPACE, TT.COMMENT):
             yield Token(type, value, source, line, column)
 
+# Lookup tables built by BaseParser._candidates, keyed by template tuple, and
+# by call site (id of the code object, then instruction offset)
+_candidate_tables = {}
+_candidate_sites = {}
+
+def index_templates(templates):
+    """Indexes a sequence of template tokens by the tokens they can match.
+
+    Returns a tuple of (by_value, by_type, always) where by_value maps token
+    values, and by_type maps token types, to the positions of templates in the
+    sequence which could match a token with that value or type according to
+    the rules of BaseParser._cmp_tokens(). The always element lists the
+    positions of templates which must be tried against any token.
+    """
+    by_value = {}
+    by_type = {}
+    always = []
+    for (i, template) in enumerate(templates):
+        if isinstance(template, basestring):
+            by_value.setdefault(template, []).append(i)
+        elif isinstance(template, int):
+            by_type.setdefault(template, []).append(i)
+            for (token_type, targets) in token_transforms.iteritems():
+                if template in targets:
+                    by_type.setdefault(token_type, []).append(i)
+        elif isinstance(template, tuple) and len(template) > 1:
+            by_value.setdefault(template[1], []).append(i)
+        else:
+            always.append(i)
+    return (by_value, by_type, always)
+
 class ParseError(Error):
     """Raised when a parsing error is found."""
     pass
@@ -466,6 +610,328 @@ class ParseExpectedSequenceError(ParseTokenError):
         )
         ParseTokenError.__init__(self, source, tokens[0], msg)
 
+def memoized(rule):
+    """Decorator which adds packrat memoization to a parser rule.
+
+    When the memoize property of the parser is True, the outcome of each call
+    to the decorated rule is stored against the rule's name, the current token
+    index, indentation level, whether the output currently ends with spacing,
+    and the rule's arguments. A later call with the same key replays the
+    result (the final index and level, and the tokens appended to the output)
+    or re-raises the ParseError of a failed attempt without re-running the
+    rule. Hence, a rule which is retried at the same position after a
+    backtrack is only ever parsed once.
+
+    Only rules whose effects are limited to the index, the level, and the
+    output appended after their starting position may be decorated. As a
+    safeguard, results are not stored for calls which altered output prior to
+    their starting position (via _insert_output or _update_output).
+    """
+    name = rule.__name__
+    @wraps(rule)
+    def wrapper(self, *args, **kwargs):
+        if not self.memoize:
+            return rule(self, *args, **kwargs)
+        key = self._memo_key(name, args, kwargs)
+        try:
+            entry = self._memo[key]
+        except KeyError:
+            self.memo_misses += 1
+        else:
+            self.memo_hits += 1
+            return self._memo_replay(entry)
+        memo = self._memo_start(key)
+        try:
+            result = rule(self, *args, **kwargs)
+        except ParseError, e:
+            self._memo_finish(memo, None, e)
+            raise
+        else:
+            self._memo_finish(memo, result, None)
+            return result
+    wrapper.memoized = True
+    return wrapper
+
+def iterative(rule):
+    """Decorator which declares a parser rule implemented as a generator.
+
+    Instead of calling other rules, the decorated generator yields (method,
+    args) tuples to request that the parser call method with the tuple args.
+    The result of the call is sent back into the generator, or the ParseError
+    it raised is thrown into the generator at the same point (hence the usual
+    save/restore state constructs work unchanged around a yield). When the
+    requested method is itself an iterative rule, it is run on an explicit
+    stack by BaseParser._run_iterative() instead of being called recursively.
+    Hence, the depth of nesting that a group of iterative rules can parse (e.g.
+    of parenthesized expressions and search conditions) is not limited by
+    Python's recursion limit, and each level of nesting costs a generator
+    instead of several stack frames.
+
+    Calling the decorated method from ordinary code runs the rule to
+    completion and returns None (generators cannot return values). If the
+    rule is also memoized(), requests for it are memoized too.
+    """
+    @wraps(rule)
+    def wrapper(self, *args, **kwargs):
+        return self._run_iterative(rule(self, *args, **kwargs))
+    wrapper.generator = rule
+    return wrapper
+
+class ParseCache(object):
+    """Persistent cache of formatted token streams.
+
+    The cache is stored in the directory specified by the path parameter
+    (which is created if it doesn't exist). Each entry is a file named after
+    the SHA-1 digest of its key, containing a compressed pickle of the tokens.
+    When the total size of the entries exceeds max_size bytes, the least
+    recently used entries are evicted. The time an entry was last used is
+    stored as the modification time of its file, hence the order of use
+    persists between runs.
+
+    Keys are generated with the key() method from anything which affects the
+    output of a parse: the version of dbsuite, the dialect, the parser's
+    options, and the source. The hits and misses attributes count the lookups
+    performed by get().
+    """
+
+    suffix = '.tokens'
+
+    def __init__(self, path, max_size=100 * 1024 * 1024):
+        super(ParseCache, self).__init__()
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._size = 0
+
+    def key(self, *parts):
+        """Returns the key of an entry derived from the specified strings."""
+        result = hashlib.sha1()
+        for part in parts:
+            result.update(part.encode('utf-8'))
+            result.update(b'\0')
+        return result.hexdigest()
+
+    def _filename(self, key):
+        return os.path.join(self.path, key[:2], key[2:] + self.suffix)
+
+    def _load(self):
+        """Builds the index of entries, ordered from least to most recent."""
+        entries = []
+        if os.path.isdir(self.path):
+            for subdir in os.listdir(self.path):
+                dirname = os.path.join(self.path, subdir)
+                if len(subdir) != 2 or not os.path.isdir(dirname):
+                    continue
+                for filename in os.listdir(dirname):
+                    if filename.endswith(self.suffix):
+                        stat = os.stat(os.path.join(dirname, filename))
+                        key = subdir + filename[:-len(self.suffix)]
+                        entries.append((stat.st_mtime, key, stat.st_size))
+        entries.sort()
+        self._entries = OrderedDict(
+            (key, size) for (mtime, key, size) in entries)
+        self._size = sum(self._entries.itervalues())
+
+    def _remove(self, key):
+        self._size -= self._entries.pop(key)
+        try:
+            os.unlink(self._filename(key))
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def get(self, key):
+        """Returns the list of tokens stored under key, or None."""
+        if self._entries is None:
+            self._load()
+        if key in self._entries:
+            filename = self._filename(key)
+            try:
+                with open(filename, 'rb') as f:
+                    tokens = pickle.loads(zlib.decompress(f.read()))
+                os.utime(filename, None)
+            except (IOError, OSError, zlib.error, pickle.UnpicklingError, EOFError):
+                logging.warning('Discarding unreadable parse cache entry %s' % filename)
+                self._remove(key)
+            else:
+                self.hits += 1
+                self._entries[key] = self._entries.pop(key)
+                return [Token(*token) for token in tokens]
+        self.misses += 1
+        return None
+
+    def put(self, key, tokens):
+        """Stores the list of tokens under key, evicting old entries."""
+        if self._entries is None:
+            self._load()
+        if key in self._entries:
+            self._remove(key)
+        data = zlib.compress(pickle.dumps(
+            [tuple(token) for token in tokens], pickle.HIGHEST_PROTOCOL))
+        filename = self._filename(key)
+        try:
+            os.makedirs(os.path.dirname(filename))
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+        # Write to a temporary file and rename it so that a concurrent reader
+        # never sees a partially written entry
+        temp = '%s.%d' % (filename, os.getpid())
+        try:
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.rename(temp, filename)
+        except:
+            # Don't leave the temporary file behind (e.g. when the disk is
+            # full)
+            exc_info = sys.exc_info()
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+            raise exc_info[0], exc_info[1], exc_info[2]
+        self._entries[key] = len(data)
+        self._size += len(data)
+        while self._size > self.max_size and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def log_stats(self):
+        """Logs the number of hits and misses since the cache was created."""
+        logging.info('Parse cache: %d hits, %d misses (%d entries, %d bytes)' % (
+            self.hits, self.misses, len(self._entries or ()), self._size))
+
+
+# Declare the RuleStats namedtuple class (see ParserProfile)
+RuleStats = namedtuple('RuleStats', (
+    'rule',
+    'calls',
+    'time',
+    'backtracks',
+    'tokens',
+    ))
+
+
+class ParserProfile(object):
+    """Records statistics about the grammar rules of a parser.
+
+    When installed (with install(), or by using the profile as a context
+    manager) every _parse_X method of the parser instance (i.e. every rule of
+    its grammar) is wrapped to record the number of calls to the rule, the
+    time spent in the rule (including the rules it calls, but counted only
+    once for recursive calls), the number of times the parser backtracked
+    (called _restore_state) within the rule, and the number of tokens consumed
+    by successful calls. For example:
+
+        profile = ParserProfile(parser)
+        with profile:
+            parser.parse(tokens)
+        for stats in profile.report(sort='backtracks')[:10]:
+            print(stats)
+
+    Statistics accumulate across parses until reset() is called.
+    """
+
+    # Methods with the rule prefix which implement the parser rather than the
+    # grammar
+    exclude = frozenset((
+        '_parse_init',
+        '_parse_finish',
+        '_parse_script',
+        '_parse_tokens',
+    ))
+
+    def __init__(self, parser):
+        super(ParserProfile, self).__init__()
+        self.parser = parser
+        self._installed = []
+        self.reset()
+
+    def reset(self):
+        """Discards all statistics recorded so far."""
+        # Each entry of _stats is a list of [calls, time, backtracks, tokens,
+        # depth] where depth is the number of active calls to the rule
+        self._stats = {}
+        self._stack = []
+
+    def install(self):
+        """Wraps the grammar rules of the parser to record statistics."""
+        assert not self._installed
+        cls = self.parser.__class__
+        for name in dir(cls):
+            if name.startswith('_parse_') and name not in self.exclude:
+                method = getattr(self.parser, name)
+                if callable(method):
+                    setattr(self.parser, name, self._wrap_rule(name, method))
+                    self._installed.append(name)
+        self.parser._restore_state = self._wrap_restore(self.parser._restore_state)
+        self._installed.append('_restore_state')
+
+    def remove(self):
+        """Removes the wrappers installed by install()."""
+        for name in self._installed:
+            delattr(self.parser, name)
+        self._installed = []
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.remove()
+
+    def _wrap_rule(self, name, method):
+        parser = self.parser
+        stack = self._stack
+        all_stats = self._stats
+        def wrapper(*args, **kwargs):
+            try:
+                stats = all_stats[name]
+            except KeyError:
+                stats = all_stats[name] = [0, 0.0, 0, 0, 0]
+            stats[0] += 1
+            stats[4] += 1
+            stack.append(stats)
+            index = parser._index
+            start = default_timer()
+            try:
+                result = method(*args, **kwargs)
+                # Like time, tokens are only counted by the outermost call of
+                # a recursive rule
+                if stats[4] == 1:
+                    stats[3] += parser._index - index
+                return result
+            finally:
+                stack.pop()
+                stats[4] -= 1
+                if not stats[4]:
+                    stats[1] += default_timer() - start
+        wrapper.__name__ = str(name)
+        return wrapper
+
+    def _wrap_restore(self, method):
+        stack = self._stack
+        def wrapper():
+            if stack:
+                stack[-1][2] += 1
+            return method()
+        return wrapper
+
+    def report(self, sort='time', reverse=True):
+        """Returns a list of RuleStats for each rule that has been called.
+
+        The list is sorted by the RuleStats field named by sort (in descending
+        order unless reverse is False).
+        """
+        result = [
+            RuleStats(name, calls, time, backtracks, tokens)
+            for (name, (calls, time, backtracks, tokens, depth)) in self._stats.iteritems()
+        ]
+        result.sort(key=lambda stats: getattr(stats, sort), reverse=reverse)
+        return result
+
+
 class BaseParser(object):
     """Base class for parsers.
 
@@ -519,6 +985,15 @@ class BaseParser(object):
                 statements within a stored procedure definition are unaffected
                 by this option; this option determines how statement
                 terminators will be output. Defaults to semi-colon.
+    memoize     When True, the results of rules decorated with memoized() are
+                cached by position so that backtracking never re-parses a rule
+                at the same position. The memo_hits and memo_misses attributes
+                count cache lookups during the last parse. Defaults to False.
+    cache       If not None, a ParseCache in which parse() looks up the output
+                for its input (and stores it, on a miss). Note that the state
+                of script parsers (e.g. the produces and consumes lists) is not
+                updated when the output is found in the cache. Defaults to
+                None.
     terminator  If TERMINATOR is present in the reformat set, this defines the
                 string used to terminate statements within a compound SQL block
                 (e.g. the body of a stored procedure or function definition).
@@ -585,6 +1060,10 @@ class BaseParser(object):
         self.terminator = ';'
         self.namechars = sql92_namechars
         self.identchars = sql92_identchars
+        self.memoize = False
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.cache = None
 
     def parse(self, tokens):
         """Parses an arbitrary statement or script.
@@ -597,6 +1076,134 @@ class BaseParser(object):
         or as a datatype, or as part of the special register CURRENT DATE).
         """
         self._parse_init(tokens)
+        if self.cache is not None:
+            key = self.cache.key(
+                self.cache_options(),
+                ' '.join('%d:%d' % (token.type, len(token.source)) for token in tokens),
+                self._source)
+            output = self.cache.get(key)
+            if output is not None:
+                if isinstance(tokens, TokenBuffer):
+                    output = TokenBuffer.from_tokens(output)
+                self._output = output
+                return output
+        for statement in self._parse_script():
+            pass
+        self._parse_finish()
+        if self.cache is not None:
+            self.cache.put(key, self._output)
+        return self._output
+
+    def validate(self, tokens):
+        """Checks that a statement or script can be parsed.
+
+        This method performs the same parse as parse() without building the
+        reformatted output: no spacing, comments, indentation or alignment
+        tokens are generated, the output of each statement is discarded once
+        it has been parsed, and the finalization stages are skipped entirely.
+        If the tokens cannot be parsed, ParseError is raised as for parse().
+        Otherwise, the number of statements parsed is returned.
+        """
+        self._parse_init(tokens)
+        self._validating = True
+        try:
+            count = 0
+            for statement in self._parse_script():
+                del self._output[:-1]
+                self._output_low = sys.maxint
+                count += 1
+        finally:
+            self._validating = False
+        return count
+
+    def cache_options(self):
+        """Returns a string describing the dialect and options of the parser.
+
+        The result forms part of the key of the parser's output in a
+        ParseCache. Descendents which add options affecting the output must
+        extend it. The version of dbsuite is included so that output formatted
+        by an earlier release is never served from the cache after an upgrade.
+        """
+        cls = self.__class__
+        return repr((
+            __version__,
+            '%s.%s' % (cls.__module__, cls.__name__),
+            sorted(self.reformat),
+            self.indent,
+            self.line_split,
+            self.statement,
+            self.terminator,
+            self.namechars,
+            self.identchars,
+        ))
+
+    def parse_iter(self, tokens):
+        """Parses a script, yielding reformatted tokens as it progresses.
+
+        This method is equivalent to parse() except that it returns a
+        generator. The reformatted tokens of each statement are yielded as
+        soon as the statement has been parsed, rather than once the whole
+        script has been parsed (hence an error in a later statement will only
+        be raised after the tokens of prior statements have been yielded).
+        """
+        self._parse_init(tokens)
+        return self._finish(self._parse_tokens(), compact=False)
+
+    def parse_batch(self, tokens):
+        """Parses a batch of consecutive statements from a larger script.
+
+        This method permits a script to be parsed in several pieces (e.g. by a
+        pool of processes) after splitting it between statements with the
+        tokenizer's split() method. It returns a tuple of (leading, output,
+        ended) where output is the list of parsed tokens, finalized as far as
+        possible without the rest of the script, and leading is a list of the
+        comments (and, if whitespace isn't reformatted, whitespace) preceding
+        the first statement of the batch which parse() would have output after
+        the prior statement, if the prior batch ended with a statement (as
+        indicated by ended). Pass the results of all batches, in order, to
+        finish_batches() to obtain the same output as parse() would produce
+        for the entire script.
+        """
+        self._parse_init(tokens)
+        leading = []
+        for token in tokens:
+            if token.type not in (TT.COMMENT, TT.WHITESPACE):
+                break
+            if token.type == TT.COMMENT or TT.WHITESPACE not in self.reformat:
+                leading.append(token)
+        index = None
+        for index in self._parse_script():
+            pass
+        return (
+            list(self._finish_tokens(leading)),
+            list(self._finish_tokens(self._output)),
+            index is not None and self._token(index).type == TT.EOF,
+        )
+
+    def finish_batches(self, batches):
+        """Combines the results of parse_batch() into the final output.
+
+        The batches parameter is an iterable of the tuples returned by
+        parse_batch(), in the same order as the statements of the script. The
+        finalized output is returned as a list of tokens.
+        """
+        # Comments following a statement's terminator belong before the blank
+        # line that _parse_script() leaves after it (which is only present
+        # when reformatting whitespace). Comments following an empty statement
+        # are discarded, as are those at the start of the script
+        trailer = 2 if TT.WHITESPACE in self.reformat else 0
+        output = []
+        prior_ended = False
+        for (leading, tokens, ended) in batches:
+            if prior_ended:
+                i = len(output) - trailer
+                output[i:i] = leading
+            output.extend(tokens)
+            prior_ended = ended
+        return list(self._finish_stream(output, compact=False))
+
+    def _parse_script(self):
+        """Parses all statements in the input, yielding after each one."""
         while True:
             # Ignore leading whitespace and empty statements
             while self._token().type in (TT.COMMENT, TT.WHITESPACE, TT.TERMINATOR):
@@ -611,10 +1218,25 @@ class BaseParser(object):
                 self._level = 0
                 self._newline()
                 self._newline(allowempty=True)
+                yield self._index
             else:
                 break
-        self._parse_finish()
-        return self._output
+
+    def _parse_tokens(self):
+        """Parses all statements in the input, yielding the output tokens.
+
+        The output of each statement is removed from the output list as it is
+        yielded, with the exception of the final token which the parsing of the
+        next statement may examine (see _match() and _insert_output()).
+        """
+        for statement in self._parse_script():
+            output = self._output
+            for token in output[:-1]:
+                yield token
+            del output[:-1]
+            self._output_low = sys.maxint
+        for token in self._output:
+            yield token
 
     def _parse_init(self, tokens):
         """Sets up the parser with the specified tokens as input."""
@@ -623,26 +1245,178 @@ class BaseParser(object):
         self._output = []
         self._level = 0
         self._tokens = tokens
+        self._validating = False
+        # Packrat memo (see memoized()) and the lowest output position altered
+        # by _insert_output or _update_output
+        self._memo = {}
+        self._output_low = sys.maxint
+        self.memo_hits = 0
+        self.memo_misses = 0
         # Reconstruct a copy of the source; this is only used for exceptions
         # which use the original source string for context reporting
-        self._source = ''.join(token.source for token in tokens)
+        if isinstance(tokens, TokenBuffer):
+            self._source = tokens.source
+        else:
+            self._source = ''.join(token.source for token in tokens)
 
     def _parse_finish(self):
-        """Cleans up and finalizes tokens in the output."""
-        output = self._output
-        output = format_tokens(output, reformat=self.reformat,
+        """Cleans up and finalizes tokens in the output.
+
+        If the input tokens were provided as a TokenBuffer, the output is
+        returned as a TokenBuffer too. In this case positions are derived from
+        the final source by the buffer, so they aren't recalculated here.
+        """
+        compact = isinstance(self._tokens, TokenBuffer)
+        output = self._finish(self._output, compact)
+        if compact:
+            self._output = TokenBuffer.from_tokens(output)
+        else:
+            self._output = list(output)
+
+    def _finish(self, tokens, compact):
+        """Returns a generator which finalizes the specified output tokens.
+
+        The stages of the pipeline are chained generators, none of which looks
+        further ahead than the end of the current line (or the end of a block
+        of vertically aligned lines in the case of convert_valign), so the
+        finalized tokens are produced as the output tokens are consumed. If
+        compact is True, positions are not recalculated.
+        """
+        return self._finish_stream(self._finish_tokens(tokens), compact)
+
+    def _finish_tokens(self, tokens):
+        """Returns a generator of the statement-local finalization stages.
+
+        These stages (reformatting tokens, and converting indentation and
+        alignment into whitespace) are unaffected by any statement but the
+        one a token belongs to. See parse_batch().
+        """
+        output = format_tokens(tokens, reformat=self.reformat,
             terminator=self.terminator, statement=self.statement,
             namechars=set(self.namechars))
         if TT.WHITESPACE in self.reformat:
-            output = recalc_positions(convert_valign(convert_indent(output, indent=self.indent)))
+            output = convert_valign(convert_indent(output, indent=self.indent))
         else:
-            output = recalc_positions(token for token in output if token.type not in (TT.INDENT, TT.VALIGN, TT.VAPPLY))
+            output = (token for token in output if token.type not in (TT.INDENT, TT.VALIGN, TT.VAPPLY))
+        return output
+
+    def _finish_stream(self, output, compact):
+        """Returns a generator of the remaining finalization stages.
+
+        These stages (recalculating positions, merging and stripping
+        whitespace, and splitting lines) depend on the output as a whole.
+        """
+        if not compact:
+            output = recalc_positions(output)
         output = merge_whitespace(output)
         if TT.WHITESPACE in self.reformat:
             output = strip_whitespace(output)
         if self.line_split:
             output = split_lines(output)
-        self._output = list(output)
+        return output
+
+    def _run_iterative(self, generator):
+        """Runs the generator of an iterative rule (see iterative()).
+
+        The generators of nested iterative rules are kept on an explicit stack
+        so that the depth of the Python stack remains constant however deeply
+        the rules nest.
+        """
+        stack = []
+        memo = None
+        value = error = None
+        while True:
+            try:
+                if error is None:
+                    request = generator.send(value)
+                else:
+                    request = generator.throw(error)
+            except StopIteration:
+                if memo:
+                    self._memo_finish(memo, None, None)
+                if not stack:
+                    return None
+                (generator, memo) = stack.pop()
+                value = error = None
+                continue
+            except ParseError, e:
+                if memo:
+                    self._memo_finish(memo, None, e)
+                if not stack:
+                    raise
+                (generator, memo) = stack.pop()
+                value = None
+                error = e
+                continue
+            value = error = None
+            (method, args) = request
+            rule = getattr(method, 'generator', None)
+            if rule is None:
+                try:
+                    value = method(*args)
+                except ParseError, e:
+                    error = e
+                continue
+            nested = None
+            if self.memoize and getattr(method, 'memoized', False):
+                key = self._memo_key(method.__name__, args, {})
+                try:
+                    entry = self._memo[key]
+                except KeyError:
+                    self.memo_misses += 1
+                else:
+                    self.memo_hits += 1
+                    try:
+                        value = self._memo_replay(entry)
+                    except ParseError, e:
+                        error = e
+                    continue
+                nested = self._memo_start(key)
+            stack.append((generator, memo))
+            generator = rule(self, *args)
+            memo = nested
+
+    def _memo_key(self, name, args, kwargs):
+        """Returns the key of a call to a memoized rule (see memoized())."""
+        output = self._output
+        return (
+            name,
+            self._index,
+            self._level,
+            bool(output) and output[-1].type not in (TT.INDENT, TT.WHITESPACE),
+            args,
+            tuple(sorted(kwargs.iteritems())),
+        )
+
+    def _memo_replay(self, entry):
+        """Replays the outcome of a memoized call, returning its result."""
+        (index, level, tokens, result, error) = entry
+        if error:
+            raise error
+        self._output.extend(tokens)
+        self._index = index
+        self._level = level
+        return result
+
+    def _memo_start(self, key):
+        """Prepares to memoize a call, returning state for _memo_finish()."""
+        memo = (key, len(self._output), self._output_low)
+        self._output_low = sys.maxint
+        return memo
+
+    def _memo_finish(self, memo, result, error):
+        """Stores the outcome of a memoized call in the memo.
+
+        The outcome isn't stored if the call altered output prior to its
+        starting position.
+        """
+        (key, start, low) = memo
+        if self._output_low >= start:
+            if error:
+                self._memo[key] = (None, None, None, None, error)
+            else:
+                self._memo[key] = (self._index, self._level, self._output[start:], result, None)
+        self._output_low = min(low, self._output_low)
 
     def _parse_top(self):
         """Top level of the parser.
@@ -687,6 +1461,33 @@ class BaseParser(object):
         token = Token(TT.VAPPLY, None, '', 0, 0)
         self._insert_output(token, index, True)
 
+    def _output_index(self, index):
+        """Returns the output position referred to by a negative index.
+
+        Used by _insert_output() and _update_output() to find their target by
+        walking back from the end of the output over junk (COMMENT and
+        WHITESPACE) tokens. Note that the walk only ever covers the last few
+        tokens of the output, hence the cost of these methods (including the
+        list insertion, which only moves the tokens after the position) does
+        not depend on the length of the output. Even statements with many
+        thousands of VALUES rows or IN-list entries are formatted in linear
+        time.
+        """
+        output = self._output
+        if index == 0:
+            i = len(output)
+        elif index < 0:
+            i = len(output) - 1
+            while index < 0:
+                while output[i].type in (TT.COMMENT, TT.WHITESPACE):
+                    i -= 1
+                index += 1
+        else:
+            assert False
+        # Check that the statestack invariant (see _save_state()) is preserved
+        assert (len(self._states) == 0) or (i >= self._states[-1][2])
+        return i
+
     def _insert_output(self, token, index, allowempty):
         """Inserts the specified token into the output.
 
@@ -705,24 +1506,19 @@ class BaseParser(object):
         found, it will be replaced by the new token. Otherwise, (if allowempty
         is True) the new token will be inserted unconditionally. In other
         words, this parameter allows or disallows the insertion of empty lines.
+
+        When validating (see validate()) the method does nothing.
         """
-        if index == 0:
-            i = len(self._output)
-        elif index < 0:
-            i = len(self._output) - 1
-            while index < 0:
-                while self._output[i].type in (TT.COMMENT, TT.WHITESPACE):
-                    i -= 1
-                index += 1
-        else:
-            assert False
-        # Check that the statestack invariant (see _save_state()) is preserved
-        assert (len(self._states) == 0) or (i >= self._states[-1][2])
+        if self._validating:
+            return
+        i = self._output_index(index)
         # Check for duplicates - replace if we're about to duplicate the token
         if not allowempty and self._output[i - 1].type == token.type and token.type == TT.INDENT:
             self._output[i - 1] = token
+            self._output_low = min(self._output_low, i - 1)
         else:
             self._output.insert(i, token)
+            self._output_low = min(self._output_low, i)
 
     def _update_output(self, token, index):
         """Changes the specified token in the output.
@@ -735,20 +1531,10 @@ class BaseParser(object):
         Note that the method takes care to preserve the invariants that the
         state save/restore methods rely upon.
         """
-        if index == 0:
-            i = len(self._output)
-        elif index < 0:
-            i = len(self._output) - 1
-            while index < 0:
-                while self._output[i].type in (TT.COMMENT, TT.WHITESPACE):
-                    i -= 1
-                index += 1
-        else:
-            assert False
-        # Check that the statestack invariant (see _save_state()) is preserved
-        assert (len(self._states) == 0) or (i >= self._states[-1][2])
+        i = self._output_index(index)
         # Check for duplicates - replace if we're about to duplicate the token
         self._output[i - 1] = token
+        self._output_low = min(self._output_low, i - 1)
 
     def _save_state(self):
         """Saves the current state of the parser on a stack for later retrieval."""
@@ -821,18 +1607,7 @@ class BaseParser(object):
         transformations were necessary to make the match, e.g. KEYWORD to
         IDENTIFIER).
         """
-        # List of token type transformations that are permitted to occur in
-        # order to obtain a successful match (e.g. if we're expecting a
-        # DATATYPE but find an IDENTIFIER, the comparison method may mutate the
-        # IDENTIFIER token into a DATATYPE token and return it, indicating a
-        # successful match)
-        transforms = {
-            TT.KEYWORD:     (TT.IDENTIFIER, TT.DATATYPE, TT.REGISTER, TT.SCHEMA, TT.RELATION, TT.ROUTINE),
-            TT.IDENTIFIER:  (TT.DATATYPE, TT.REGISTER, TT.SCHEMA, TT.RELATION, TT.ROUTINE),
-            TT.STRING:      (TT.PASSWORD,),
-            TT.TERMINATOR:  (TT.STATEMENT,),
-            TT.EOF:         (TT.STATEMENT,),
-        }
+        transforms = token_transforms
         if isinstance(template, basestring):
             if token.type in (TT.KEYWORD, TT.OPERATOR) and token.value == template:
                 return token
@@ -878,12 +1653,80 @@ class BaseParser(object):
         returned. The current position, and the output list are never altered
         by this method.
         """
-        for template in templates:
-            t = self._cmp_tokens(self._token(), template)
+        token = self._token()
+        for template in self._candidates(templates, token, sys._getframe(1)):
+            t = self._cmp_tokens(token, template)
             if t:
                 return t
         return None
 
+    def _candidates(self, templates, token, site):
+        """Returns the templates in a list which could match the given token.
+
+        Rather than comparing a token against every template in a list, the
+        _match_one_of() and _peek_one_of() methods use this method to look up
+        the (usually one or zero) templates which could possibly match it. The
+        templates are compiled into a lookup table keyed by token type and
+        value the first time a list is seen. The table is shared by all parser
+        instances and relies on the matching rules of _cmp_tokens(). The
+        candidates are returned in the order they appear in the list.
+
+        The site parameter is the frame of the grammar rule which provided the
+        templates. Most lists are literals (the contents of which are the same
+        every time the rule reaches that call), so the table last used at the
+        call's code and instruction offset is tried first; as the list and the
+        table usually share the same template objects, comparing them is much
+        cheaper than hashing the templates. Anything else (a set, a tuple, or a list
+        which a rule has modified since the last call) is looked up by
+        content.
+        """
+        entry = None
+        if isinstance(templates, list):
+            # Code objects are slow to hash, hence sites are keyed by the id()
+            # of the code (which the entry keeps alive) and then by offset
+            code = site.f_code
+            try:
+                sites = _candidate_sites[id(code)][1]
+            except KeyError:
+                sites = {}
+                _candidate_sites[id(code)] = (code, sites)
+            entry = sites.get(site.f_lasti)
+            if entry is not None and entry[0] != templates:
+                entry = None
+        if entry is None:
+            key = tuple(templates)
+            try:
+                entry = _candidate_tables[key]
+            except KeyError:
+                (by_value, by_type, always) = index_templates(key)
+                strings = all(isinstance(value, basestring) for value in by_value)
+                entry = _candidate_tables[key] = (list(key), by_value, by_type, always, strings, {})
+            if isinstance(templates, list):
+                sites[site.f_lasti] = entry
+        (templates, by_value, by_type, always, strings, table) = entry
+        value = token.value
+        if strings and not isinstance(value, basestring):
+            # Don't bother hashing other values (which is slow for Decimal
+            # NUMBER values) when only strings can match
+            value = None
+        else:
+            try:
+                if value not in by_value:
+                    value = None
+            except TypeError:
+                # Decimal NaN values are unhashable
+                value = None
+        try:
+            return table[(token.type, value)]
+        except KeyError:
+            positions = sorted(
+                by_value.get(value, []) +
+                by_type.get(token.type, []) +
+                always
+            )
+            result = table[(token.type, value)] = [templates[i] for i in positions]
+            return result
+
     def _prespace_default(self, template):
         """Determines the default prespace setting for a _match() template."""
         return template not in (
@@ -942,6 +1785,14 @@ class BaseParser(object):
         token = self._cmp_tokens(self._token(), template)
         if not token:
             return None
+        if self._validating:
+            # Only the matched token is required when validating (the
+            # grammar may still examine or update it)
+            self._output.append(token)
+            self._index += 1
+            while self._token().type in (TT.COMMENT, TT.WHITESPACE):
+                self._index += 1
+            return token
         # If a match was found, add a leading space (if WHITESPACE is being
         # reformatted, and prespace permits it)
         if TT.WHITESPACE in self.reformat:
@@ -1012,7 +1863,18 @@ class BaseParser(object):
 
         See _match() for a description of prespace and postspace.
         """
-        for template in templates:
+        return self._match_candidates(
+            self._candidates(templates, self._token(), sys._getframe(1)),
+            prespace, postspace)
+
+    def _match_candidates(self, candidates, prespace, postspace):
+        """Matches the current token against the first matching candidate.
+
+        Used by _match_one_of() and _expect_one_of() (which each look up their
+        candidates directly, so that the call site passed to _candidates() is
+        that of the grammar rule).
+        """
+        for template in candidates:
             token = self._match(template, prespace, postspace)
             if token:
                 return token
@@ -1059,7 +1921,9 @@ class BaseParser(object):
 
         See _match() for a description of prespace and postspace.
         """
-        result = self._match_one_of(templates, prespace, postspace)
+        result = self._match_candidates(
+            self._candidates(templates, self._token(), sys._getframe(1)),
+            prespace, postspace)
         if not result:
             self._expected_one_of(templates)
         return result
@@ -35,15 +35,23 @@ from __future__ import (
 
 import os
 import sys
+import zlib
+import errno
+import hashlib
 import logging
 import datetime
 import imp
 import re
 import fnmatch
+import threading
+import cPickle as pickle
 from operator import attrgetter
-from itertools import chain, groupby, ifilter
+from collections import defaultdict
+from itertools import chain, ifilter
 
 import dbsuite.db
+from dbsuite import __version__
+from dbsuite.parser import quote_str
 from dbsuite.tuples import (
     ConstraintRef, IndexRef, RelationDep, RelationRef, RoutineRef, TableRef,
     TablespaceRef, TriggerDep, TriggerRef
@@ -57,23 +65,42 @@ __all__ = [
     'Plugin',
     'InputPlugin',
     'OutputPlugin',
+    'CatalogSnapshot',
     'get_plugins',
     'load_plugin',
 ]
 
 
+# The DB-API drivers whose fetchmany() implementation is known to be safe and
+# reasonably quick; for anything else fetch_some() falls back to fetchall()
+fetchmany_drivers = frozenset([
+    'ibm_db_dbi',
+    'pyodbc',
+    'psycopg2',
+    'sqlite3',
+])
+
+
 class cachedproperty(property):
     """Convert a method into a cached property"""
 
     def __init__(self, method):
         private = '_' + method.__name__
+        # The lock ensures that when the value is being calculated in one
+        # thread (see InputPlugin.prefetch), other threads wait for it instead
+        # of calculating it again
+        lock = threading.RLock()
         def fget(s):
             try:
                 return getattr(s, private)
             except AttributeError:
-                value = method(s)
-                setattr(s, private, value)
-                return value
+                with lock:
+                    try:
+                        return getattr(s, private)
+                    except AttributeError:
+                        value = method(s)
+                        setattr(s, private, value)
+                        return value
         super(cachedproperty, self).__init__(fget)
 
 
@@ -441,9 +468,81 @@ class InputPlugin(Plugin):
     --help-plugins switches).
     """
 
+    # The cached properties which are calculated directly from one of the
+    # get_*() methods below, in roughly descending order of the time they
+    # usually take to retrieve. These are the properties that prefetch()
+    # shares out between connections
+    prefetch_properties = (
+        'relation_cols',
+        'routine_params',
+        'index_cols',
+        'functions',
+        'procedures',
+        'tables',
+        'views',
+        'indexes',
+        'relation_dependencies',
+        'unique_key_cols',
+        'foreign_key_cols',
+        'check_cols',
+        'unique_keys',
+        'foreign_keys',
+        'checks',
+        'triggers',
+        'trigger_dependencies',
+        'aliases',
+        'datatypes',
+        'schemas',
+        'tablespaces',
+    )
+
+    # The cached properties which are derived from those above without
+    # querying the database
+    derived_properties = (
+        'relations',
+        'relation_dependents',
+        'table_indexes',
+        'parent_keys',
+        'trigger_dependents',
+        'relation_triggers',
+        'tablespace_tables',
+        'tablespace_indexes',
+    )
+
+    # Maps the get_*() methods below to the field of their rows which holds
+    # the schema of the object each row describes. When refreshing a snapshot
+    # (see refresh()), rows are retrieved only for schemas that have changed,
+    # except for the methods mapped to None which are always retrieved in full
+    snapshot_fields = {
+        'get_schemas':               None,
+        'get_datatypes':             'schema',
+        'get_tables':                'schema',
+        'get_views':                 'schema',
+        'get_aliases':               'schema',
+        'get_view_dependencies':     'schema',
+        'get_indexes':               'schema',
+        'get_index_cols':            'index_schema',
+        'get_relation_cols':         'relation_schema',
+        'get_unique_keys':           'table_schema',
+        'get_unique_key_cols':       'const_schema',
+        'get_foreign_keys':          'table_schema',
+        'get_foreign_key_cols':      'const_schema',
+        'get_checks':                'table_schema',
+        'get_check_cols':            'const_schema',
+        'get_functions':             'schema',
+        'get_procedures':            'schema',
+        'get_routine_params':        'routine_schema',
+        'get_triggers':              'schema',
+        'get_trigger_dependencies':  'trig_schema',
+        'get_tablespaces':           None,
+    }
+
     def __init__(self):
         """Initializes an instance of the class."""
         super(InputPlugin, self).__init__()
+        self._local = threading.local()
+        self._snapshot = None
+        self._names = {}
         self.add_option('exclude', default=None, convert=self.convert_list,
             doc="""A comma-separated list of schema name patterns to exclude
             from the documentation. If ommitted, no objects are excluded. See
@@ -457,6 +556,20 @@ class InputPlugin(Plugin):
             themselves, just to objects within schemas excluding datatypes.
             This ensures that, if system schemas are excluded, all objects with
             built-in datatypes do not also disappear""")
+        self.add_option('arraysize', default='1000',
+            convert=lambda value: self.convert_int(value, minvalue=0),
+            doc="""The number of rows to retrieve from the database at a time.
+            Smaller values use less memory for large catalogs at the expense
+            of more round trips to the database. Only used with drivers known
+            to implement fetchmany() correctly (ibm_db_dbi, pyodbc, psycopg2
+            and sqlite3); with other drivers, or if this is 0, all rows of
+            each query are retrieved at once""")
+        self.add_option('parallel', default='1',
+            convert=lambda value: self.convert_int(value, minvalue=1),
+            doc="""The number of connections with which to retrieve information
+            from the database concurrently. Values greater than 1 can
+            considerably reduce the time taken to query a remote database, at
+            the cost of opening extra connections to it""")
 
     def tokenizer(self):
         """Returns a new instance of an SQL tokenizer class.
@@ -493,6 +606,38 @@ class InputPlugin(Plugin):
         super(InputPlugin, self).configure(config)
         self.include = self.options['include'] or []
         self.exclude = self.options['exclude'] or []
+        self.arraysize = self.options['arraysize']
+        self.parallel = self.options['parallel']
+
+    def _get_connection(self):
+        try:
+            return self._local.connection
+        except AttributeError:
+            return self._connection
+
+    def _set_connection(self, value):
+        self._connection = value
+
+    def _del_connection(self):
+        del self._connection
+
+    connection = property(_get_connection, _set_connection, _del_connection,
+        doc="""The connection which get_*() methods should query.
+
+        This is usually the connection opened by the open() method, but within
+        the threads started by prefetch() it is the thread's own connection.
+        """)
+
+    def connect(self):
+        """Opens and returns a new connection to the database.
+
+        Derived classes which query a database through a DB-API connection
+        should override this method to open a connection using the
+        configuration in self.options. The open() method should use it to
+        open the main connection, and prefetch() uses it to open a connection
+        for each of its threads.
+        """
+        raise NotImplementedError
 
     def open(self):
         """Opens the database connection for data retrieval.
@@ -522,6 +667,138 @@ class InputPlugin(Plugin):
         """
         pass
 
+    def prefetch(self):
+        """Retrieves all information from the database over several connections.
+
+        This method is called by the main application after open(). If the
+        "parallel" option is greater than 1, that many threads are started,
+        each with its own connection (see connect()), and the properties in
+        prefetch_properties are calculated between them. Otherwise, or if the
+        plugin does not implement connect(), it does nothing and information
+        is retrieved over the main connection as it is required.
+        """
+        if self.parallel < 2:
+            return
+        logging.info('Retrieving data with %d connections' % self.parallel)
+        self._prefetch_names = list(self.prefetch_properties)
+        self._prefetch_errors = []
+        threads = [
+            threading.Thread(target=self._prefetch_thread)
+            for i in range(min(self.parallel, len(self._prefetch_names)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        errors = self._prefetch_errors
+        del self._prefetch_names
+        del self._prefetch_errors
+        if errors:
+            (exc_type, exc_value, exc_tb) = errors[0]
+            if exc_type is NotImplementedError:
+                logging.warning('Plugin cannot open extra connections; retrieving data serially')
+            else:
+                raise exc_type, exc_value, exc_tb
+
+    def _snapshot_options(self):
+        # A digest of the options which affect the content of a snapshot (a
+        # digest, rather than the options themselves, as they may include a
+        # password), along with the version of dbsuite and the plugin class
+        # so that an upgrade (which may correct the queries or the layout of
+        # their rows) forces a full retrieval
+        cls = self.__class__
+        return hashlib.sha1(repr((
+            __version__,
+            '%s.%s' % (cls.__module__, cls.__name__),
+            sorted(
+                (name, value)
+                for (name, value) in self.options.iteritems()
+                if name not in ('arraysize', 'parallel')
+            ),
+        )).encode('utf-8')).hexdigest()
+
+    def refresh(self, snapshot):
+        """Prepares to retrieve information incrementally from a snapshot.
+
+        This method is called by the main application after open() when it
+        maintains a snapshot of the information retrieved (see
+        CatalogSnapshot). The snapshot parameter is the result of
+        take_snapshot() from a previous run, or None if there is none.
+
+        The signatures of all schemas are retrieved (see get_signatures()) and
+        compared with those stored in the snapshot. Thereafter, each get_*()
+        method listed in snapshot_fields is only asked for the rows of the
+        schemas whose signatures differ, and the rows of all other schemas are
+        taken from the snapshot. If the snapshot was taken with different
+        options, or by a different version of dbsuite or the plugin, or the
+        plugin does not implement get_signatures(), all information is
+        retrieved in full.
+        """
+        signatures = self.get_signatures()
+        previous = {}
+        changed = None
+        if snapshot is None:
+            logging.info('No snapshot found; retrieving all data')
+        elif snapshot['options'] != self._snapshot_options():
+            logging.info('Options or versions have changed since the snapshot was taken; retrieving all data')
+        elif signatures is None or snapshot['signatures'] is None:
+            logging.info('Plugin does not support incremental retrieval; retrieving all data')
+        else:
+            previous = snapshot['rows']
+            changed = set(
+                schema
+                for schema in set(signatures) | set(snapshot['signatures'])
+                if signatures.get(schema) != snapshot['signatures'].get(schema)
+            )
+            logging.info('%d schemas have changed since the snapshot was taken' % len(changed))
+        self._snapshot = {
+            'options': self._snapshot_options(),
+            'signatures': signatures,
+            'previous': previous,
+            'changed': changed,
+            'rows': {},
+        }
+
+    def take_snapshot(self):
+        """Returns a snapshot of the information retrieved since refresh().
+
+        The result is a picklable dictionary which can be passed to refresh()
+        on a later run. Only the rows of get_*() methods that have actually
+        been called are included; others will be retrieved in full by the
+        next refresh.
+        """
+        return {
+            'options': self._snapshot['options'],
+            'signatures': self._snapshot['signatures'],
+            'rows': dict(self._snapshot['rows']),
+        }
+
+    def _prefetch_thread(self):
+        """Sub-routine for retrieving information.
+
+        This method runs in a separate thread started by prefetch(). It opens
+        a connection for the thread, then repeatedly pops the name of a
+        property from the list of those remaining and calculates it. The thread
+        terminates when no more properties remain, or when any thread fails
+        (after recording the exception).
+        """
+        names = self._prefetch_names
+        try:
+            self._local.connection = self.connect()
+            try:
+                while names:
+                    try:
+                        name = names.pop(0)
+                    except IndexError:
+                        break
+                    getattr(self, name)
+            finally:
+                self._local.connection.close()
+                del self._local.connection
+        except Exception:
+            self._prefetch_errors.append(sys.exc_info())
+            del names[:]
+
     def get_schemas(self):
         """Retrieves the details of schemas stored in the database.
 
@@ -540,6 +817,22 @@ class InputPlugin(Plugin):
         logging.debug('Retrieving schemas')
         return []
 
+    def get_signatures(self):
+        """Retrieves a signature of the objects in each schema.
+
+        Override this function to return a dictionary mapping the name of
+        each schema to a signature of the objects within it (a picklable value
+        of any type that can be compared for equality). The signature must
+        change whenever an object in the schema is created, altered, dropped,
+        or has its statistics updated; typically it is derived from counts and
+        timestamps in the system catalog. Signatures are used by refresh() to
+        determine which schemas must be retrieved again.
+
+        If the method returns None (the default), incremental retrieval is not
+        supported and snapshots are always refreshed in full.
+        """
+        return None
+
     def get_datatypes(self):
         """Retrieves the details of datatypes stored in the database.
 
@@ -1057,56 +1350,174 @@ class InputPlugin(Plugin):
             result = ifilter(exclude_predicate, result)
         return result
 
-    def fetch_some(self, cursor, count=10):
+    def schema_filter(self, column, filtered=True):
+        """Returns an SQL predicate restricting column to the schemas required.
+
+        Derived classes should include the result in the WHERE clause of the
+        queries in their get_*() methods, where column is the column which
+        holds the schema of each row (the field listed in snapshot_fields).
+
+        Unless filtered is False, the predicate applies the "include" and
+        "exclude" patterns (see filter()) so that rows of schemas which are
+        not documented aren't retrieved at all. Patterns are translated to LIKE
+        predicates (or IN predicates for patterns without wildcards); patterns
+        which cannot be translated (those with [seq] wildcards) are left to
+        filter(), which is still applied to the result. When refreshing a
+        snapshot the predicate also limits the query to the schemas which have
+        changed (see refresh()).
+        """
+        predicates = []
+        schemas = getattr(self._local, 'schemas', None)
+        if schemas is not None:
+            predicates.append(self._in_predicate(column, sorted(schemas)))
+        if filtered:
+            include = [_like_pattern(pattern) for pattern in self.include]
+            if include and None not in include:
+                predicates.append('(%s)' % ' OR '.join(
+                    self._like_predicates(column, include)))
+            exclude = [
+                pattern
+                for pattern in (_like_pattern(pattern) for pattern in self.exclude)
+                if pattern is not None
+            ]
+            predicates.extend(
+                'NOT %s' % predicate
+                for predicate in self._like_predicates(column, exclude))
+        return ' AND '.join(predicates) or '1 = 1'
+
+    def _in_predicate(self, column, values):
+        if len(values) == 1:
+            return '%s = %s' % (column, quote_str(values[0]))
+        else:
+            return '%s IN (%s)' % (column, ', '.join(quote_str(value) for value in values))
+
+    def _like_predicates(self, column, patterns):
+        # Yields one LIKE predicate per pattern with wildcards, and a single
+        # IN predicate for all the patterns without. Catalogs may pad schema
+        # names with blanks (e.g. to 8 characters in DB2); comparisons ignore
+        # the padding but LIKE doesn't, hence the column is trimmed for LIKE
+        values = []
+        for (pattern, wildcards) in patterns:
+            if wildcards:
+                yield "RTRIM(%s) LIKE %s ESCAPE '!'" % (column, quote_str(pattern))
+            else:
+                values.append(pattern)
+        if values:
+            yield self._in_predicate(column, values)
+
+    def retrieve(self, method):
+        """Returns the rows produced by the named get_*() method.
+
+        The cached properties below call this method instead of calling the
+        get_*() methods directly. Unless refresh() has been called, it simply
+        returns the result of calling the method. Otherwise, rows are merged
+        from the previous snapshot and from the method (which is asked only for
+        schemas that have changed, see schema_filter()), and recorded for
+        take_snapshot().
+        """
+        fetch = lambda: self.intern_rows(getattr(self, method)())
+        snapshot = self._snapshot
+        if snapshot is None:
+            return fetch()
+        field = self.snapshot_fields.get(method)
+        previous = snapshot['previous'].get(method)
+        changed = snapshot['changed']
+        if field is None or previous is None or changed is None:
+            rows = list(fetch())
+        else:
+            key = attrgetter(field)
+            rows = [row for row in previous if key(row) not in changed]
+            if changed:
+                # Rows of unchanged schemas are discarded even if the method
+                # returned them, in case it ignores schema_filter()
+                self._local.schemas = changed
+                try:
+                    rows.extend(
+                        row for row in fetch()
+                        if key(row) in changed)
+                finally:
+                    del self._local.schemas
+        snapshot['rows'][method] = rows
+        return rows
+
+    def intern_rows(self, rows):
+        """Replaces repeated identifiers in rows with a single copy.
+
+        Every string returned by a database driver is a separate object, so a
+        schema or type name is typically stored once for every column which
+        refers to it. This generator replaces the fields of each row listed in
+        identifier_fields with a single copy of each distinct value, shared by
+        all rows retrieved by the plugin.
+        """
+        names = self._names
+        intern = names.setdefault
+        cls = None
+        for row in rows:
+            if row.__class__ is not cls:
+                cls = row.__class__
+                fields = [
+                    index
+                    for (index, field) in enumerate(cls._fields)
+                    if field in identifier_fields
+                ]
+            values = list(row)
+            for index in fields:
+                value = values[index]
+                values[index] = intern(value, value)
+            yield tuple.__new__(cls, values)
+
+    def fetch_some(self, cursor, count=None):
         """Efficient and flexible retrieval from a database cursor.
 
         This generator method retrieves rows from the specified cursor in a
         flexible but efficient manner by utilizing the fetchmany() method where
         possible, or fetchall() otherwise. As a generator method, individual
         rows are yielded.
+
+        The optional count parameter specifies the number of rows to retrieve
+        with each call to fetchmany(), defaulting to the value of the
+        "arraysize" option. The fetchmany() method is only used for cursors
+        belonging to the drivers in fetchmany_drivers; older drivers either
+        crash (PyDB2) or fetch in unreasonable time when asked for rows a few
+        at a time, and in any case memory is cheaper than bandwidth.
         """
-        # XXX The following can be activated when a) PyDB2 supports fetchmany
-        # without crashing or b) ibm_db starts to fetch in a vaguely reasonable
-        # time
-        #
-        #if hasattr(cursor, 'fetchmany'):
-        #    while True:
-        #        rows = cursor.fetchmany(count)
-        #        if not rows:
-        #            break
-        #        for row in rows:
-        #            yield row
-        #else:
-        #    # Some interfaces don't implement fetchmany (although they should -
-        #    # it's not optional). In this case, favour speed of retrieval over
-        #    # memory usage (memory is cheap - bandwidth ain't)
-        for row in cursor.fetchall():
-            yield row
+        if count is None:
+            count = self.arraysize
+        if count and cursor.__class__.__module__.split('.')[0] in fetchmany_drivers:
+            while True:
+                rows = cursor.fetchmany(count)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        else:
+            for row in cursor.fetchall():
+                yield row
 
     @cachedproperty
     def schemas(self):
         # Note: schemas themselves are not filtered because datatypes are not
         # filtered (if a system schema got excluded, system datatypes would be
         # excluded and the object hierarchy would break horribly)
-        return sorted(self.get_schemas(), key=attrgetter('name'))
+        return sorted(self.retrieve('get_schemas'), key=attrgetter('name'))
 
     @cachedproperty
     def datatypes(self):
-        return sorted(self.get_datatypes(), key=attrgetter('schema', 'name'))
+        return sorted(self.retrieve('get_datatypes'), key=attrgetter('schema', 'name'))
 
     @cachedproperty
     def tables(self):
-        result = self.filter(self.get_tables(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_tables'), key=attrgetter('schema'))
         return sorted(result, key=attrgetter('schema', 'name'))
 
     @cachedproperty
     def views(self):
-        result = self.filter(self.get_views(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_views'), key=attrgetter('schema'))
         return sorted(result, key=attrgetter('schema', 'name'))
 
     @cachedproperty
     def aliases(self):
-        result = self.filter(self.get_aliases(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_aliases'), key=attrgetter('schema'))
         result = self.filter(result, key=attrgetter('base_schema'))
         return sorted(result, key=attrgetter('schema', 'name'))
 
@@ -1118,14 +1529,11 @@ class InputPlugin(Plugin):
 
     @cachedproperty
     def relation_dependencies(self):
-        result = self.filter(self.get_view_dependencies(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_view_dependencies'), key=attrgetter('schema'))
         result = self.filter(result, key=attrgetter('dep_schema'))
-        result = sorted(result, key=attrgetter('schema', 'name', 'dep_schema', 'dep_name'))
-        result = groupby(result, key=attrgetter('schema', 'name'))
-        return dict(
-            (RelationRef(*view), [RelationRef(d.dep_schema, d.dep_name) for d in deps])
-            for (view, deps) in result
-        )
+        return _group_rows(result, attrgetter('schema', 'name'), RelationRef,
+            order=attrgetter('dep_schema', 'dep_name'),
+            value=lambda d: RelationRef(d.dep_schema, d.dep_name))
 
     @cachedproperty
     def relation_dependents(self):
@@ -1140,120 +1548,107 @@ class InputPlugin(Plugin):
                 for a in self.aliases
             )
         )
-        result = sorted(result, key=attrgetter('dep_schema', 'dep_name', 'schema', 'name'))
-        result = groupby(result, key=attrgetter('dep_schema', 'dep_name'))
-        return dict(
-            (RelationRef(*relation), [RelationRef(d.schema, d.name) for d in deps])
-            for (relation, deps) in result
-        )
+        return _group_rows(result, attrgetter('dep_schema', 'dep_name'), RelationRef,
+            order=attrgetter('schema', 'name'),
+            value=lambda d: RelationRef(d.schema, d.name))
 
     @cachedproperty
     def indexes(self):
-        result = self.filter(self.get_indexes(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_indexes'), key=attrgetter('schema'))
         result = self.filter(result, key=attrgetter('table_schema'))
         return sorted(result, key=attrgetter('schema', 'name'))
 
     @cachedproperty
     def index_cols(self):
-        result = self.filter(self.get_index_cols(), key=attrgetter('index_schema'))
-        result = groupby(result, key=attrgetter('index_schema', 'index_name'))
-        return dict((IndexRef(*index), list(cols)) for (index, cols) in result)
+        result = self.filter(self.retrieve('get_index_cols'), key=attrgetter('index_schema'))
+        # Columns are kept in the order the plugin returned them (their
+        # position in the index)
+        return _group_rows(result, attrgetter('index_schema', 'index_name'), IndexRef)
 
     @cachedproperty
     def table_indexes(self):
-        result = sorted(self.indexes, key=attrgetter('table_schema', 'table_name', 'schema', 'name'))
-        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
-        return dict((TableRef(*table), list(indexes)) for (table, indexes) in result)
+        # indexes is already sorted by schema and name
+        return _group_rows(self.indexes, attrgetter('table_schema', 'table_name'), TableRef)
 
     @cachedproperty
     def relation_cols(self):
-        result = self.filter(self.get_relation_cols(), key=attrgetter('relation_schema'))
-        result = sorted(result, key=attrgetter('relation_schema', 'relation_name'))
-        result = groupby(result, key=attrgetter('relation_schema', 'relation_name'))
-        return dict((RelationRef(*relation), list(cols)) for (relation, cols) in result)
+        result = self.filter(self.retrieve('get_relation_cols'), key=attrgetter('relation_schema'))
+        # Columns are kept in the order the plugin returned them (their
+        # position in the relation)
+        return _group_rows(result, attrgetter('relation_schema', 'relation_name'), RelationRef)
 
     @cachedproperty
     def unique_keys(self):
-        result = self.filter(self.get_unique_keys(), key=attrgetter('table_schema'))
-        result = sorted(result, key=attrgetter('table_schema', 'table_name', 'name'))
-        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
-        return dict((TableRef(*table), list(keys)) for (table, keys) in result)
+        result = self.filter(self.retrieve('get_unique_keys'), key=attrgetter('table_schema'))
+        return _group_rows(result, attrgetter('table_schema', 'table_name'), TableRef,
+            order=attrgetter('name'))
 
     @cachedproperty
     def unique_key_cols(self):
-        result = self.filter(self.get_unique_key_cols(), key=attrgetter('const_schema'))
-        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        return dict((ConstraintRef(*key), list(cols)) for (key, cols) in result)
+        result = self.filter(self.retrieve('get_unique_key_cols'), key=attrgetter('const_schema'))
+        # Columns are kept in the order the plugin returned them
+        return _group_rows(result, attrgetter('const_schema', 'const_table', 'const_name'), ConstraintRef)
 
     @cachedproperty
     def foreign_keys(self):
-        result = self.filter(self.get_foreign_keys(), key=attrgetter('table_schema'))
+        result = self.filter(self.retrieve('get_foreign_keys'), key=attrgetter('table_schema'))
         result = self.filter(result, key=attrgetter('const_schema'))
-        result = sorted(result, key=attrgetter('table_schema', 'table_name', 'name'))
-        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
-        return dict((TableRef(*table), list(keys)) for (table, keys) in result)
+        return _group_rows(result, attrgetter('table_schema', 'table_name'), TableRef,
+            order=attrgetter('name'))
 
     @cachedproperty
     def foreign_key_cols(self):
-        result = self.filter(self.get_foreign_key_cols(), key=attrgetter('const_schema'))
-        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        return dict((ConstraintRef(*key), list(cols)) for (key, cols) in result)
+        result = self.filter(self.retrieve('get_foreign_key_cols'), key=attrgetter('const_schema'))
+        # Columns are kept in the order the plugin returned them
+        return _group_rows(result, attrgetter('const_schema', 'const_table', 'const_name'), ConstraintRef)
 
     @cachedproperty
     def parent_keys(self):
         result = (key for (table, keys) in self.foreign_keys.iteritems() for key in keys)
-        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        return dict((ConstraintRef(*ukey), list(fkeys)) for (ukey, fkeys) in result)
+        return _group_rows(result, attrgetter('const_schema', 'const_table', 'const_name'), ConstraintRef,
+            order=attrgetter('table_schema', 'table_name', 'name'))
 
     @cachedproperty
     def checks(self):
-        result = self.filter(self.get_checks(), key=attrgetter('table_schema'))
-        result = sorted(result, key=attrgetter('table_schema', 'table_name', 'name'))
-        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
-        return dict((TableRef(*table), list(checks)) for (table, checks) in result)
+        result = self.filter(self.retrieve('get_checks'), key=attrgetter('table_schema'))
+        return _group_rows(result, attrgetter('table_schema', 'table_name'), TableRef,
+            order=attrgetter('name'))
 
     @cachedproperty
     def check_cols(self):
-        result = self.filter(self.get_check_cols(), key=attrgetter('const_schema'))
-        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
-        return dict((ConstraintRef(*key), list(cols)) for (key, cols) in result)
+        result = self.filter(self.retrieve('get_check_cols'), key=attrgetter('const_schema'))
+        # Columns are kept in the order the plugin returned them
+        return _group_rows(result, attrgetter('const_schema', 'const_table', 'const_name'), ConstraintRef)
 
     @cachedproperty
     def functions(self):
-        result = self.filter(self.get_functions(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_functions'), key=attrgetter('schema'))
         return sorted(result, key=attrgetter('schema', 'specific'))
 
     @cachedproperty
     def procedures(self):
-        result = self.filter(self.get_procedures(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_procedures'), key=attrgetter('schema'))
         return sorted(result, key=attrgetter('schema', 'specific'))
 
     @cachedproperty
     def routine_params(self):
-        result = self.filter(self.get_routine_params(), key=attrgetter('routine_schema'))
-        result = sorted(result, key=attrgetter('routine_schema', 'routine_specific'))
-        result = groupby(result, key=attrgetter('routine_schema', 'routine_specific'))
-        return dict((RoutineRef(*routine), list(params)) for (routine, params) in result)
+        result = self.filter(self.retrieve('get_routine_params'), key=attrgetter('routine_schema'))
+        # Parameters are kept in the order the plugin returned them (their
+        # position in the routine's signature)
+        return _group_rows(result, attrgetter('routine_schema', 'routine_specific'), RoutineRef)
 
     @cachedproperty
     def triggers(self):
-        result = self.filter(self.get_triggers(), key=attrgetter('schema'))
+        result = self.filter(self.retrieve('get_triggers'), key=attrgetter('schema'))
         return sorted(result, key=attrgetter('schema', 'name'))
 
     @cachedproperty
     def trigger_dependencies(self):
-        result = self.filter(self.get_trigger_dependencies(), key=attrgetter('trig_schema'))
+        result = self.filter(self.retrieve('get_trigger_dependencies'), key=attrgetter('trig_schema'))
         result = self.filter(result, key=attrgetter('dep_schema'))
-        result = sorted(result, key=attrgetter('trig_schema', 'trig_name', 'dep_schema', 'dep_name'))
-        result = groupby(result, key=attrgetter('trig_schema', 'trig_name'))
-        return dict(
-            (TriggerRef(*trigger), [RelationRef(d.dep_schema, d.dep_name) for d in deps])
-            for (trigger, deps) in result
-        )
+        return _group_rows(result, attrgetter('trig_schema', 'trig_name'), TriggerRef,
+            order=attrgetter('dep_schema', 'dep_name'),
+            value=lambda d: RelationRef(d.dep_schema, d.dep_name))
 
     @cachedproperty
     def trigger_dependents(self):
@@ -1262,34 +1657,146 @@ class InputPlugin(Plugin):
             for (trigger, deps) in self.trigger_dependencies.iteritems()
             for dep in deps
         )
-        result = sorted(result, key=attrgetter('dep_schema', 'dep_name', 'trig_schema', 'trig_name'))
-        result = groupby(result, key=attrgetter('dep_schema', 'dep_name'))
-        return dict(
-            (RelationRef(*relation), [TriggerRef(d.trig_schema, d.trig_name) for d in deps])
-            for (relation, deps) in result
-        )
+        return _group_rows(result, attrgetter('dep_schema', 'dep_name'), RelationRef,
+            order=attrgetter('trig_schema', 'trig_name'),
+            value=lambda d: TriggerRef(d.trig_schema, d.trig_name))
 
     @cachedproperty
     def relation_triggers(self):
-        result = sorted(self.triggers, key=attrgetter('relation_schema', 'relation_name', 'schema', 'name'))
-        result = groupby(result, key=attrgetter('relation_schema', 'relation_name'))
-        return dict((RelationRef(*relation), list(triggers)) for (relation, triggers) in result)
+        # triggers is already sorted by schema and name
+        return _group_rows(self.triggers, attrgetter('relation_schema', 'relation_name'), RelationRef)
 
     @cachedproperty
     def tablespaces(self):
-        return sorted(self.get_tablespaces(), key=attrgetter('name'))
+        return sorted(self.retrieve('get_tablespaces'), key=attrgetter('name'))
 
     @cachedproperty
     def tablespace_tables(self):
-        result = sorted(self.tables, key=attrgetter('tbspace', 'schema', 'name'))
-        result = groupby(result, key=attrgetter('tbspace'))
-        return dict((TablespaceRef(tbspace), list(tables)) for (tbspace, tables) in result)
+        # tables is already sorted by schema and name
+        return _group_rows(self.tables, lambda t: (t.tbspace,), TablespaceRef)
 
     @cachedproperty
     def tablespace_indexes(self):
-        result = sorted(self.indexes, key=attrgetter('tbspace', 'schema', 'name'))
-        result = groupby(result, key=attrgetter('tbspace'))
-        return dict((TablespaceRef(tbspace), list(indexes)) for (tbspace, indexes) in result)
+        # indexes is already sorted by schema and name
+        return _group_rows(self.indexes, lambda i: (i.tbspace,), TablespaceRef)
+
+
+class CatalogSnapshot(object):
+    """Persistent store of the information retrieved by input plugins.
+
+    Snapshots are stored in the directory specified by the path parameter
+    (which is created if it doesn't exist), each in a file named after the
+    SHA-1 digest of its key, containing a compressed pickle of the result of
+    the plugin's take_snapshot() method. The key is typically derived from the
+    configuration file and section which define the input plugin.
+    """
+
+    suffix = '.snapshot'
+
+    def __init__(self, path):
+        super(CatalogSnapshot, self).__init__()
+        self.path = path
+
+    def _filename(self, key):
+        return os.path.join(
+            self.path, hashlib.sha1(key.encode('utf-8')).hexdigest() + self.suffix)
+
+    def load(self, key):
+        """Returns the snapshot stored under key, or None."""
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except (IOError, OSError), e:
+            if e.errno != errno.ENOENT:
+                logging.warning('Unable to read snapshot %s: %s' % (filename, e))
+        except (zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            logging.warning('Discarding unreadable snapshot %s' % filename)
+        return None
+
+    def save(self, key, snapshot):
+        """Stores the snapshot under key, replacing any existing snapshot."""
+        data = zlib.compress(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))
+        filename = self._filename(key)
+        try:
+            os.makedirs(self.path)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+        # Write to a temporary file and rename it so that an interrupted run
+        # never leaves a partially written snapshot
+        temp = '%s.%d' % (filename, os.getpid())
+        try:
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.rename(temp, filename)
+        except:
+            # Don't leave the temporary file behind (e.g. when the disk is
+            # full)
+            exc_info = sys.exc_info()
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+
+def _like_pattern(pattern):
+    """Translates an fnmatch pattern into an SQL LIKE pattern.
+
+    Returns a tuple of (like_pattern, wildcards) where wildcards is True if the
+    pattern contains any wildcards. In the former case, literal % and _
+    characters are escaped with "!". If the pattern contains a [seq] wildcard
+    (which LIKE has no equivalent for) None is returned.
+    """
+    if '[' in pattern:
+        return None
+    elif '*' in pattern or '?' in pattern:
+        return (''.join(
+            '%' if char == '*' else
+            '_' if char == '?' else
+            '!' + char if char in '!%_' else
+            char
+            for char in pattern
+        ), True)
+    else:
+        return (pattern, False)
+
+
+def _group_rows(rows, key, keytype, order=None, value=None):
+    """Groups rows into a dictionary of lists in a single pass.
+
+    The key parameter is a function returning a tuple from each row which is
+    converted to keytype (a namedtuple class) in the result. Rows within each
+    group retain the order in which they were encountered, unless order is
+    specified in which case each group is sorted by it (sorting the groups
+    separately is considerably cheaper than sorting all rows). If value is
+    specified, it is used to convert each row in the result.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[key(row)].append(row)
+    for group in groups.itervalues():
+        if order is not None:
+            group.sort(key=order)
+        if value is not None:
+            group[:] = [value(row) for row in group]
+    return dict((keytype._make(k), group) for (k, group) in groups.iteritems())
+
+
+# The fields of the tuples in dbsuite.tuples which contain identifiers or
+# codes, and hence are likely to be repeated in many rows (see
+# InputPlugin.intern_rows)
+identifier_fields = frozenset((
+    'schema', 'name', 'specific', 'owner', 'tbspace', 'type',
+    'type_schema', 'type_name', 'source_schema', 'source_name',
+    'base_schema', 'base_name', 'dep_schema', 'dep_name',
+    'relation_schema', 'relation_name', 'table_schema', 'table_name',
+    'index_schema', 'index_name', 'const_schema', 'const_table', 'const_name',
+    'routine_schema', 'routine_specific', 'trig_schema', 'trig_name',
+    'ref_name', 'access', 'delete_rule', 'update_rule', 'direction', 'event',
+    'func_type', 'generated', 'granularity', 'order', 'when',
+))
 
 
 _plugin_root = 'dbsuite.plugins'
@@ -32,8 +32,6 @@ import dbsuite.plugins
 from dbsuite.plugins.db2 import (
     connect, make_datetime, make_bool, make_int, make_str
 )
-from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
-from dbsuite.plugins.db2.luw.parser import DB2LUWParser, DB2LUWScriptParser
 from dbsuite.tuples import (
     Schema, Datatype, Table, View, Alias, RelationDep, Index, IndexCol,
     RelationCol, UniqueKey, UniqueKeyCol, ForeignKey, ForeignKeyCol, Check,
@@ -65,9 +63,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             'supplied)')
 
     def tokenizer(self):
+        # The grammar modules are large, so they're only imported when needed
+        from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
         return DB2LUWTokenizer()
 
     def parser(self, for_scripts=False):
+        from dbsuite.plugins.db2.luw.parser import DB2LUWParser, DB2LUWScriptParser
         if for_scripts:
             return DB2LUWScriptParser()
         else:
@@ -138,14 +139,18 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             return 82
         return 0
 
-    def open(self):
-        """Opens the database connection for data retrieval."""
-        super(InputPlugin, self).open()
-        self.connection = connect(
+    def connect(self):
+        """Opens and returns a new connection to the database."""
+        return connect(
             self.options['database'],
             self.options['username'],
             self.options['password']
         )
+
+    def open(self):
+        """Opens the database connection for data retrieval."""
+        super(InputPlugin, self).open()
+        self.connection = self.connect()
         self.name = self.options['database']
         # Test whether the DOCCAT extension is installed
         cursor = self.connection.cursor()
@@ -181,6 +186,14 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
         self.connection.close()
         del self.connection
 
+    def subst(self, column, filtered=True):
+        """Returns the query substitution dictionary for a get_*() query.
+
+        The result includes a "filter" entry containing the predicate returned
+        by schema_filter() for the specified column.
+        """
+        return dict(self.query_subst, filter=self.schema_filter(column, filtered))
+
     def get_schemas(self):
         """Retrieves the details of schemas stored in the database.
 
@@ -229,6 +242,68 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 make_str(desc),
             )
 
+    def get_signatures(self):
+        """Retrieves a signature of the objects in each schema.
+
+        The signature of a schema consists of the number of tables, views,
+        indexes, routines, triggers and types it contains, the number of those
+        which are valid, and the latest creation, alteration, or statistics
+        time among them. Note that changes to comments in the DOCCAT extension
+        do not alter any of these.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT
+                RTRIM(OBJSCHEMA)    AS OBJSCHEMA,
+                COUNT(*)            AS OBJECTS,
+                SUM(VALID)          AS VALID,
+                CHAR(MAX(CHANGED))  AS CHANGED
+            FROM (
+                SELECT
+                    TABSCHEMA,
+                    CASE STATUS WHEN 'N' THEN 1 ELSE 0 END,
+                    MAX(CREATE_TIME, ALTER_TIME, COALESCE(STATS_TIME, CREATE_TIME))
+                FROM SYSCAT.TABLES
+
+                UNION ALL
+
+                SELECT
+                    INDSCHEMA,
+                    1,
+                    MAX(CREATE_TIME, COALESCE(STATS_TIME, CREATE_TIME))
+                FROM SYSCAT.INDEXES
+
+                UNION ALL
+
+                SELECT
+                    ROUTINESCHEMA,
+                    CASE VALID WHEN 'Y' THEN 1 ELSE 0 END,
+                    MAX(CREATE_TIME, ALTER_TIME)
+                FROM SYSCAT.ROUTINES
+
+                UNION ALL
+
+                SELECT
+                    TRIGSCHEMA,
+                    CASE VALID WHEN 'Y' THEN 1 ELSE 0 END,
+                    CREATE_TIME
+                FROM SYSCAT.TRIGGERS
+
+                UNION ALL
+
+                SELECT
+                    TYPESCHEMA,
+                    1,
+                    CREATE_TIME
+                FROM SYSCAT.DATATYPES
+            ) AS T (OBJSCHEMA, VALID, CHANGED)
+            GROUP BY OBJSCHEMA
+            WITH UR""")
+        return dict(
+            (make_str(schema), (make_int(objects), make_int(valid), make_str(changed)))
+            for (schema, objects, valid, changed) in self.fetch_some(cursor)
+        )
+
     def get_datatypes(self):
         """Retrieves the details of datatypes stored in the database.
 
@@ -273,7 +348,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             FROM
                 %(schema)s.DATATYPES
             WHERE INSTANTIABLE = 'Y'
-            WITH UR""" % self.query_subst)
+            AND %(filter)s
+            WITH UR""" % self.subst('TYPESCHEMA', filtered=False))
         for (
                 schema,
                 name,
@@ -344,7 +420,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 T.TYPE IN ('T', 'N')
                 AND T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('T.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -409,7 +486,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND T.TYPE = 'V'
             WHERE
                 V.VALID = 'Y'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('T.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -471,7 +549,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 A.TYPE = 'A'
                 AND T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('A.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -524,7 +603,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 T.DTYPE = 'V'
                 AND T.BTYPE IN ('A', 'N', 'T', 'V')
                 AND V.VALID = 'Y'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('T.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -594,7 +674,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     ON I.TBSPACEID = TS.TBSPACEID
             WHERE
                 T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('I.INDSCHEMA'))
         for (
                 schema,
                 name,
@@ -664,11 +745,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND I.TABNAME = T.TABNAME
             WHERE
                 T.STATUS = 'N'
+                AND %(filter)s
             ORDER BY
                 IC.INDSCHEMA,
                 IC.INDNAME,
                 IC.COLSEQ
-            WITH UR""" % self.query_subst)
+            WITH UR""" % self.subst('IC.INDSCHEMA'))
         for (
                 schema,
                 name,
@@ -761,11 +843,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 C.HIDDEN <> 'S'
                 AND T.TYPE IN ('A', 'N', 'T', 'V')
                 AND T.STATUS = 'N'
+                AND %(filter)s
             ORDER BY
                 C.TABSCHEMA,
                 C.TABNAME,
                 C.COLNO
-            WITH UR""" % self.query_subst)
+            WITH UR""" % self.subst('C.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -845,7 +928,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 C.TYPE IN ('U', 'P')
                 AND T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('C.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -895,12 +979,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND K.TABNAME = T.TABNAME
             WHERE
                 T.STATUS = 'N'
+                AND %(filter)s
             ORDER BY
                 TABSCHEMA,
                 TABNAME,
                 CONSTNAME,
                 COLSEQ
-            WITH UR""" % self.query_subst)
+            WITH UR""" % self.subst('K.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -977,7 +1062,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 C.TYPE = 'F'
                 AND TC.STATUS = 'N'
                 AND TR.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('C.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -1051,12 +1137,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 KF.COLSEQ = KP.COLSEQ
                 AND TC.STATUS = 'N'
                 AND TR.STATUS = 'N'
+                AND %(filter)s
             ORDER BY
                 R.TABSCHEMA,
                 R.TABNAME,
                 R.CONSTNAME,
                 KF.COLSEQ
-            WITH UR""" % self.query_subst)
+            WITH UR""" % self.subst('R.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -1118,7 +1205,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 TC.TYPE = 'K'
                 AND T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('TC.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -1168,7 +1256,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND C.TABNAME = T.TABNAME
             WHERE
                 T.STATUS = 'N'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('C.TABSCHEMA'))
         for (
                 schema,
                 name,
@@ -1239,7 +1328,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 ROUTINETYPE = 'F'
                 AND VALID = 'Y'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('ROUTINESCHEMA'))
         for (
                 schema,
                 specname,
@@ -1322,7 +1412,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 ROUTINETYPE = 'P'
                 AND VALID = 'Y'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('ROUTINESCHEMA'))
         for (
                 schema,
                 specname,
@@ -1418,11 +1509,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 R.ROUTINETYPE IN ('F', 'P')
                 AND R.VALID = 'Y'
+                AND %(filter)s
             ORDER BY
                 P.ROUTINESCHEMA,
                 P.SPECIFICNAME,
                 P.ORDINAL
-            WITH UR""" % self.query_subst)
+            WITH UR""" % self.subst('P.ROUTINESCHEMA'))
         for (
                 schema,
                 specname,
@@ -1499,7 +1591,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 %(schema)s.TRIGGERS
             WHERE
                 VALID = 'Y'
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('TRIGSCHEMA'))
         for (
                 schema,
                 name,
@@ -1560,7 +1653,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 TD.BTYPE IN ('A', 'N', 'T', 'V')
                 AND T.VALID = 'Y'
                 AND NOT (TD.BSCHEMA = T.TABSCHEMA AND TD.BNAME = T.TABNAME)
-            WITH UR""" % self.query_subst)
+                AND %(filter)s
+            WITH UR""" % self.subst('TD.TRIGSCHEMA'))
         for (
                 schema,
                 name,
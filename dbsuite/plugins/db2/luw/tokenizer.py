@@ -24,6 +24,7 @@ from __future__ import (
     )
 
 import re
+from decimal import Decimal
 
 from dbsuite.tokenizer import TokenTypes as TT
 from dbsuite.plugins.db2.zos.tokenizer import DB2ZOSTokenizer, db2zos_identchars, db2zos_namechars
@@ -91,14 +92,11 @@ db2luw_keywords = [
 class DB2LUWTokenizer(DB2ZOSTokenizer):
     """IBM DB2 for Linux/Unix/Windows tokenizer class."""
 
-    # XXX Need to add support for changing statement terminator on the fly
-    # with --# SET TERMINATOR c (override _handle_minus() to check if last
-    # token is a COMMENT, if so, set terminator property)
+    keywords = frozenset(db2luw_keywords)
+    ident_chars = frozenset(db2luw_identchars)
 
     def __init__(self):
         super(DB2LUWTokenizer, self).__init__()
-        self.keywords = set(db2luw_keywords)
-        self.ident_chars = set(db2luw_identchars)
         # Support for C-style /*..*/ comments add in DB2 v8 FP9
         self.c_comments = True
         # DB2 supports nested /*..*/ comments in accordance with SQL 2003
@@ -106,16 +104,17 @@ class DB2LUWTokenizer(DB2ZOSTokenizer):
         # sensibly)
         self.c_comments_nested = True
 
-    def _handle_ident(self):
-        super(DB2LUWTokenizer, self)._handle_ident()
+    def _classify_ident(self, ident):
         # Rewrite the special values INFINITY, NAN and SNAN to their decimal
         # counterparts with token type NUMBER
-        if self._tokens[-1][:2] == (TT.IDENTIFIER, 'INFINITY'):
-            self._tokens[-1] = Token(TT.NUMBER, Decimal('Infinity'), *self._tokens[-1][2:])
-        elif self._tokens[-1][:2] == (TT.IDENTIFIER, 'NAN'):
-            self._tokens[-1] = Token(TT.NUMBER, Decimal('NaN'), *self._tokens[-1][2:])
-        elif self._tokens[-1][:2] == (TT.IDENTIFIER, 'SNAN'):
-            self._tokens[-1] = Token(TT.NUMBER, Decimal('sNaN'), *self._tokens[-1][2:])
+        result = super(DB2LUWTokenizer, self)._classify_ident(ident)
+        if result == (TT.IDENTIFIER, 'INFINITY'):
+            result = (TT.NUMBER, Decimal('Infinity'))
+        elif result == (TT.IDENTIFIER, 'NAN'):
+            result = (TT.NUMBER, Decimal('NaN'))
+        elif result == (TT.IDENTIFIER, 'SNAN'):
+            result = (TT.NUMBER, Decimal('sNaN'))
+        return result
 
     def _handle_period(self):
         """Parses full-stop characters (".") in the source."""
@@ -176,7 +175,7 @@ class DB2LUWTokenizer(DB2ZOSTokenizer):
                 except ValueError, e:
                     self._add_token(TT.ERROR, str(e))
                 else:
-                    self._add_token(TT.STRING, utf8re.sub(utf8sub, s.decode('UTF-8')))
+                    self._add_token(TT.STRING, self.utf8re.sub(utf8sub, s.decode('UTF-8')))
         elif self._peek().upper() == 'X' and self._peek(2) == "'":
             self._handle_unihexstring()
         else:
@@ -191,3 +190,9 @@ class DB2LUWTokenizer(DB2ZOSTokenizer):
         self._jump['u'] = self._handle_utf8string
         self._jump['U'] = self._handle_utf8string
 
+    _regex_handlers = DB2ZOSTokenizer._regex_handlers | frozenset([
+        _handle_utf8string,
+        ])
+    _regex_deferred = DB2ZOSTokenizer._regex_deferred + [
+        "[uU]&", "[uU][xX]'",
+        ]
@@ -34,8 +34,6 @@ import dbsuite.plugins
 from dbsuite.plugins.db2 import (
     connect, make_datetime, make_bool, make_int, make_str
 )
-from dbsuite.plugins.db2.zos.tokenizer import DB2ZOSTokenizer
-from dbsuite.plugins.db2.zos.parser import DB2ZOSParser, DB2ZOSScriptParser
 from dbsuite.tuples import (
     Schema, Datatype, Table, View, Alias, RelationDep, Index, IndexCol,
     RelationCol, UniqueKey, UniqueKeyCol, ForeignKey, ForeignKeyCol, Check,
@@ -63,9 +61,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             option (mandatory if username is supplied)""")
 
     def tokenizer(self):
+        # The grammar modules are large, so they're only imported when needed
+        from dbsuite.plugins.db2.zos.tokenizer import DB2ZOSTokenizer
         return DB2ZOSTokenizer()
 
     def parser(self, for_scripts=False):
+        from dbsuite.plugins.db2.zos.parser import DB2ZOSParser, DB2ZOSScriptParser
         if for_scripts:
             return DB2ZOSScriptParser()
         else:
@@ -80,14 +81,18 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
         if self.options['username'] is not None and self.options['password'] is None:
             raise dbsuite.plugins.PluginConfigurationError('If the username option is specified, the password option must also be specified')
 
-    def open(self):
-        """Opens the database connection for data retrieval."""
-        super(InputPlugin, self).open()
-        self.connection = connect(
+    def connect(self):
+        """Opens and returns a new connection to the database."""
+        return connect(
             self.options['database'],
             self.options['username'],
             self.options['password']
         )
+
+    def open(self):
+        """Opens the database connection for data retrieval."""
+        super(InputPlugin, self).open()
+        self.connection = self.connect()
         self.name = self.options['database']
         # Test which version of the system catalog is installed. The following
         # progression is used to determine version:
@@ -205,6 +210,67 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 make_str(desc),
             )
 
+    def get_signatures(self):
+        """Retrieves a signature of the objects in each schema.
+
+        The signature of a schema consists of the number of tables, views,
+        indexes, routines, triggers and types it contains, the number of those
+        which are valid, and the latest creation, alteration, or statistics
+        time among them.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT
+                RTRIM(OBJSCHEMA)    AS OBJSCHEMA,
+                COUNT(*)            AS OBJECTS,
+                SUM(VALID)          AS VALID,
+                CHAR(MAX(CHANGED))  AS CHANGED
+            FROM (
+                SELECT
+                    CREATOR,
+                    CASE WHEN STATUS IN ('X', ' ') THEN 1 ELSE 0 END,
+                    MAX(CREATEDTS, ALTEREDTS, COALESCE(STATSTIME, CREATEDTS))
+                FROM SYSIBM.SYSTABLES
+
+                UNION ALL
+
+                SELECT
+                    CREATOR,
+                    1,
+                    MAX(CREATEDTS, ALTEREDTS, COALESCE(STATSTIME, CREATEDTS))
+                FROM SYSIBM.SYSINDEXES
+
+                UNION ALL
+
+                SELECT
+                    SCHEMA,
+                    1,
+                    MAX(CREATEDTS, ALTEREDTS)
+                FROM SYSIBM.SYSROUTINES
+
+                UNION ALL
+
+                SELECT
+                    SCHEMA,
+                    1,
+                    CREATEDTS
+                FROM SYSIBM.SYSTRIGGERS
+
+                UNION ALL
+
+                SELECT
+                    SCHEMA,
+                    1,
+                    MAX(CREATEDTS, ALTEREDTS)
+                FROM SYSIBM.SYSDATATYPES
+            ) AS T (OBJSCHEMA, VALID, CHANGED)
+            GROUP BY OBJSCHEMA
+            WITH UR""")
+        return dict(
+            (make_str(schema), (make_int(objects), make_int(valid), make_str(changed)))
+            for (schema, objects, valid, changed) in self.fetch_some(cursor)
+        )
+
     def get_datatypes(self):
         """Retrieves the details of datatypes stored in the database.
 
@@ -357,8 +423,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 TYPE IN ('T', 'X')
                 AND STATUS IN ('X', ' ')
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('CREATOR'))
         for (
                 schema,
                 name,
@@ -421,12 +488,14 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     ON T.CREATOR = V.CREATOR
                     AND T.NAME = V.NAME
                     AND T.TYPE IN ('M', 'V')
+            WHERE
+                %s
             ORDER BY
                 V.CREATOR,
                 V.NAME,
                 V.SEQNO
             WITH UR
-        """)
+        """ % self.schema_filter('T.CREATOR'))
         for (k, v) in groupby(self.fetch_some(cursor), key=itemgetter(0, 1)):
             v = list(v)
             (
@@ -489,6 +558,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     ON T1.TYPE = 'A'
                     AND T1.TBCREATOR = T2.CREATOR
                     AND T1.TBNAME = T2.NAME
+            WHERE
+                %s
 
             UNION ALL
 
@@ -506,8 +577,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 INNER JOIN SYSIBM.SYSTABLES T
                     ON S.TBCREATOR = T.CREATOR
                     AND S.TBNAME = T.NAME
+            WHERE
+                %s
             WITH UR
-        """)
+        """ % (
+            self.schema_filter('T1.CREATOR'),
+            self.schema_filter('S.CREATOR'),
+        ))
         for (
                 schema,
                 name,
@@ -556,7 +632,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 DTYPE IN ('M', 'V')
                 AND BTYPE IN ('M', 'T', 'V')
-            WITH UR""")
+                AND %s
+            WITH UR""" % self.schema_filter('DCREATOR'))
         for (
                 schema,
                 name,
@@ -621,8 +698,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND I.TBNAME = T.NAME
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('I.CREATOR'))
         for (
                 schema,
                 name,
@@ -692,12 +770,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND I.TBNAME = T.NAME
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
             ORDER BY
                 K.IXCREATOR,
                 K.IXNAME,
                 K.COLSEQ
             WITH UR
-        """)
+        """ % self.schema_filter('K.IXCREATOR'))
         for (
                 schema,
                 name,
@@ -863,12 +942,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 T.TYPE IN ('T', 'X', 'M', 'V')
                 AND T.STATUS IN ('X', ' ')
+                AND %s
             ORDER BY
                 C.TBCREATOR,
                 C.TBNAME,
                 C.COLNO
             WITH UR
-        """)
+        """ % self.schema_filter('C.TBCREATOR'))
         for (
                 schema,
                 name,
@@ -947,6 +1027,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND C.TBNAME = T.NAME
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
 
             UNION ALL
 
@@ -968,8 +1049,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 I.UNIQUERULE = 'P'
                 AND T.STATUS IN ('X', ' ')
                 AND (I.TBCREATOR, I.TBNAME) NOT IN (SELECT TBCREATOR, TBNAME FROM SYSIBM.SYSTABCONST)
+                AND %s
             WITH UR
-        """)
+        """ % (
+            self.schema_filter('C.TBCREATOR'),
+            self.schema_filter('I.TBCREATOR'),
+        ))
         for (
                 schema,
                 name,
@@ -1016,6 +1101,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     COLSEQ    AS COLSEQ
                 FROM
                     SYSIBM.SYSKEYCOLUSE
+                WHERE
+                    %s
 
                 UNION ALL
 
@@ -1032,6 +1119,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                         AND I.NAME = K.IXNAME
                 WHERE
                     (I.TBCREATOR, I.TBNAME) NOT IN (SELECT TBCREATOR, TBNAME FROM SYSIBM.SYSTABCONST)
+                    AND %s
             )
             SELECT
                 RTRIM(TABSCHEMA) AS TABSCHEMA,
@@ -1046,7 +1134,10 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 KEYNAME,
                 COLSEQ
             WITH UR
-        """)
+        """ % (
+            self.schema_filter('TBCREATOR'),
+            self.schema_filter('I.TBCREATOR'),
+        ))
         for (
                 schema,
                 name,
@@ -1120,6 +1211,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND NOT (C.IXOWNER = '' AND C.IXNAME = '')
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
 
             UNION ALL
 
@@ -1153,8 +1245,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND NOT (C.IXOWNER = '' AND C.IXNAME = '')
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
             WITH UR
-        """)
+        """ % (
+            self.schema_filter('R.CREATOR'),
+            self.schema_filter('R.CREATOR'),
+        ))
         for (
                 schema,
                 name,
@@ -1232,6 +1328,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                         AND F.COLSEQ = K.COLSEQ
                 WHERE
                     T.STATUS IN ('X', ' ')
+                    AND %s
 
                 UNION ALL
 
@@ -1263,6 +1360,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                         AND F.COLSEQ = K.COLSEQ
                 WHERE
                     T.STATUS IN ('X', ' ')
+                    AND %s
             )
             SELECT
                 RTRIM(TABSCHEMA) AS TABSCHEMA,
@@ -1278,7 +1376,10 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 KEYNAME,
                 COLSEQ
             WITH UR
-        """)
+        """ % (
+            self.schema_filter('F.CREATOR'),
+            self.schema_filter('F.CREATOR'),
+        ))
         for (
                 schema,
                 name,
@@ -1332,8 +1433,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     AND C.TBNAME = T.NAME
             WHERE
                 T.STATUS IN ('X', ' ')
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('C.TBOWNER'))
         for (
                 schema,
                 name,
@@ -1429,8 +1531,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 SYSIBM.SYSROUTINES
             WHERE
                 ROUTINETYPE = 'F'
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('SCHEMA'))
         for (
                 schema,
                 specname,
@@ -1515,8 +1618,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 SYSIBM.SYSROUTINES
             WHERE
                 ROUTINETYPE = 'P'
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('SCHEMA'))
         for (
                 schema,
                 specname,
@@ -1624,12 +1728,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 ROUTINETYPE IN ('F', 'P')
                 AND ROWTYPE <> 'X'
+                AND %s
             ORDER BY
                 SCHEMA,
                 SPECIFICNAME,
                 ORDINAL
             WITH UR
-        """)
+        """ % self.schema_filter('SCHEMA'))
         for (
                 schema,
                 specname,
@@ -1704,12 +1809,14 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 TEXT               AS SQL
             FROM
                 SYSIBM.SYSTRIGGERS
+            WHERE
+                %s
             ORDER BY
                 SCHEMA,
                 NAME,
                 SEQNO
             WITH UR
-        """)
+        """ % self.schema_filter('SCHEMA'))
         for (k, v) in groupby(self.fetch_some(cursor), key=itemgetter(0, 1)):
             v = list(v)
             (
@@ -1774,8 +1881,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             WHERE
                 D.BTYPE IN ('A', 'M', 'S', 'T', 'V')
                 AND NOT (D.BQUALIFIER = T.TBOWNER AND D.BNAME = T.TBNAME)
+                AND %s
             WITH UR
-        """)
+        """ % self.schema_filter('T.SCHEMA'))
         for (
                 schema,
                 name,
@@ -26,7 +26,7 @@ from __future__ import (
 from collections import namedtuple
 
 from dbsuite.plugins.db2.zos.tokenizer import db2zos_namechars, db2zos_identchars
-from dbsuite.parser import BaseParser, ParseError, ParseBacktrack, quote_str
+from dbsuite.parser import BaseParser, ParseError, ParseBacktrack, quote_str, memoized, iterative
 from dbsuite.tokenizer import TokenTypes as TT, Token
 
 
@@ -503,6 +503,7 @@ class DB2ZOSParser(BaseParser):
                 self._newline()
         return result
 
+    @iterative
     def _parse_expression_list(self, allowdefault=False, newlines=False):
         """Parses a comma separated list of expressions.
 
@@ -514,7 +515,7 @@ class DB2ZOSParser(BaseParser):
         """
         while True:
             if not (allowdefault and self._match('DEFAULT')):
-                self._parse_expression()
+                yield (self._parse_expression, ())
             if not self._match(','):
                 break
             elif newlines:
@@ -548,6 +549,8 @@ class DB2ZOSParser(BaseParser):
             elif newlines:
                 self._newline()
 
+    @memoized
+    @iterative
     def _parse_tuple(self, allowdefault=False):
         """Parses a full-select or a tuple (list) of expressions.
 
@@ -570,10 +573,12 @@ class DB2ZOSParser(BaseParser):
         else:
             # Everything else (including a redundantly parenthesized
             # full-select) can be parsed as an expression list
-            self._parse_expression_list(allowdefault)
+            yield (self._parse_expression_list, (allowdefault,))
 
     # EXPRESSIONS and PREDICATES #############################################
 
+    @memoized
+    @iterative
     def _parse_search_condition(self, newlines=True):
         """Parse a search condition (as part of WHERE/HAVING/etc.)"""
         while True:
@@ -584,13 +589,13 @@ class DB2ZOSParser(BaseParser):
             try:
                 # Attempt to parse a parenthesized search condition
                 self._expect('(')
-                self._parse_search_condition(newlines)
+                yield (self._parse_search_condition, (newlines,))
                 self._expect(')')
             except ParseError:
                 # If that fails, rewind and parse a predicate instead (which
                 # will parse a parenthesized expression)
                 self._restore_state()
-                self._parse_predicate()
+                yield (self._parse_predicate, ())
                 if self._match('SELECTIVITY'):
                     self._expect(TT.NUMBER)
             else:
@@ -601,6 +606,8 @@ class DB2ZOSParser(BaseParser):
             else:
                 break
 
+    @memoized
+    @iterative
     def _parse_predicate(self):
         """Parse high precedence predicate operators (BETWEEN, IN, etc.)"""
         if self._match('EXISTS'):
@@ -608,38 +615,38 @@ class DB2ZOSParser(BaseParser):
             self._parse_full_select()
             self._expect(')')
         else:
-            self._parse_expression()
+            yield (self._parse_expression, ())
             if self._match('NOT'):
                 if self._match('LIKE'):
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
                     if self._match('ESCAPE'):
-                        self._parse_expression()
+                        yield (self._parse_expression, ())
                 elif self._match('BETWEEN'):
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
                     self._expect('AND')
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
                 elif self._match('IN'):
                     if self._match('('):
-                        self._parse_tuple()
+                        yield (self._parse_tuple, ())
                         self._expect(')')
                     else:
-                        self._parse_expression()
+                        yield (self._parse_expression, ())
                 else:
                     self._expected_one_of(['LIKE', 'BETWEEN', 'IN'])
             elif self._match('LIKE'):
-                self._parse_expression()
+                yield (self._parse_expression, ())
                 if self._match('ESCAPE'):
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
             elif self._match('BETWEEN'):
-                self._parse_expression()
+                yield (self._parse_expression, ())
                 self._expect('AND')
-                self._parse_expression()
+                yield (self._parse_expression, ())
             elif self._match('IN'):
                 if self._match('('):
-                    self._parse_tuple()
+                    yield (self._parse_tuple, ())
                     self._expect(')')
                 else:
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
             elif self._match('IS'):
                 self._match('NOT')
                 if self._match('VALIDATED'):
@@ -662,7 +669,7 @@ class DB2ZOSParser(BaseParser):
                 if self._match('PASSING'):
                     self._match_sequence(['BY', 'REF'])
                     while True:
-                        self._parse_expression()
+                        yield (self._parse_expression, ())
                         self._expect_sequence(['AS', TT.IDENTIFIER])
                         self._match_sequence(['BY', 'REF'])
                         if not self._match(','):
@@ -674,7 +681,7 @@ class DB2ZOSParser(BaseParser):
                     self._parse_full_select()
                     self._expect(')')
                 else:
-                    self._parse_expression()
+                    yield (self._parse_expression, ())
             else:
                 self._expected_one_of([
                     'EXISTS',
@@ -713,11 +720,13 @@ class DB2ZOSParser(BaseParser):
         else:
             self._expect_one_of(labels)
 
+    @memoized
+    @iterative
     def _parse_expression(self):
         while True:
             self._match_one_of(['+', '-'], postspace=False) # Unary +/-
             if self._match('('):
-                self._parse_tuple()
+                yield (self._parse_tuple, ())
                 self._expect(')')
             elif self._match('CAST'):
                 self._parse_cast_expression()
@@ -725,9 +734,9 @@ class DB2ZOSParser(BaseParser):
                 self._parse_cast_expression()
             elif self._match('CASE'):
                 if self._match('WHEN'):
-                    self._parse_searched_case()
+                    yield (self._parse_searched_case, ())
                 else:
-                    self._parse_simple_case()
+                    yield (self._parse_simple_case, ())
             elif self._match_sequence(['NEXT', 'VALUE', 'FOR']) or self._match_sequence(['NEXTVAL', 'FOR']):
                 self._parse_sequence_name()
             elif self._match_sequence(['PREVIOUS', 'VALUE', 'FOR']) or self._match_sequence(['PREVVAL', 'FOR']):
@@ -743,6 +752,8 @@ class DB2ZOSParser(BaseParser):
                 # call, a column name, etc.
                 self._save_state()
                 try:
+                    if not self._peek_function_call():
+                        self._expected('(')
                     self._parse_function_call()
                 except ParseError:
                     self._restore_state()
@@ -758,13 +769,40 @@ class DB2ZOSParser(BaseParser):
                     self._forget_state()
             # Parse an optional array element suffix
             if self._match('[', prespace=False):
-                self._parse_expression()
+                yield (self._parse_expression, ())
                 self._expect(']')
             # Parse an optional interval suffix
             self._parse_duration_label(optional=True)
             if not self._match_one_of(['+', '-', '*', '/', '||', 'CONCAT']): # Binary operators
                 break
 
+    def _peek_function_call(self):
+        """Returns True if the current position could start a function call.
+
+        Every form of function call starts with a name of up to three parts
+        followed by an opening parenthesis. Checking for this first avoids the
+        comparatively expensive failure of each of the alternatives tried by
+        _parse_function_call() for every column name in an expression.
+        """
+        i = self._index
+        for part in range(3):
+            if not self._cmp_tokens(self._token(i), TT.IDENTIFIER):
+                return False
+            i = self._skip_junk(i + 1)
+            if self._cmp_tokens(self._token(i), '('):
+                return True
+            elif not self._cmp_tokens(self._token(i), '.'):
+                return False
+            i = self._skip_junk(i + 1)
+        return False
+
+    def _skip_junk(self, index):
+        """Returns the index of the first non-junk token at or after index."""
+        while self._token(index).type in (TT.COMMENT, TT.WHITESPACE):
+            index += 1
+        return index
+
+    @memoized
     def _parse_function_call(self):
         """Parses a function call of various types"""
         # Ambiguity: certain functions have "abnormal" internal syntaxes (extra
@@ -1228,15 +1266,16 @@ class DB2ZOSParser(BaseParser):
             self._parse_relation_name()
         self._expect(')')
 
+    @iterative
     def _parse_searched_case(self):
         """Parses a searched CASE expression (CASE WHEN expression...)"""
         # CASE WHEN already matched
         # Parse all WHEN cases
         self._indent(-1)
         while True:
-            self._parse_search_condition(newlines=False) # WHEN Search condition
+            yield (self._parse_search_condition, (False,)) # WHEN Search condition
             self._expect('THEN')
-            self._parse_expression() # THEN Expression
+            yield (self._parse_expression, ()) # THEN Expression
             if self._match('WHEN'):
                 self._newline(-1)
             elif self._match('ELSE'):
@@ -1248,22 +1287,23 @@ class DB2ZOSParser(BaseParser):
             else:
                 self._expected_one_of(['WHEN', 'ELSE', 'END'])
         # Parse the optional ELSE case
-        self._parse_expression() # ELSE Expression
+        yield (self._parse_expression, ()) # ELSE Expression
         self._outdent()
         self._expect('END')
 
+    @iterative
     def _parse_simple_case(self):
         """Parses a simple CASE expression (CASE expression WHEN value...)"""
         # CASE already matched
         # Parse the CASE Expression
-        self._parse_expression() # CASE Expression
+        yield (self._parse_expression, ()) # CASE Expression
         # Parse all WHEN cases
         self._indent()
         self._expect('WHEN')
         while True:
-            self._parse_expression() # WHEN Expression
+            yield (self._parse_expression, ()) # WHEN Expression
             self._expect('THEN')
-            self._parse_expression() # THEN Expression
+            yield (self._parse_expression, ()) # THEN Expression
             if self._match('WHEN'):
                 self._newline(-1)
             elif self._match('ELSE'):
@@ -1275,7 +1315,7 @@ class DB2ZOSParser(BaseParser):
             else:
                 self._expected_one_of(['WHEN', 'ELSE', 'END'])
         # Parse the optional ELSE case
-        self._parse_expression() # ELSE Expression
+        yield (self._parse_expression, ()) # ELSE Expression
         self._outdent()
         self._expect('END')
 
@@ -1658,6 +1698,7 @@ class DB2ZOSParser(BaseParser):
         self._parse_search_condition()
         self._outdent()
 
+    @memoized
     def _parse_full_select(self, allowdefault=False, allowinto=False):
         """Parses set operators (low precedence) in a full-select expression"""
         self._parse_relation(allowdefault, allowinto)
@@ -6597,286 +6638,292 @@ class DB2ZOSParser(BaseParser):
         if label:
             self._match((TT.IDENTIFIER, label))
 
-    def _parse_statement(self):
-        """Parses a top-level statement in an SQL script"""
-        # XXX CREATE EVENT MONITOR
-        # If we're reformatting WHITESPACE, add a blank WHITESPACE token to the
-        # output - this will suppress leading whitespace in front of the first
-        # word of the statement
-        self._output.append(Token(TT.WHITESPACE, None, '', 0, 0))
-        if self._match('ALTER'):
-            if self._match('TABLE'):
-                self._parse_alter_table_statement()
-            elif self._match('SEQUENCE'):
-                self._parse_alter_sequence_statement()
-            elif self._match('FUNCTION'):
-                self._parse_alter_function_statement(specific=False)
+    def _parse_alter_statement(self):
+        """Parses an ALTER statement"""
+        # ALTER already matched
+        if self._match('TABLE'):
+            self._parse_alter_table_statement()
+        elif self._match('SEQUENCE'):
+            self._parse_alter_sequence_statement()
+        elif self._match('FUNCTION'):
+            self._parse_alter_function_statement(specific=False)
+        elif self._match('PROCEDURE'):
+            self._parse_alter_procedure_statement(specific=False)
+        elif self._match('SPECIFIC'):
+            if self._match('FUNCTION'):
+                self._parse_alter_function_statement(specific=True)
             elif self._match('PROCEDURE'):
-                self._parse_alter_procedure_statement(specific=False)
-            elif self._match('SPECIFIC'):
-                if self._match('FUNCTION'):
-                    self._parse_alter_function_statement(specific=True)
-                elif self._match('PROCEDURE'):
-                    self._parse_alter_procedure_statement(specific=True)
-                else:
-                    self._expected_one_of(['FUNCTION', 'PROCEDURE'])
-            elif self._match('NICKNAME'):
-                self._parse_alter_nickname_statement()
-            elif self._match('TABLESPACE'):
-                self._parse_alter_tablespace_statement()
-            elif self._match('BUFFERPOOL'):
-                self._parse_alter_bufferpool_statement()
-            elif self._match_sequence(['DATABASE', 'PARTITION', 'GROUP']):
-                self._parse_alter_partition_group_statement()
-            elif self._match('DATABASE'):
-                self._parse_alter_database_statement()
-            elif self._match('NODEGROUP'):
-                self._parse_alter_partition_group_statement()
-            elif self._match('SERVER'):
-                self._parse_alter_server()
-            elif self._match_sequence(['HISTOGRAM', 'TEMPLATE']):
-                self._parse_alter_histogram_template_statement()
-            elif self._match_sequence(['AUDIT', 'POLICY']):
-                self._parse_alter_audit_policy_statement()
-            elif self._match_sequence(['SECURITY', 'LABEL', 'COMPONENT']):
-                self._parse_alter_security_label_component_statement()
-            elif self._match_sequence(['SECURITY', 'POLICY']):
-                self._parse_alter_security_policy_statement()
-            elif self._match_sequence(['SERVICE', 'CLASS']):
-                self._parse_alter_service_class_statement()
-            elif self._match('THRESHOLD'):
-                self._parse_alter_threshold_statement()
-            elif self._match_sequence(['TRUSTED', 'CONTEXT']):
-                self._parse_alter_trusted_context_statement()
-            elif self._match_sequence(['USER', 'MAPPING']):
-                self._parse_alter_user_mapping_statement()
-            elif self._match('VIEW'):
-                self._parse_alter_view_statement()
-            elif self._match_sequence(['WORK', 'ACTION', 'SET']):
-                self._parse_alter_work_action_set_statement()
-            elif self._match_sequence(['WORK', 'CLASS', 'SET']):
-                self._parse_alter_work_class_set_statement()
-            elif self._match('WORKLOAD'):
-                self._parse_alter_workload_statement()
-            elif self._match('WRAPPER'):
-                self._parse_alter_wrapper_statement()
-            elif self._match('MODULE'):
-                self._parse_alter_module_statement()
+                self._parse_alter_procedure_statement(specific=True)
+            else:
+                self._expected_one_of(['FUNCTION', 'PROCEDURE'])
+        elif self._match('NICKNAME'):
+            self._parse_alter_nickname_statement()
+        elif self._match('TABLESPACE'):
+            self._parse_alter_tablespace_statement()
+        elif self._match('BUFFERPOOL'):
+            self._parse_alter_bufferpool_statement()
+        elif self._match_sequence(['DATABASE', 'PARTITION', 'GROUP']):
+            self._parse_alter_partition_group_statement()
+        elif self._match('DATABASE'):
+            self._parse_alter_database_statement()
+        elif self._match('NODEGROUP'):
+            self._parse_alter_partition_group_statement()
+        elif self._match('SERVER'):
+            self._parse_alter_server()
+        elif self._match_sequence(['HISTOGRAM', 'TEMPLATE']):
+            self._parse_alter_histogram_template_statement()
+        elif self._match_sequence(['AUDIT', 'POLICY']):
+            self._parse_alter_audit_policy_statement()
+        elif self._match_sequence(['SECURITY', 'LABEL', 'COMPONENT']):
+            self._parse_alter_security_label_component_statement()
+        elif self._match_sequence(['SECURITY', 'POLICY']):
+            self._parse_alter_security_policy_statement()
+        elif self._match_sequence(['SERVICE', 'CLASS']):
+            self._parse_alter_service_class_statement()
+        elif self._match('THRESHOLD'):
+            self._parse_alter_threshold_statement()
+        elif self._match_sequence(['TRUSTED', 'CONTEXT']):
+            self._parse_alter_trusted_context_statement()
+        elif self._match_sequence(['USER', 'MAPPING']):
+            self._parse_alter_user_mapping_statement()
+        elif self._match('VIEW'):
+            self._parse_alter_view_statement()
+        elif self._match_sequence(['WORK', 'ACTION', 'SET']):
+            self._parse_alter_work_action_set_statement()
+        elif self._match_sequence(['WORK', 'CLASS', 'SET']):
+            self._parse_alter_work_class_set_statement()
+        elif self._match('WORKLOAD'):
+            self._parse_alter_workload_statement()
+        elif self._match('WRAPPER'):
+            self._parse_alter_wrapper_statement()
+        elif self._match('MODULE'):
+            self._parse_alter_module_statement()
+        else:
+            self._expected_one_of([
+                'AUDIT',
+                'BUFFERPOOL',
+                'DATABASE',
+                'FUNCTION',
+                'HISTOGRAM',
+                'MODULE',
+                'NICKNAME',
+                'NODEGROUP',
+                'PROCEDURE',
+                'SECURITY',
+                'SEQUENCE',
+                'SERVER',
+                'SERVICE',
+                'SPECIFIC',
+                'TABLE',
+                'TABLESPACE',
+                'THRESHOLD',
+                'TRUSTED',
+                'USER',
+                'VIEW',
+                'WORK',
+                'WORKLOAD',
+                'WRAPPER',
+            ])
+
+    def _parse_create_statement(self):
+        """Parses a CREATE statement"""
+        # CREATE already matched
+        self._match_sequence(['OR', 'REPLACE'])
+        if self._match('TABLE'):
+            self._parse_create_table_statement()
+        elif self._match('VIEW'):
+            self._parse_create_view_statement()
+        elif self._match('ALIAS'):
+            self._parse_create_alias_statement()
+        elif self._match_sequence(['UNIQUE', 'INDEX']):
+            self._parse_create_index_statement(unique=True)
+        elif self._match('INDEX'):
+            self._parse_create_index_statement(unique=False)
+        elif self._match('DISTINCT'):
+            self._expect('TYPE')
+            self._parse_create_type_statement()
+        elif self._match('SEQUENCE'):
+            self._parse_create_sequence_statement()
+        elif self._match_sequence(['FUNCTION', 'MAPPING']):
+            self._parse_create_function_mapping_statement()
+        elif self._match('FUNCTION'):
+            self._parse_create_function_statement()
+        elif self._match('PROCEDURE'):
+            self._parse_create_procedure_statement()
+        elif self._match('TABLESPACE'):
+            self._parse_create_tablespace_statement()
+        elif self._match('BUFFERPOOL'):
+            self._parse_create_bufferpool_statement()
+        elif self._match_sequence(['DATABASE', 'PARTITION', 'GROUP']):
+            self._parse_create_database_partition_group_statement()
+        elif self._match('NODEGROUP'):
+            self._parse_create_database_partition_group_statement()
+        elif self._match('TRIGGER'):
+            self._parse_create_trigger_statement()
+        elif self._match('SCHEMA'):
+            self._parse_create_schema_statement()
+        elif self._match_sequence(['AUDIT', 'POLICY']):
+            self._parse_create_audit_policy_statement()
+        elif self._match_sequence(['EVENT', 'MONITOR']):
+            self._parse_create_event_monitor_statement()
+        elif self._match_sequence(['HISTOGRAM', 'TEMPLATE']):
+            self._parse_create_histogram_template_statement()
+        elif self._match('NICKNAME'):
+            self._parse_create_nickname_statement()
+        elif self._match('ROLE'):
+            self._parse_create_role_statement()
+        elif self._match_sequence(['SECURITY', 'LABEL', 'COMPONENT']):
+            self._parse_create_security_label_component_statement()
+        elif self._match_sequence(['SECURITY', 'LABEL']):
+            self._parse_create_security_label_statement()
+        elif self._match_sequence(['SECURITY', 'POLICY']):
+            self._parse_create_security_policy_statement()
+        elif self._match_sequence(['SERVICE', 'CLASS']):
+            self._parse_create_service_class_statement()
+        elif self._match('SERVER'):
+            self._parse_create_server_statement()
+        elif self._match('THRESHOLD'):
+            self._parse_create_threshold_statement()
+        elif self._match_sequence(['TRUSTED', 'CONTEXT']):
+            self._parse_create_trusted_context_statement()
+        elif self._match_sequence(['TYPE', 'MAPPING']):
+            self._parse_create_type_mapping_statement()
+        elif self._match('TYPE'):
+            self._parse_create_type_statement()
+        elif self._match_sequence(['USER', 'MAPPING']):
+            self._parse_create_user_mapping_statement()
+        elif self._match('VARIABLE'):
+            self._parse_create_variable_statement()
+        elif self._match_sequence(['WORK', 'ACTION', 'SET']):
+            self._parse_create_work_action_set_statement()
+        elif self._match_sequence(['WORK', 'CLASS', 'SET']):
+            self._parse_create_work_class_set_statement()
+        elif self._match('WORKLOAD'):
+            self._parse_create_workload_statement()
+        elif self._match('WRAPPER'):
+            self._parse_create_wrapper_statement()
+        elif self._match('MODULE'):
+            self._parse_create_module_statement()
+        else:
+            tbspacetype = self._match_one_of([
+                'REGULAR',
+                'LONG',
+                'LARGE',
+                'TEMPORARY',
+                'USER',
+                'SYSTEM',
+            ])
+            if tbspacetype:
+                tbspacetype = tbspacetype.value
+                if tbspacetype in ('USER', 'SYSTEM'):
+                    self._expect('TEMPORARY')
+                elif tbspacetype == 'TEMPORARY':
+                    tbspacetype = 'SYSTEM'
+                elif tbspacetype == 'LONG':
+                    tbspacetype = 'LARGE'
+                self._expect('TABLESPACE')
+                self._parse_create_tablespace_statement(tbspacetype)
             else:
                 self._expected_one_of([
+                    'ALIAS',
                     'AUDIT',
                     'BUFFERPOOL',
                     'DATABASE',
+                    'DISTINCT',
+                    'EVENT',
                     'FUNCTION',
-                    'HISTOGRAM',
+                    'INDEX',
                     'MODULE',
                     'NICKNAME',
                     'NODEGROUP',
                     'PROCEDURE',
+                    'ROLE',
                     'SECURITY',
                     'SEQUENCE',
                     'SERVER',
                     'SERVICE',
-                    'SPECIFIC',
                     'TABLE',
                     'TABLESPACE',
                     'THRESHOLD',
+                    'TRIGGER',
                     'TRUSTED',
+                    'TYPE',
+                    'UNIQUE',
                     'USER',
+                    'VARIABLE',
                     'VIEW',
                     'WORK',
                     'WORKLOAD',
                     'WRAPPER',
                 ])
-        elif self._match('AUDIT'):
-            self._parse_audit_statement()
-        elif self._match('BEGIN'):
-            self._parse_compiled_compound_statement()
-        elif self._match('CALL'):
-            self._parse_call_statement()
-        elif self._match_sequence(['COMMENT', 'ON']):
-            self._parse_comment_statement()
-        elif self._match('COMMIT'):
-            self._parse_commit_statement()
-        elif self._match('CREATE'):
-            self._match_sequence(['OR', 'REPLACE'])
-            if self._match('TABLE'):
-                self._parse_create_table_statement()
-            elif self._match('VIEW'):
-                self._parse_create_view_statement()
-            elif self._match('ALIAS'):
-                self._parse_create_alias_statement()
-            elif self._match_sequence(['UNIQUE', 'INDEX']):
-                self._parse_create_index_statement(unique=True)
-            elif self._match('INDEX'):
-                self._parse_create_index_statement(unique=False)
-            elif self._match('DISTINCT'):
-                self._expect('TYPE')
-                self._parse_create_type_statement()
-            elif self._match('SEQUENCE'):
-                self._parse_create_sequence_statement()
-            elif self._match_sequence(['FUNCTION', 'MAPPING']):
-                self._parse_create_function_mapping_statement()
-            elif self._match('FUNCTION'):
-                self._parse_create_function_statement()
-            elif self._match('PROCEDURE'):
-                self._parse_create_procedure_statement()
-            elif self._match('TABLESPACE'):
-                self._parse_create_tablespace_statement()
-            elif self._match('BUFFERPOOL'):
-                self._parse_create_bufferpool_statement()
-            elif self._match_sequence(['DATABASE', 'PARTITION', 'GROUP']):
-                self._parse_create_database_partition_group_statement()
-            elif self._match('NODEGROUP'):
-                self._parse_create_database_partition_group_statement()
-            elif self._match('TRIGGER'):
-                self._parse_create_trigger_statement()
-            elif self._match('SCHEMA'):
-                self._parse_create_schema_statement()
-            elif self._match_sequence(['AUDIT', 'POLICY']):
-                self._parse_create_audit_policy_statement()
-            elif self._match_sequence(['EVENT', 'MONITOR']):
-                self._parse_create_event_monitor_statement()
-            elif self._match_sequence(['HISTOGRAM', 'TEMPLATE']):
-                self._parse_create_histogram_template_statement()
-            elif self._match('NICKNAME'):
-                self._parse_create_nickname_statement()
-            elif self._match('ROLE'):
-                self._parse_create_role_statement()
-            elif self._match_sequence(['SECURITY', 'LABEL', 'COMPONENT']):
-                self._parse_create_security_label_component_statement()
-            elif self._match_sequence(['SECURITY', 'LABEL']):
-                self._parse_create_security_label_statement()
-            elif self._match_sequence(['SECURITY', 'POLICY']):
-                self._parse_create_security_policy_statement()
-            elif self._match_sequence(['SERVICE', 'CLASS']):
-                self._parse_create_service_class_statement()
-            elif self._match('SERVER'):
-                self._parse_create_server_statement()
-            elif self._match('THRESHOLD'):
-                self._parse_create_threshold_statement()
-            elif self._match_sequence(['TRUSTED', 'CONTEXT']):
-                self._parse_create_trusted_context_statement()
-            elif self._match_sequence(['TYPE', 'MAPPING']):
-                self._parse_create_type_mapping_statement()
-            elif self._match('TYPE'):
-                self._parse_create_type_statement()
-            elif self._match_sequence(['USER', 'MAPPING']):
-                self._parse_create_user_mapping_statement()
-            elif self._match('VARIABLE'):
-                self._parse_create_variable_statement()
-            elif self._match_sequence(['WORK', 'ACTION', 'SET']):
-                self._parse_create_work_action_set_statement()
-            elif self._match_sequence(['WORK', 'CLASS', 'SET']):
-                self._parse_create_work_class_set_statement()
-            elif self._match('WORKLOAD'):
-                self._parse_create_workload_statement()
-            elif self._match('WRAPPER'):
-                self._parse_create_wrapper_statement()
-            elif self._match('MODULE'):
-                self._parse_create_module_statement()
-            else:
-                tbspacetype = self._match_one_of([
-                    'REGULAR',
-                    'LONG',
-                    'LARGE',
-                    'TEMPORARY',
-                    'USER',
-                    'SYSTEM',
-                ])
-                if tbspacetype:
-                    tbspacetype = tbspacetype.value
-                    if tbspacetype in ('USER', 'SYSTEM'):
-                        self._expect('TEMPORARY')
-                    elif tbspacetype == 'TEMPORARY':
-                        tbspacetype = 'SYSTEM'
-                    elif tbspacetype == 'LONG':
-                        tbspacetype = 'LARGE'
-                    self._expect('TABLESPACE')
-                    self._parse_create_tablespace_statement(tbspacetype)
-                else:
-                    self._expected_one_of([
-                        'ALIAS',
-                        'AUDIT',
-                        'BUFFERPOOL',
-                        'DATABASE',
-                        'DISTINCT',
-                        'EVENT',
-                        'FUNCTION',
-                        'INDEX',
-                        'MODULE',
-                        'NICKNAME',
-                        'NODEGROUP',
-                        'PROCEDURE',
-                        'ROLE',
-                        'SECURITY',
-                        'SEQUENCE',
-                        'SERVER',
-                        'SERVICE',
-                        'TABLE',
-                        'TABLESPACE',
-                        'THRESHOLD',
-                        'TRIGGER',
-                        'TRUSTED',
-                        'TYPE',
-                        'UNIQUE',
-                        'USER',
-                        'VARIABLE',
-                        'VIEW',
-                        'WORK',
-                        'WORKLOAD',
-                        'WRAPPER',
-                    ])
-        elif self._match('DELETE'):
-            self._parse_delete_statement()
-        elif self._match('DROP'):
-            self._parse_drop_statement()
-        elif self._match_sequence(['DECLARE', 'GLOBAL', 'TEMPORARY', 'TABLE']):
-            self._parse_declare_global_temporary_table_statement()
-        elif self._match('DECLARE'):
-            self._parse_declare_cursor_statement()
-        elif self._match('EXPLAIN'):
-            self._parse_explain_statement()
-        elif self._match_sequence(['FLUSH', 'OPTIMIZATION', 'PROFILE', 'CACHE']):
-            self._parse_flush_optimization_profile_cache_statement()
-        elif self._match_sequence(['FREE', 'LOCATOR']):
-            self._parse_free_locator_statement()
-        elif self._match('GRANT'):
-            self._parse_grant_statement()
-        elif self._match('INSERT'):
-            self._parse_insert_statement()
-        elif self._match_sequence(['LOCK', 'TABLE']):
-            self._parse_lock_table_statement()
-        elif self._match('MERGE'):
-            self._parse_merge_statement()
-        elif self._match_sequence(['REFRESH', 'TABLE']):
-            self._parse_refresh_table_statement()
-        elif self._match('RELEASE'):
-            self._match('TO')
-            self._expect('SAVEPOINT')
-            self._parse_release_savepoint_statement()
-        elif self._match_sequence(['RENAME', 'TABLESPACE']):
-            self._parse_rename_tablespace_statement()
-        elif self._match('RENAME'):
-            self._parse_rename_statement()
-        elif self._match('REVOKE'):
-            self._parse_revoke_statement()
-        elif self._match('ROLLBACK'):
-            self._parse_rollback_statement()
-        elif self._match('SAVEPOINT'):
-            self._parse_savepoint_statement()
-        elif self._match_sequence(['SET', 'INTEGRITY']):
-            self._parse_set_integrity_statement()
-        elif self._match('SET'):
-            self._parse_set_statement()
-        elif self._match_sequence(['TRANSFER', 'OWNERSHIP']):
-            self._parse_transfer_ownership_statement()
-        elif self._match('TRUNCATE'):
-            self._parse_truncate_statement()
-        elif self._match('UPDATE'):
-            self._parse_update_statement()
-        else:
-            self._parse_select_statement()
+
+    def _parse_release_statement(self):
+        """Parses a RELEASE statement"""
+        # RELEASE already matched
+        self._match('TO')
+        self._expect('SAVEPOINT')
+        self._parse_release_savepoint_statement()
+
+    # Statement dispatch table used by _parse_statement. Maps the first
+    # keyword of a statement to a list of (keyword sequence, method name)
+    # tuples which are tried in order; the named method parses the remainder
+    # of the statement. Anything not found here is parsed as a query
+    _statements = {
+        'ALTER':     [(['ALTER'], '_parse_alter_statement')],
+        'AUDIT':     [(['AUDIT'], '_parse_audit_statement')],
+        'BEGIN':     [(['BEGIN'], '_parse_compiled_compound_statement')],
+        'CALL':      [(['CALL'], '_parse_call_statement')],
+        'COMMENT':   [(['COMMENT', 'ON'], '_parse_comment_statement')],
+        'COMMIT':    [(['COMMIT'], '_parse_commit_statement')],
+        'CREATE':    [(['CREATE'], '_parse_create_statement')],
+        'DECLARE':   [
+            (['DECLARE', 'GLOBAL', 'TEMPORARY', 'TABLE'], '_parse_declare_global_temporary_table_statement'),
+            (['DECLARE'], '_parse_declare_cursor_statement'),
+        ],
+        'DELETE':    [(['DELETE'], '_parse_delete_statement')],
+        'DROP':      [(['DROP'], '_parse_drop_statement')],
+        'EXPLAIN':   [(['EXPLAIN'], '_parse_explain_statement')],
+        'FLUSH':     [(['FLUSH', 'OPTIMIZATION', 'PROFILE', 'CACHE'], '_parse_flush_optimization_profile_cache_statement')],
+        'FREE':      [(['FREE', 'LOCATOR'], '_parse_free_locator_statement')],
+        'GRANT':     [(['GRANT'], '_parse_grant_statement')],
+        'INSERT':    [(['INSERT'], '_parse_insert_statement')],
+        'LOCK':      [(['LOCK', 'TABLE'], '_parse_lock_table_statement')],
+        'MERGE':     [(['MERGE'], '_parse_merge_statement')],
+        'REFRESH':   [(['REFRESH', 'TABLE'], '_parse_refresh_table_statement')],
+        'RELEASE':   [(['RELEASE'], '_parse_release_statement')],
+        'RENAME':    [
+            (['RENAME', 'TABLESPACE'], '_parse_rename_tablespace_statement'),
+            (['RENAME'], '_parse_rename_statement'),
+        ],
+        'REVOKE':    [(['REVOKE'], '_parse_revoke_statement')],
+        'ROLLBACK':  [(['ROLLBACK'], '_parse_rollback_statement')],
+        'SAVEPOINT': [(['SAVEPOINT'], '_parse_savepoint_statement')],
+        'SET':       [
+            (['SET', 'INTEGRITY'], '_parse_set_integrity_statement'),
+            (['SET'], '_parse_set_statement'),
+        ],
+        'TRANSFER':  [(['TRANSFER', 'OWNERSHIP'], '_parse_transfer_ownership_statement')],
+        'TRUNCATE':  [(['TRUNCATE'], '_parse_truncate_statement')],
+        'UPDATE':    [(['UPDATE'], '_parse_update_statement')],
+    }
+
+    def _parse_statement(self):
+        """Parses a top-level statement in an SQL script"""
+        # XXX CREATE EVENT MONITOR
+        # If we're reformatting WHITESPACE, add a blank WHITESPACE token to the
+        # output - this will suppress leading whitespace in front of the first
+        # word of the statement
+        self._output.append(Token(TT.WHITESPACE, None, '', 0, 0))
+        # Only KEYWORD and IDENTIFIER tokens have a string value which can be
+        # looked up in the dispatch table (_match_sequence takes care of
+        # rejecting quoted identifiers)
+        token = self._token()
+        if token.type in (TT.KEYWORD, TT.IDENTIFIER):
+            for (templates, method) in self._statements.get(token.value, ()):
+                if self._match_sequence(templates):
+                    getattr(self, method)()
+                    return
+        self._parse_select_statement()
 
     def parse_routine_prototype(self, tokens):
         """Parses a routine prototype"""
@@ -9744,6 +9791,20 @@ class DB2ZOSScriptParser(DB2ZOSParser):
 
     # COMPOUND COMMANDS ######################################################
 
+    # First keywords of all CLP commands parsed by _parse_command. Anything
+    # else can only be an SQL statement
+    _commands = frozenset([
+        'ACTIVATE', 'ATTACH', 'AUTOCONFIGURE', 'BACKUP', 'CATALOG', 'CONNECT',
+        'CREATE', 'DEACTIVATE', 'DETACH', 'DISCONNECT', 'DROP', 'ECHO',
+        'EXPORT', 'FORCE', 'GET', 'IMPORT', 'INITIALIZE', 'INSPECT',
+        'INSTANCE', 'LIST', 'LOAD', 'MIGRATE', 'ON', 'PING', 'PRECOMPILE',
+        'PREP', 'PRUNE', 'PUT', 'QUERY', 'QUIESCE', 'QUIT', 'REBIND',
+        'RECOVER', 'REDISTRIBUTE', 'REFRESH', 'REGISTER', 'REORG', 'REORGCHK',
+        'RESET', 'RESTART', 'RESTORE', 'REWIND', 'ROLLFORWARD', 'RUNSTATS',
+        'SET', 'START', 'STOP', 'TAKEOVER', 'TERMINATE', 'UNCATALOG',
+        'UNQUIESCE', 'UPDATE', 'UPGRADE',
+    ])
+
     def _parse_command(self):
         """Parses a top-level CLP command in a DB2 script"""
         # Ambiguity: Some CLP commands start with the same keywords as SQL
@@ -9755,6 +9816,14 @@ class DB2ZOSScriptParser(DB2ZOSParser):
         # there are two very different and separate parsers, one for CLP which
         # tries to parse a command first, which defers to the secondary SQL
         # parser if it fails.
+        #
+        # Most statements in a script are SQL statements; these are passed
+        # straight to the SQL parser when the first keyword can't begin a CLP
+        # command
+        token = self._token()
+        if token.type not in (TT.KEYWORD, TT.IDENTIFIER) or token.value not in self._commands:
+            self._parse_statement()
+            return
         self._save_state()
         try:
             if self._match('ACTIVATE'):
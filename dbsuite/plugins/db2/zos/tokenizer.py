@@ -23,6 +23,8 @@ from __future__ import (
     division,
     )
 
+import re
+
 from dbsuite.tokenizer import BaseTokenizer, TokenTypes as TT
 
 # Set of valid characters for unquoted identifiers and names in IBM DB2 UDB for
@@ -81,10 +83,8 @@ db2zos_keywords = [
 class DB2ZOSTokenizer(BaseTokenizer):
     """IBM DB2 for z/OS tokenizer class."""
 
-    def __init__(self):
-        super(DB2ZOSTokenizer, self).__init__()
-        self.keywords = set(db2zos_keywords)
-        self.ident_chars = set(db2zos_identchars)
+    keywords = frozenset(db2zos_keywords)
+    ident_chars = frozenset(db2zos_identchars)
 
     def _handle_not(self):
         """Parses characters meaning "NOT" (! and ^) in the source."""
@@ -151,6 +151,14 @@ class DB2ZOSTokenizer(BaseTokenizer):
         else:
             self._handle_ident()
 
+    terminator_re = re.compile(r'^#SET\s+TERMINATOR\s+(\S+)\s*$', re.IGNORECASE)
+    def _terminator_directive(self, comment):
+        # Handle the CLP's "--#SET TERMINATOR c" directive
+        match = self.terminator_re.match(comment)
+        if match:
+            return match.group(1)
+        return None
+
     def _init_jump(self):
         super(DB2ZOSTokenizer, self)._init_jump()
         self._jump['!'] = self._handle_not
@@ -163,3 +171,13 @@ class DB2ZOSTokenizer(BaseTokenizer):
         self._jump['G'] = self._handle_unistring
         self._jump['\xac'] = self._handle_not # Hook character (legacy "not" representation)
 
+    # Hex and graphic string prefixes fall through to _handle_ident when not
+    # followed by a quote, so the regex engine may handle them as identifiers
+    # provided the literal forms are deferred to the jump table
+    _regex_handlers = BaseTokenizer._regex_handlers | frozenset([
+        _handle_hexstring, _handle_unistring,
+        ])
+    _regex_deferred = BaseTokenizer._regex_deferred + [
+        "[xX]'", "[nNgG]'", "[gG][xX]'",
+        ]
+
@@ -639,8 +639,8 @@ class WebSite(object):
             for cls in self.indexes:
                 self.index_maps[cls] = {}
                 self.index_docs[cls] = {}
-            for dbobject in self.database:
-                self.index_object(dbobject, self.indexes)
+                for dbobject in self.database.objects(cls):
+                    self.index_object(dbobject, (cls,))
 
     def create_index_links(self):
         """Utility method for linking letters of indexes together.
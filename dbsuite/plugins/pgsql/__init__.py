@@ -145,10 +145,9 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
         if not self.options['database']:
             self.options['database'] = self.options['username']
 
-    def open(self):
-        """Opens the database connection for data retrieval."""
-        super(InputPlugin, self).open()
-        self.connection = connect(
+    def connect(self):
+        """Opens and returns a new connection to the database."""
+        return connect(
             self.options['database'],
             self.options['username'],
             self.options['password'],
@@ -157,6 +156,11 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             self.options['unix_socket'],
             self.options['ssl']
         )
+
+    def open(self):
+        """Opens the database connection for data retrieval."""
+        super(InputPlugin, self).open()
+        self.connection = self.connect()
         self.name = self.options['database']
 
     def close(self):
@@ -299,7 +303,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 cls.relname                                 AS tabname,
                 own.rolname                                 AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                         AS system,
@@ -329,7 +333,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 NOT cls.relistemp
                 AND cls.relkind = 'r'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield Table(*row)
 
@@ -360,7 +365,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 cls.relname                          AS viewname,
                 own.rolname                          AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                  AS system,
@@ -391,7 +396,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 NOT relistemp
                 AND relkind = 'v'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield View(*row)
 
@@ -462,7 +468,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND t.relkind IN ('r', 'v')
                 AND NOT pg_is_other_temp_schema(nv.oid)
                 AND NOT pg_is_other_temp_schema(nt.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nv.nspname'))
         for row in self.fetch_some(cursor):
             yield RelationDep(*row)
 
@@ -498,7 +505,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 cls.relname                                  AS indname,
                 own.rolname                                  AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                          AS system,
@@ -527,7 +534,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND ind.indisvalid
                 AND ind.indisready
                 AND NOT pg_is_other_temp_schema(tns.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield Index(*row)
 
@@ -577,11 +585,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND ind.indisvalid
                 AND ind.indisready
                 AND NOT pg_is_other_temp_schema(tcl.relnamespace)
+                AND %s
             ORDER BY
                 nsp.nspname,
                 cls.relname,
                 att.attnum
-        """)
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield IndexCol(*row)
 
@@ -687,11 +696,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND att.attnum > 0
                 AND cls.relkind IN ('r', 'v')
                 AND NOT pg_is_other_temp_schema(nsp.oid)
+                AND %s
             ORDER BY
                 nsp.nspname,
                 cls.relname,
                 att.attnum
-        """)
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield RelationCol(*row)
 
@@ -723,7 +733,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 con.conname                               AS keyname,
                 own.rolname                               AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                       AS system,
@@ -745,7 +755,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 cls.relkind = 'r'
                 AND con.contype IN ('p', 'u')
                 AND NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for (
                 schema,
                 name,
@@ -807,12 +818,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND cls.relkind = 'r'
                 AND con.contype IN ('p', 'u')
                 AND NOT pg_is_other_temp_schema(nsp.oid)
+                AND %s
             ORDER BY
                 nsp.nspname,
                 cls.relname,
                 con.conname,
                 con.i
-        """)
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield UniqueKeyCol(*row)
 
@@ -858,7 +870,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 con.conname                               AS keyname,
                 own.rolname                               AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                       AS system,
@@ -891,7 +903,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND con.contype = 'f'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
                 AND NOT pg_is_other_temp_schema(rnsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield ForeignKey(*row)
 
@@ -947,12 +960,13 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND con.contype = 'f'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
                 AND NOT pg_is_other_temp_schema(rnsp.oid)
+                AND %s
             ORDER BY
                 nsp.nspname,
                 cls.relname,
                 con.conname,
                 con.i
-        """)
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield ForeignKeyCol(*row)
 
@@ -984,7 +998,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 con.conname                               AS checkname,
                 own.rolname                               AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                       AS system,
@@ -1005,7 +1019,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 cls.relkind = 'r'
                 AND con.contype = 'c'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield Check(*row)
 
@@ -1049,7 +1064,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 AND cls.relkind = 'r'
                 AND con.contype = 'c'
                 AND NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield CheckCol(*row)
 
@@ -1094,7 +1110,7 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 pro.proname                         AS funcname,
                 own.rolname                         AS owner,
                 CASE
-                    WHEN nsp.nspname LIKE 'pg_%' THEN true
+                    WHEN nsp.nspname LIKE 'pg_%%' THEN true
                     WHEN nsp.nspname = 'information_schema' THEN true
                     ELSE false
                 END                                 AS system,
@@ -1130,7 +1146,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     ON pro.proowner = own.oid
             WHERE
                 NOT pg_is_other_temp_schema(nsp.oid)
-        """)
+                AND %s
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield Function(*row)
 
@@ -1262,11 +1279,12 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                     ON db.datname = current_database()
             WHERE
                 NOT pg_is_other_temp_schema(nsp.oid)
+                AND %s
             ORDER BY
                 nsp.nspname,
                 pro.proname || pro.oid,
                 pro.i
-        """)
+        """ % self.schema_filter('nsp.nspname'))
         for row in self.fetch_some(cursor):
             yield RoutineParam(*row)
         # XXX Need to deal with "return" parameters, in particular how a
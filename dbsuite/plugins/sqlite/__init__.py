@@ -27,6 +27,7 @@ from __future__ import (
 
 import logging
 import re
+import hashlib
 
 import dbsuite.plugins
 from dbsuite.plugins.db2 import (
@@ -76,10 +77,14 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
         if not self.options['database']:
             raise dbsuite.plugins.PluginConfigurationError('The database option must be specified')
 
+    def connect(self):
+        """Opens and returns a new connection to the database."""
+        return connect(self.options['database'])
+
     def open(self):
         """Opens the database connection for data retrieval."""
         super(InputPlugin, self).open()
-        self.connection = connect(self.options['database'])
+        self.connection = self.connect()
         self.name = self.options['database']
 
     def close(self):
@@ -107,6 +112,23 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
             yield row
         yield Schema('', '', False, None, 'SQLite has no concept of schemas - this is a placeholder')
 
+    def get_signatures(self):
+        """Retrieves a signature of the objects in each schema.
+
+        SQLite has a single (placeholder) schema, the signature of which is a
+        digest of the definitions of everything in sqlite_master.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT type, name, tbl_name, sql
+            FROM sqlite_master
+            ORDER BY type, name
+        """)
+        digest = hashlib.sha1()
+        for row in self.fetch_some(cursor):
+            digest.update(repr(row).encode('utf-8'))
+        return {'': digest.hexdigest()}
+
     def get_datatypes(self):
         """Retrieves the details of datatypes stored in the database.
 
@@ -155,6 +177,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
         """
         for row in super(InputPlugin, self).get_tables():
             yield row
+        # SQLite has no schemas, but filtering the placeholder schema still
+        # means patterns which exclude it don't retrieve any rows
         cursor = self.connection.cursor()
         cursor.execute("""
             SELECT
@@ -172,7 +196,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 sqlite_master
             WHERE
                 type = 'table'
-        """)
+                AND %s
+        """ % self.schema_filter("''"))
         for row in self.fetch_some(cursor):
             yield Table(*row)
 
@@ -211,7 +236,8 @@ class InputPlugin(dbsuite.plugins.InputPlugin):
                 sqlite_master
             WHERE
                 type = 'view'
-        """)
+                AND %s
+        """ % self.schema_filter("''"))
         for row in self.fetch_some(cursor):
             yield View(*row)
 
@@ -25,6 +25,7 @@ dialects of SQL, and their particular oddities.
 A number of classes which tokenize specific SQL dialects are derived from the
 base SQLTokenizer class. Currently the following classes are defined:
 
+TokenBuffer      -- Compact list-like store of tokens
 BaseTokenizer    -- Base tokenizer class
 SQL92Tokenizer   -- ANSI SQL-92
 SQL99Tokenizer   -- ANSI SQL-99
@@ -38,6 +39,9 @@ from __future__ import (
     division,
     )
 
+import re
+from array import array
+from bisect import bisect_right
 from decimal import Decimal
 from collections import namedtuple
 
@@ -54,6 +58,7 @@ __all__ = [
     'Error',
     'TokenError',
     'Token',
+    'TokenBuffer',
     'TokenTypes',
     'BaseTokenizer',
     'SQL92Tokenizer',
@@ -319,6 +324,127 @@ Token = namedtuple('Token', (
     ))
 
 
+class TokenBuffer(object):
+    """Compact, list-like store of the tokens parsed from a single source.
+
+    Instead of a tuple per token (each with its own slice of the source, and
+    line and column numbers), a TokenBuffer keeps the type of each token in an
+    array of bytes, and the start and end offsets of each token in arrays of
+    integers indexing the source string. Values are only stored for tokens
+    where they differ from the default, which is None for WHITESPACE tokens
+    and the source of the token for everything else. Line and column numbers
+    are derived when required by bisecting an index of line starts.
+
+    Indexing or iterating over the buffer produces Token tuples, so a
+    TokenBuffer can be used anywhere a list of tokens is expected. The source
+    of the tokens must be contiguous, beginning at offset zero.
+    """
+
+    def __init__(self, source):
+        super(TokenBuffer, self).__init__()
+        self.source = source
+        self._types = array(str('B'))
+        self._starts = array(str('L'))
+        self._ends = array(str('L'))
+        self._values = {}
+        self._line_starts = None
+        self._last = (-1, None)
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Constructs a buffer from a sequence of Token tuples.
+
+        The source of the buffer is the concatenated source of all tokens.
+        Line and column positions in the tokens are ignored (they are derived
+        from the source instead).
+        """
+        tokens = list(tokens)
+        result = cls(''.join(token.source for token in tokens))
+        offset = 0
+        for token in tokens:
+            end = offset + len(token.source)
+            result.append(token.type, token.value, offset, end)
+            offset = end
+        return result
+
+    def append(self, type, value, start, end):
+        """Appends a token spanning source[start:end] to the buffer."""
+        i = len(self._types)
+        self._types.append(type)
+        self._starts.append(start)
+        self._ends.append(end)
+        if type == TT.WHITESPACE:
+            if value is not None:
+                self._values[i] = value
+        elif value != self.source[start:end]:
+            self._values[i] = value
+        self._last = (-1, None)
+
+    def position(self, offset):
+        """Returns the 1-based (line, column) of the specified source offset."""
+        if self._line_starts is None:
+            self._line_starts = array(str('L'), [0])
+            self._line_starts.extend(
+                m.end() for m in re.finditer(r'\r\n?|\n', self.source))
+        line = bisect_right(self._line_starts, offset)
+        return (line, int(offset - self._line_starts[line - 1] + 1))
+
+    def _token(self, i):
+        type = self._types[i]
+        start = self._starts[i]
+        source = self.source[start:self._ends[i]]
+        try:
+            value = self._values[i]
+        except KeyError:
+            value = None if type == TT.WHITESPACE else source
+        return Token(type, value, source, *self.position(start))
+
+    def __len__(self):
+        return len(self._types)
+
+    def __iter__(self):
+        for i in xrange(len(self._types)):
+            yield self._token(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._token(i) for i in xrange(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self._types)
+        # Parsers repeatedly examine the same token; cache the last one
+        # constructed
+        if self._last[0] == index:
+            return self._last[1]
+        if not 0 <= index < len(self._types):
+            raise IndexError('TokenBuffer index out of range')
+        result = self._token(index)
+        self._last = (index, result)
+        return result
+
+    def __delitem__(self, index):
+        # Only truncation is supported (as used by the state stacks of the
+        # tokenizer and parser)
+        if not isinstance(index, slice) or index.step is not None or (
+                index.stop is not None and index.stop < len(self)):
+            raise TypeError('TokenBuffer only supports truncation')
+        start = index.indices(len(self))[0]
+        for i in xrange(start, len(self._types)):
+            self._values.pop(i, None)
+        del self._types[start:]
+        del self._starts[start:]
+        del self._ends[start:]
+        self._last = (-1, None)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'TokenBuffer(%r)' % list(self)
+
+
 class BaseTokenizer(object):
     """Base SQL tokenizer class.
 
@@ -331,7 +457,9 @@ class BaseTokenizer(object):
     though they may be of use in other situations):
 
     keywords       The set of words that are to be treated as reserved
-                   keywords.
+                   keywords. The default (like that of ident_chars) is a
+                   frozenset shared by all instances of the class; assign a new
+                   set to customize it.
     ident_chars    The set of characters that can appear in an unquoted
                    identifier. Note that the parser automatically excludes
                    numerals from this set for the initial character of an
@@ -348,11 +476,21 @@ class BaseTokenizer(object):
     raise_errors   If True (the default), errors encountered during parsing
                    will be raised as TokenError exceptions. If False, errors
                    will be returned as ERROR tokens and parsing will continue.
+    engine         Selects the scanner used by parse(). If "jump" (the default)
+                   the source is scanned a character at a time with the jump
+                   table. If "regex", common tokens are recognized by a single
+                   compiled regular expression and only unusual constructs are
+                   passed to the jump table. Both engines produce identical
+                   output.
+    compact        If True, parse() returns a TokenBuffer instead of a list of
+                   Token tuples, which uses considerably less memory with
+                   large scripts. Defaults to False.
     """
 
+    keywords = frozenset(sql92_keywords)
+    ident_chars = frozenset(sql92_identchars)
+
     def __init__(self):
-        self.keywords = set(sql92_keywords)
-        self.ident_chars = set(sql92_identchars)
         self.space_chars = ' \t\r\n'
         self.sql_comments = True
         self.c_comments = False
@@ -360,12 +498,14 @@ class BaseTokenizer(object):
         self.cpp_comments = False
         self.multiline_str = True
         self.raise_errors = True
+        self.engine = 'jump'
+        self.compact = False
 
     def parse(self, sql, terminator=';', line_split=False):
         """Parses the provided source into a list of token tuples.
 
-        This is the only public method of the tokenizer class, called to
-        tokenize the provided source.  The method returns a list of 5-element
+        This is the main public method of the tokenizer class, called to
+        tokenize the provided source (see also parse_iter()). The method returns a list of 5-element
         tuples with the following structure:
 
             (type, value, source, line, column)
@@ -417,8 +557,302 @@ class BaseTokenizer(object):
         with column 1 (useful when performing per-line processing on the
         result).
         """
+        self._init_state(sql, terminator, self.compact)
+        self._scan()
+        if line_split:
+            if self.compact:
+                self._tokens = TokenBuffer.from_tokens(self._split_lines(self._tokens))
+            else:
+                self._tokens = list(self._split_lines(self._tokens))
+        return self._tokens
+
+    def parse_iter(self, fileobj, terminator=';', line_split=False,
+            chunk_size=65536):
+        """Parses source read from a file-like object, yielding token tuples.
+
+        This is a generator version of parse(). Instead of a string, it
+        accepts a file-like object (anything with a read() method) which is
+        read in chunks of chunk_size characters. Tokens are yielded as soon as
+        they are known to be complete, and state (open strings and comments,
+        the current terminator, line positions, etc.) is carried across chunk
+        boundaries. Only the unconsumed portion of the source is retained, so
+        memory use depends on the largest token rather than the size of the
+        source.
+
+        The terminator and line_split parameters, and the tokens yielded, are
+        exactly as for parse() (the compact option is ignored). If
+        raise_errors is True, TokenError is raised when an ERROR token would be
+        yielded.
+        """
+        raise_errors = self.raise_errors
+        self._init_state('', terminator, False)
+        # Errors are only raised once it's certain the erroneous token isn't
+        # an artifact of the chunk boundary (e.g. an "unterminated" string)
+        self.raise_errors = False
+        try:
+            buffer_line = buffer_column = 1
+            read_size = chunk_size
+            eof = False
+            while True:
+                if not eof:
+                    data = fileobj.read(read_size)
+                    if data:
+                        self._trim_source()
+                        buffer_line = self._token_line
+                        buffer_column = self._token_column
+                        self._source += data
+                    else:
+                        eof = True
+                if eof:
+                    self._scan()
+                else:
+                    # Handlers may look a few characters beyond the end of the
+                    # token they parse; anything within this margin of the end
+                    # of the buffer must be re-parsed once more data is read
+                    start = self._index
+                    self._scan(len(self._source) - len(self._terminator) - 8)
+                    # If a single token is larger than the buffer, increase the
+                    # read size to avoid rescanning it repeatedly
+                    if self._index == start:
+                        read_size = max(read_size, len(self._source))
+                    else:
+                        read_size = chunk_size
+                for token in self._tokens:
+                    if raise_errors and token.type == TT.ERROR:
+                        raise TokenError(
+                            '\n' * (buffer_line - 1) +
+                            ' ' * (buffer_column - 1) +
+                            self._source, token, token.value)
+                if line_split:
+                    for token in self._split_lines(self._tokens):
+                        yield token
+                else:
+                    for token in self._tokens:
+                        yield token
+                del self._tokens[:]
+                if eof or self._char == '\0' and self._index < len(self._source):
+                    break
+        finally:
+            self.raise_errors = raise_errors
+
+    def split(self, sql, terminator=';', terminators=False):
+        """Splits the provided source into statements, yielding their spans.
+
+        This is a much faster alternative to parse() for callers which only
+        need to know where statements begin and end. The method only
+        understands strings, quoted identifiers, comments (according to the
+        options of the tokenizer), the statement terminator, and changes to
+        the terminator made by comments (see _terminator_directive()). It
+        yields (start, end) tuples of offsets in sql; each statement includes
+        its terminator and any whitespace or comments preceding it. Together
+        the spans cover the entire source (hence the last may contain no
+        statement at all). If terminators is True, (start, end, terminator)
+        tuples are yielded instead, where terminator is the statement
+        terminator in effect at the start of the span.
+        """
+        quoted = re.compile(r'[^"\r\n]*(?:""[^"\r\n]*)*"')
+        if self.multiline_str:
+            string = re.compile(r"[^']*(?:''[^']*)*'")
+        else:
+            string = re.compile(r"[^'\r\n]*(?:''[^'\r\n]*)*'")
+        line_end = re.compile(r'[^\r\n]*')
+        line_break = re.compile(r'[\r\n]')
+        nested = re.compile(r'/\*|\*/')
+        start = pos = 0
+        length = len(sql)
+        initial = terminator
+        if terminators:
+            span = lambda start, end: (start, end, initial)
+        else:
+            span = lambda start, end: (start, end)
+        while True:
+            # The terminator is tried first as the tokenizer's terminator
+            # handler takes precedence over any other handler
+            search = re.compile('|'.join(
+                [re.escape(terminator), "'", '"'] +
+                (['--'] if self.sql_comments else []) +
+                ([r'/\*'] if self.c_comments else []) +
+                (['//'] if self.cpp_comments else [])
+                )).search
+            check_ident = terminator[0] in self.ident_chars
+            statement = None if check_ident else self._split_regex(terminator)
+            while True:
+                # Attempt to match an entire statement in one go; if this
+                # fails (due to something unusual like a nested comment or a
+                # terminator directive), process the remainder of the
+                # statement a construct at a time
+                if statement and pos == start:
+                    m = statement(sql, pos)
+                    if m:
+                        pos = m.end()
+                        yield span(start, pos)
+                        start = pos
+                        initial = terminator
+                        continue
+                m = search(sql, pos)
+                if not m:
+                    if start < length:
+                        yield span(start, length)
+                    return
+                pos = m.end()
+                found = m.group()
+                if found == terminator:
+                    if check_ident and not self._split_terminates(sql, start, m.start(), terminator):
+                        continue
+                    yield span(start, pos)
+                    start = pos
+                    initial = terminator
+                elif found == "'" or found == '"':
+                    m = (string if found == "'" else quoted).match(sql, pos)
+                    if m:
+                        pos = m.end()
+                    elif found == "'" and self.multiline_str:
+                        pos = length
+                    else:
+                        # An illegal line break in a string is an error, after
+                        # which the tokenizer continues from the line break
+                        m = line_break.search(sql, pos)
+                        pos = m.start() if m else length
+                elif found == '/*':
+                    if self.c_comments_nested:
+                        depth = 1
+                        while depth:
+                            m = nested.search(sql, pos)
+                            if not m:
+                                pos = length
+                                break
+                            pos = m.end()
+                            depth += 1 if m.group() == '/*' else -1
+                    else:
+                        pos = sql.find('*/', pos)
+                        pos = length if pos < 0 else pos + 2
+                else:
+                    pos = line_end.match(sql, pos).end()
+                    if found == '--':
+                        directive = self._terminator_directive(sql[m.end():pos])
+                        if directive:
+                            terminator = directive
+                            break
+
+    def _split_terminates(self, sql, start, index, terminator):
+        """Returns True if the terminator at sql[index] ends a statement.
+
+        Used by split() when the terminator begins with a character which can
+        appear in an unquoted identifier, in which case the terminator may
+        instead be consumed by a preceding identifier, number or parameter.
+        The rules for which of these the tokenizer produces are involved (and
+        vary by dialect), so the token preceding the terminator is simply
+        tokenized to find out. The start parameter is the start of the
+        statement, before which the scan for that token never looks.
+        """
+        chars = self.ident_chars | set(':')
+        if index == start or sql[index - 1] not in chars:
+            return True
+        # Only identifiers, numbers and parameters can consume the terminator.
+        # Any character which cannot be part of one of these ends (or is) a
+        # prior token, so tokenizing begins after it, and the tokens involved
+        # end by the first character after the terminator which is neither an
+        # identifier character nor a colon
+        first = index - 1
+        while first > start and (sql[first - 1] in chars or sql[first - 1] == '.'):
+            first -= 1
+        last = index + len(terminator)
+        while last < len(sql) and sql[last] in chars:
+            last += 1
+        raise_errors = self.raise_errors
+        self.raise_errors = False
+        try:
+            self._init_state(sql[first:last + 1], terminator, False)
+            self._scan()
+            tokens = self._tokens
+        finally:
+            self.raise_errors = raise_errors
+        offset = first
+        for token in tokens:
+            if offset == index:
+                return token.type == TT.TERMINATOR
+            offset += len(token.source)
+            if offset > index:
+                return False
+        return True
+
+    def _split_regex(self, terminator):
+        """Returns a regex match method which matches an entire statement.
+
+        Used by split() to skip over ordinary statements at the speed of the
+        regex engine. The expression does not match statements containing
+        anything which requires special handling (nested comments, terminator
+        directives, errors, etc.), and None is returned if the terminator
+        begins with a character that could introduce one of these.
+        """
+        starts = set("'\"")
+        if self.sql_comments:
+            starts.add('-')
+        if self.c_comments or self.cpp_comments:
+            starts.add('/')
+        if terminator[0] in starts:
+            return None
+        # Runs of ordinary characters are matched "atomically" (emulated with
+        # a capturing lookahead) to prevent catastrophic backtracking when the
+        # final statement has no terminator. Line comments must likewise run
+        # to the end of the line, otherwise backtracking could end a statement
+        # at a terminator within a comment
+        items = [r'(?=([^%s]+))\1' % re.escape(''.join(sorted(starts | set(terminator[0]))))]
+        if self.multiline_str:
+            items.append(r"'[^']*(?:''[^']*)*'")
+        else:
+            items.append(r"'[^'\r\n]*(?:''[^'\r\n]*)*'")
+        items.append(r'"[^"\r\n]*(?:""[^"\r\n]*)*"')
+        if self.sql_comments:
+            items.append(r'--(?!#)[^\r\n]*(?![^\r\n])')
+            items.append(r'-(?!-)')
+        if self.c_comments:
+            if self.c_comments_nested:
+                items.append(r'/\*(?:[^*/]|\*(?!/)|/(?!\*))*\*/')
+            else:
+                items.append(r'/\*(?:[^*]|\*(?!/))*\*/')
+        if '/' in starts:
+            items.append('/(?!%s)' % '|'.join(
+                ([r'\*'] if self.c_comments else []) +
+                (['/'] if self.cpp_comments else [])))
+        if len(terminator) > 1:
+            items.append('%s(?!%s)' % (re.escape(terminator[0]), re.escape(terminator[1:])))
+        return re.compile('(?:%s)*%s' % ('|'.join(items), re.escape(terminator))).match
+
+    def parse_statements(self, sql, terminator=';', line_split=False):
+        """Parses the provided source, yielding a list of tokens per statement.
+
+        The source is divided into statements with split() and each is
+        tokenized individually, so that statements can be processed (for
+        instance, parsed and formatted) one at a time. The terminator and
+        line_split parameters are as for parse(), and token positions are
+        relative to the start of sql. Changes to the terminator made within a
+        statement are carried forward to subsequent statements.
+        """
+        line = 1
+        line_start = 0
+        for (start, end) in self.split(sql, terminator):
+            text = sql[start:end]
+            self._init_state(text, terminator, False)
+            self._line = line
+            self._line_start = line_start - start
+            self._token_line = self.line
+            self._token_column = self.column
+            self._scan()
+            terminator = self.terminator
+            if line_split:
+                yield list(self._split_lines(self._tokens))
+            else:
+                yield self._tokens
+            breaks = text.count('\n') + text.count('\r') - text.count('\r\n')
+            if breaks:
+                line += breaks
+                line_start = start + max(text.rfind('\n'), text.rfind('\r')) + 1
+
+    def _init_state(self, source, terminator, compact):
+        """Resets the internal state of the tokenizer to parse source."""
         self._states = []
-        self._source = sql
+        self._source = source
         self._index = 0
         self._marked_index = -1
         self._line = 1
@@ -426,47 +860,116 @@ class BaseTokenizer(object):
         self._token_start = 0
         self._token_line = self.line
         self._token_column = self.column
-        self._tokens = []
-        self._init_jump()
+        self._compact = compact
+        if compact:
+            self._tokens = TokenBuffer(source)
+        else:
+            self._tokens = []
+        # Jump tables depend only on the class and the characters options, so
+        # they are built once and shared by all instances (see _jump_tables)
+        key = (self.__class__, frozenset(self.ident_chars), self.space_chars)
+        try:
+            self._jump_tables = _jump_cache[key]
+        except KeyError:
+            self._jump_tables = _jump_cache[key] = self._build_jump_tables()
         # Note that setting terminator must be done AFTER initializing the jump
-        # table as doing so re-writes elements within that table. The
-        # terminator is not handled within _init_jump as some dialects may
+        # table as doing so selects a table with the terminator patched in.
+        # The terminator is not handled within _init_jump as some dialects may
         # permit changes to the terminator in the middle of a script.
         # Descendents of this class wishing to implement such behaviour simply
         # need to set the terminator property during tokenizing.
         self._terminator = None
         self._saved_handler = None
         self.terminator = terminator
-        # Loop over the sql using the jump table to parse characters (note:
-        # Python strings aren't null terminated; the _char property simply
-        # returns a null character when _index moves beyond the end of the
-        # string)
-        while self._char != '\0':
-            self._jump.get(self._char, self._handle_default)()
-        # If line_split is True, split up any tokens that cross line breaks
-        # (much easier to do it here than in the tokenizer itself)
-        if line_split:
-            result = []
-            for token in self._tokens:
-                (type, value, source, line, column) = token
-                while '\n' in source:
-                    if isinstance(value, basestring) and '\n' in value:
-                        i = value.index('\n') + 1
-                        newvalue, value = value[:i], value[i:]
-                    else:
-                        newvalue = value
-                    i = source.index('\n') + 1
-                    newsource, source = source[:i], source[i:]
-                    result.append(Token(type, newvalue, newsource, line, column))
-                    line += 1
-                    column = 1
-                if source or type not in (TT.WHITESPACE, TT.COMMENT):
-                    result.append(Token(type, value, source, line, column))
-            self._tokens = result
-        return self._tokens
+        if self.engine == 'regex':
+            self._init_regex()
+        elif self.engine != 'jump':
+            raise ValueError('Unknown tokenizer engine "%s"' % self.engine)
+
+    def _trim_source(self):
+        """Discards the portion of the source preceding the current token.
+
+        Used by parse_iter() to release source which has already been
+        tokenized before appending another chunk. All positions held in the
+        internal state are adjusted accordingly.
+        """
+        offset = self._token_start
+        if offset:
+            self._source = self._source[offset:]
+            self._index -= offset
+            self._line_start -= offset
+            self._token_start = 0
+            self._marked_index = -1
+
+    def _scan(self, limit=None):
+        """Tokenizes the source with the selected engine.
+
+        If limit is None, the entire source is tokenized. Otherwise, tokens are
+        only parsed while the current position is before limit, and any token
+        which extends beyond limit is discarded (leaving the position at its
+        start) as it may be incomplete.
+        """
+        if self.engine == 'regex':
+            self._scan_regex(limit)
+        else:
+            self._scan_jump(limit)
+
+    def _split_lines(self, tokens):
+        """Splits tokens that cross line breaks (see the line_split option)."""
+        # Much easier to do it here than in the tokenizer itself. Lone CRs are
+        # line breaks here just as they are when the tokenizer (and
+        # TokenBuffer) count lines
+        line_break = re.compile(r'\r\n?|\n')
+        for token in tokens:
+            (type, value, source, line, column) = token
+            while True:
+                match = line_break.search(source)
+                if not match:
+                    break
+                if isinstance(value, basestring):
+                    value_match = line_break.search(value)
+                else:
+                    value_match = None
+                if value_match:
+                    i = value_match.end()
+                    newvalue, value = value[:i], value[i:]
+                else:
+                    newvalue = value
+                i = match.end()
+                newsource, source = source[:i], source[i:]
+                yield Token(type, newvalue, newsource, line, column)
+                line += 1
+                column = 1
+            if source or type not in (TT.WHITESPACE, TT.COMMENT):
+                yield Token(type, value, source, line, column)
+
+    def _build_jump_tables(self):
+        """Constructs the jump tables shared by all instances of the class.
+
+        Calls _init_jump() to construct the dictionary of character handlers,
+        then converts the bound methods it contains to plain functions so the
+        result can be shared by all instances with the same options. Handlers
+        are therefore called with the instance as their sole argument.
+
+        The result is a dictionary mapping None to the unpatched table, and
+        the first character of each statement terminator in use to a copy of
+        the table with that character mapped to _handle_terminator. The
+        copies are constructed on demand by _set_terminator().
+        """
+        self._init_jump()
+        jump = dict(
+            (char, handler.__func__)
+            for (char, handler) in self._jump.iteritems()
+            )
+        return {None: jump}
 
     def _init_jump(self):
-        """Initializes a dictionary of character handlers."""
+        """Initializes a dictionary of character handlers.
+
+        Note that this is only called once per class and set of options (see
+        _build_jump_tables()), hence descendents which override this to add
+        handlers must only install methods of the class.
+        """
         self._jump = {}
         for char in self.space_chars:
             self._jump[char] = self._handle_space
@@ -499,6 +1002,107 @@ class BaseTokenizer(object):
             ';': self._handle_semicolon,
             })
 
+    def _init_regex(self):
+        """Initializes the compiled regular expression used by _scan_regex().
+
+        The expression is an alternation of named groups, one for each kind of
+        token that _scan_regex() can construct without consulting the jump
+        table (see _regex_patterns()). As the expression depends only on the
+        class and its options, compiled expressions are cached and shared by
+        all instances of a dialect.
+        """
+        key = (
+            self.__class__,
+            frozenset(self.ident_chars),
+            self.space_chars,
+            self.sql_comments,
+            self.c_comments,
+            self.c_comments_nested,
+            self.cpp_comments,
+            self.multiline_str,
+            )
+        try:
+            self._regex = _regex_cache[key]
+        except KeyError:
+            self._regex = _regex_cache[key] = re.compile(
+                '|'.join(self._regex_patterns()))
+
+    def _regex_patterns(self):
+        """Returns the list of named patterns combined by _init_regex().
+
+        Each pattern reproduces exactly what the corresponding handler in the
+        jump table would produce. Anything not matched by these patterns (error
+        conditions, exponents, nested comments and so on) is left to the jump
+        table. The "defer" group matches the prefixes of dialect specific
+        constructs (listed in _regex_deferred) and forces them to be handed to
+        the jump table too.
+        """
+        def charset(chars):
+            return '[%s]' % ''.join(re.escape(c) for c in sorted(chars))
+        newline = r'(?:\r\n?|\n)'
+        result = []
+        if self._regex_deferred:
+            result.append('(?P<defer>%s)' % '|'.join(self._regex_deferred))
+        spaces = set(self.space_chars) - set('\r\n')
+        if '\n' in self.space_chars:
+            if spaces:
+                result.append('(?P<space>%s+%s?|%s)' % (charset(spaces), newline, newline))
+            else:
+                result.append('(?P<space>%s)' % newline)
+        elif spaces:
+            result.append('(?P<space>%s+)' % charset(spaces))
+        result.append('(?P<ident>%s%s*:?)' % (
+            charset(set(self.ident_chars) - set('0123456789')),
+            charset(self.ident_chars)))
+        result.append(r'(?P<number>[0-9]+(?![0-9.Ee]))')
+        result.append(r'(?P<decimal>[0-9]+\.[0-9]*(?![0-9Ee]))')
+        if self.multiline_str:
+            result.append(r"(?P<string>'(?:[^'\0]|'')*'(?!'))")
+        else:
+            result.append(r"(?P<string>'(?:[^'\r\n\0]|'')*'(?!'))")
+        result.append(r'(?P<quoted>"(?:[^"\r\n\0]|"")*"(?!"):?)')
+        if self.sql_comments:
+            result.append(r'(?P<comment>--[^\r\n\0]*%s?)' % newline)
+        if self.c_comments:
+            if self.c_comments_nested:
+                result.append(r'(?P<ccomment>/\*(?:[^*/\0]|\*(?!/)|/(?!\*))*\*/)')
+            else:
+                result.append(r'(?P<ccomment>/\*(?:[^*\0]|\*(?!/))*\*/)')
+        result.append(r'(?P<operator><>|<=|>=|\|\||[(),+*<>=]|\.(?![0-9])|-%s|/%s%s)' % (
+            '(?!-)' if self.sql_comments else '',
+            r'(?!\*)' if self.c_comments else '',
+            '(?!/)' if self.cpp_comments else ''))
+        result.append(r'(?P<qmark>\?)')
+        result.append(r'(?P<semicolon>;)')
+        return result
+
+    def _regex_chars(self):
+        """Returns the set of characters which _scan_regex() may handle itself.
+
+        A character is only handled by the regex engine if the jump table
+        dispatches it to a handler listed in _regex_handlers, i.e. one whose
+        behaviour the patterns in _regex_patterns() reproduce. This excludes
+        the statement terminator and any handlers overridden by a dialect.
+        """
+        key = ('regex', self._terminator[0])
+        try:
+            return self._jump_tables[key]
+        except KeyError:
+            pass
+        handlers = self._regex_handlers
+        result = set(
+            char for (char, handler) in self._jump.iteritems()
+            if handler in handlers
+            )
+        # The _char property reports CR as LF, so CR is dispatched to whatever
+        # handles LF
+        if '\n' in result:
+            result.add('\r')
+        else:
+            result.discard('\r')
+        result = self._jump_tables[key] = frozenset(result)
+        return result
+
     def _add_token(self, type, value):
         """Adds the current token to the output list.
 
@@ -509,20 +1113,144 @@ class BaseTokenizer(object):
         type and value parameters specify the type and value (first and second
         elements of the token) respectively.
         """
-        token = Token(
-            type,
-            value,
-            self._source[self._token_start:self._index],
-            self._token_line,
-            self._token_column,
-            )
-        if type == TT.ERROR and self.raise_errors:
-            raise TokenError(self._source, token, value)
-        self._tokens.append(token)
+        if self._compact:
+            if type == TT.ERROR and self.raise_errors:
+                raise TokenError(self._source, Token(
+                    type,
+                    value,
+                    self._source[self._token_start:self._index],
+                    self._token_line,
+                    self._token_column,
+                    ), value)
+            self._tokens.append(type, value, self._token_start, self._index)
+        else:
+            token = Token(
+                type,
+                value,
+                self._source[self._token_start:self._index],
+                self._token_line,
+                self._token_column,
+                )
+            if type == TT.ERROR and self.raise_errors:
+                raise TokenError(self._source, token, value)
+            self._tokens.append(token)
         self._token_start = self._index
         self._token_line = self.line
         self._token_column = self.column
 
+    def _scan_jump(self, limit=None):
+        """Scans the source a character at a time using the jump table.
+
+        This is the main loop of the "jump" engine. See _scan() for the
+        meaning of limit.
+        """
+        # Note: Python strings aren't null terminated; the _char property
+        # simply returns a null character when _index moves beyond the end of
+        # the string
+        default = self.__class__._handle_default
+        if limit is None:
+            while self._char != '\0':
+                self._jump.get(self._char, default)(self)
+        else:
+            while self._index < limit and self._char != '\0':
+                self._save_state()
+                self._jump.get(self._char, default)(self)
+                if self._index > limit:
+                    self._restore_state()
+                    break
+                self._forget_state()
+
+    def _scan_regex(self, limit=None):
+        """Scans the source with the compiled regex initialized by _init_regex().
+
+        This is the main loop of the "regex" engine. At each position, if the
+        current character may be handled by the regex (see _regex_chars()) and
+        the regex matches, a token is constructed from the match directly.
+        Otherwise the jump table is used to parse the token. Both paths
+        maintain the same internal state (_index, _line, etc.) so they can be
+        freely interleaved. See _scan() for the meaning of limit.
+        """
+        source = self._source
+        match = self._regex.match
+        default = self.__class__._handle_default
+        terminator = None
+        while True:
+            # Handlers called via the jump table may change the terminator
+            # (which changes the jump table)
+            if self._terminator is not terminator:
+                terminator = self._terminator
+                chars = self._regex_chars()
+            start = self._index
+            try:
+                char = source[start]
+            except IndexError:
+                break
+            if char == '\0':
+                break
+            if limit is not None:
+                if start >= limit:
+                    break
+                self._save_state()
+            m = match(source, start) if char in chars else None
+            if m is None or m.lastgroup == 'defer':
+                self._jump.get(self._char, default)(self)
+            else:
+                self._add_match(m)
+            if limit is not None:
+                if self._index > limit:
+                    self._restore_state()
+                    break
+                self._forget_state()
+
+    def _add_match(self, m):
+        """Adds the token matched by the regex engine to the output list."""
+        start = self._index
+        kind = m.lastgroup
+        text = m.group()
+        self._index = m.end()
+        if kind in ('space', 'comment', 'ccomment', 'string'):
+            breaks = text.count('\n') + text.count('\r') - text.count('\r\n')
+            if breaks:
+                self._line += breaks
+                self._line_start = start + max(text.rfind('\n'), text.rfind('\r')) + 1
+                # Values of multi-line tokens report all line breaks as LF
+                # (see _marked_chars)
+                if '\r' in text:
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+        if kind == 'space':
+            self._add_token(TT.WHITESPACE, None)
+        elif kind == 'ident':
+            if text[-1] == ':':
+                self._add_token(TT.LABEL, text[:-1].upper())
+            else:
+                self._add_token(*self._classify_ident(text.upper()))
+        elif kind == 'operator':
+            self._add_token(TT.OPERATOR, text)
+        elif kind == 'number':
+            self._add_token(TT.NUMBER, long(text))
+        elif kind == 'decimal':
+            self._add_token(TT.NUMBER, Decimal(text))
+        elif kind == 'string':
+            self._add_token(TT.STRING, text[1:-1].replace("''", "'"))
+        elif kind == 'quoted':
+            if text[-1] == ':':
+                self._add_token(TT.LABEL, text[1:-2].replace('""', '"'))
+            else:
+                self._add_token(TT.IDENTIFIER, text[1:-1].replace('""', '"'))
+        elif kind == 'comment':
+            self._add_token(TT.COMMENT, text[2:].rstrip('\n'))
+            terminator = self._terminator_directive(text[2:].rstrip('\n'))
+            if terminator:
+                self.terminator = terminator
+        elif kind == 'ccomment':
+            self._add_token(TT.COMMENT, text[2:-2])
+        elif kind == 'qmark':
+            self._add_token(TT.PARAMETER, None)
+        elif kind == 'semicolon':
+            self._add_token(TT.TERMINATOR, ';')
+        else:
+            assert False, 'Unknown regex group %s' % kind
+
     def _save_state(self):
         """Saves the current state of the tokenizer on a stack for later retrieval."""
         self._states.append((
@@ -533,6 +1261,7 @@ class BaseTokenizer(object):
             self._token_line,
             self._token_column,
             len(self._tokens),
+            self._terminator,
             ))
 
     def _restore_state(self):
@@ -543,9 +1272,12 @@ class BaseTokenizer(object):
             self._token_start,
             self._token_line,
             self._token_column,
-            tokens_len
+            tokens_len,
+            terminator
         ) = self._states.pop()
         del self._tokens[tokens_len:]
+        if terminator != self._terminator:
+            self.terminator = terminator
 
     def _forget_state(self):
         """Destroys the saved state at the head of the save stack."""
@@ -658,25 +1390,21 @@ class BaseTokenizer(object):
         """
         if not value:
             raise ValueError("Statement terminator string must contain at least one character")
-        # Restore the saved handler, if necessary. We don't need to do this
-        # if there was no prior terminator (such as in a new instance of
-        # the class). If the saved handler is the default handler (None),
-        # simply remove the first character of the terminator from the jump
-        # table
-        if self._terminator is not None:
-            if self._saved_handler is None:
-                del self._jump[self._terminator[0]]
-            else:
-                self._jump[self._terminator[0]] = self._saved_handler
-        # Replace the handler (if any) for the statement terminator
-        # character (or the first character of the statement terminator
-        # string) with a special handler and save the original handler for
-        # use by the special handler
+        # Select a jump table in which the handler (if any) for the statement
+        # terminator character (or the first character of the statement
+        # terminator string) is replaced with a special handler, and save the
+        # original handler for use by the special handler. The shared table is
+        # never modified; patched copies are made (and shared) as required
         if (value == '\r\n') or (value == '\r'):
             value = '\n'
         self._terminator = value
-        self._saved_handler = self._jump.get(value[0])
-        self._jump[value[0]] = self._handle_terminator
+        self._saved_handler = self._jump_tables[None].get(value[0])
+        try:
+            self._jump = self._jump_tables[value[0]]
+        except KeyError:
+            self._jump = dict(self._jump_tables[None])
+            self._jump[value[0]] = self.__class__._handle_terminator.__func__
+            self._jump_tables[value[0]] = self._jump
     terminator = property(_get_terminator, _set_terminator)
 
     def _extract_string(self, multiline):
@@ -721,6 +1449,17 @@ class BaseTokenizer(object):
         self._next()
         return content
 
+    def _terminator_directive(self, comment):
+        """Returns the new statement terminator specified by a comment, if any.
+
+        This method is called with the content of every SQL-style comment
+        ("--" prefixed) encountered by the tokenizer and the split() method.
+        If it returns a non-empty string, the statement terminator is changed
+        to that string. By default it always returns None; dialects which
+        permit changing the terminator within a script override this.
+        """
+        return None
+
     def _handle_apos(self):
         """Parses single quote characters (') in the source."""
         try:
@@ -816,10 +1555,21 @@ class BaseTokenizer(object):
         if self._char == ':':
             self._next()
             self._add_token(TT.LABEL, ident)
-        elif ident in self.keywords:
-            self._add_token(TT.KEYWORD, ident)
         else:
-            self._add_token(TT.IDENTIFIER, ident)
+            self._add_token(*self._classify_ident(ident))
+
+    def _classify_ident(self, ident):
+        """Returns the (type, value) of an unquoted identifier (or keyword).
+
+        This method is called by both engines with the uppercased content of
+        an unquoted identifier which is not a label. Dialects which treat
+        certain words specially should override this method rather than
+        _handle_ident.
+        """
+        if ident in self.keywords:
+            return (TT.KEYWORD, ident)
+        else:
+            return (TT.IDENTIFIER, ident)
 
     def _handle_less(self):
         """Parses less-than characters ("<") in the source."""
@@ -844,6 +1594,9 @@ class BaseTokenizer(object):
             if self._char != '\0':
                 self._next()
             self._add_token(TT.COMMENT, content)
+            terminator = self._terminator_directive(content)
+            if terminator:
+                self.terminator = terminator
         else:
             self._add_token(TT.OPERATOR, '-')
 
@@ -881,7 +1634,7 @@ class BaseTokenizer(object):
             else:
                 self._add_token(TT.IDENTIFIER, ident)
         except ValueError, e:
-            self._add_token(ERROR, str(e))
+            self._add_token(TT.ERROR, str(e))
 
     def _handle_semicolon(self):
         """Parses semi-colon characters (;) in the source."""
@@ -931,7 +1684,9 @@ class BaseTokenizer(object):
             self._next(len(self._terminator))
             self._add_token(TT.TERMINATOR, self._terminator)
         elif self._saved_handler is not None:
-            self._saved_handler()
+            self._saved_handler(self)
+        else:
+            self._handle_default()
 
     def _handle_space(self):
         """Parses whitespace characters in the source."""
@@ -943,6 +1698,28 @@ class BaseTokenizer(object):
                 self._next()
         self._add_token(TT.WHITESPACE, None)
 
+    # Handlers whose behaviour is reproduced by the patterns in
+    # _regex_patterns(), and prefixes of dialect specific constructs which the
+    # regex engine must always pass to the jump table. Dialects which add
+    # handlers that fall through to one of these (like prefixed string
+    # literals) extend both
+    _regex_handlers = frozenset([
+        _handle_space, _handle_ident, _handle_digit, _handle_apos,
+        _handle_quote, _handle_minus, _handle_slash, _handle_open_parens,
+        _handle_close_parens, _handle_comma, _handle_plus, _handle_asterisk,
+        _handle_less, _handle_greater, _handle_equal, _handle_bar,
+        _handle_period, _handle_question, _handle_semicolon,
+        ])
+    _regex_deferred = []
+
+# Compiled regular expressions used by the "regex" tokenizer engine, keyed by
+# class and options (see BaseTokenizer._init_regex)
+_regex_cache = {}
+
+# Jump tables shared by all instances of a tokenizer class, keyed by class and
+# options (see BaseTokenizer._build_jump_tables)
+_jump_cache = {}
+
 
 class SQL92Tokenizer(BaseTokenizer):
     """ANSI SQL-92 tokenizer class."""
@@ -952,17 +1729,13 @@ class SQL92Tokenizer(BaseTokenizer):
 class SQL99Tokenizer(BaseTokenizer):
     """ANSI SQL-99 tokenizer class."""
 
-    def __init__(self):
-        super(SQL99Tokenizer, self).__init__()
-        self.keywords = set(sql99_keywords)
-        self.ident_chars = set(sql99_identchars)
+    keywords = frozenset(sql99_keywords)
+    ident_chars = frozenset(sql99_identchars)
 
 
 class SQL2003Tokenizer(BaseTokenizer):
     """ANSI SQL-2003 tokenizer class."""
 
-    def __init__(self):
-        super(SQL2003Tokenizer, self).__init__()
-        self.keywords = set(sql2003_keywords)
-        self.ident_chars = set(sql2003_identchars)
+    keywords = frozenset(sql2003_keywords)
+    ident_chars = frozenset(sql2003_identchars)
 
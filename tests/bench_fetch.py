@@ -0,0 +1,113 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of catalog retrieval with InputPlugin.fetch_some().
+
+Builds a temporary SQLite database containing a table shaped like a large
+column catalog, then reads it back with fetch_some() with various values of
+the arraysize option (0 meaning all rows are fetched at once), each in a fresh
+interpreter. Reports the time taken and the peak memory of the process, which
+should remain flat regardless of the number of rows when fetching in batches.
+Run directly:
+
+    python tests/bench_fetch.py [rows]
+"""
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import os
+import sys
+import shutil
+import sqlite3
+import resource
+import tempfile
+import subprocess
+from timeit import default_timer
+
+from dbsuite.plugins import InputPlugin
+
+ROWS = 1000000
+
+def create_catalog(filename, rows):
+    connection = sqlite3.connect(filename)
+    connection.execute("""
+        CREATE TABLE COLUMNS (
+            TABSCHEMA VARCHAR(128) NOT NULL,
+            TABNAME   VARCHAR(128) NOT NULL,
+            COLNAME   VARCHAR(128) NOT NULL,
+            COLNO     INTEGER NOT NULL,
+            TYPENAME  VARCHAR(18) NOT NULL,
+            LENGTH    INTEGER NOT NULL,
+            NULLS     CHAR(1) NOT NULL,
+            REMARKS   VARCHAR(254)
+        )""")
+    connection.executemany('INSERT INTO COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+        (
+            'SCHEMA%d' % (i // 100000),
+            'TABLE%d' % (i // 20),
+            'COLUMN%d' % (i % 20),
+            i % 20,
+            'VARCHAR',
+            i % 200,
+            'Y',
+            'Description of column %d' % i,
+        )
+        for i in xrange(rows)
+    ))
+    connection.commit()
+    connection.close()
+
+def fetch(filename, arraysize):
+    plugin = InputPlugin()
+    plugin.configure({'arraysize': arraysize})
+    connection = sqlite3.connect(filename)
+    cursor = connection.cursor()
+    start = default_timer()
+    cursor.execute('SELECT * FROM COLUMNS ORDER BY TABSCHEMA, TABNAME, COLNO')
+    count = sum(1 for row in plugin.fetch_some(cursor))
+    elapsed = default_timer() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%d %f %d' % (count, elapsed, peak))
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    path = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(path, 'catalog.db')
+        create_catalog(filename, rows)
+        for arraysize in ('0', '1', '100', '1000', '10000'):
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--fetch', filename, arraysize])
+            count, elapsed, peak = output.split()
+            assert int(count) == rows
+            print('arraysize=%-6s %8.2fs  %8.1fMb peak' % (
+                arraysize, float(elapsed), int(peak) / 1024))
+    finally:
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--fetch']:
+        fetch(*sys.argv[2:])
+    else:
+        main()
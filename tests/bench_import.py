@@ -0,0 +1,99 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of start-up time for short-lived utilities like dbtidysql.
+
+Each stage of a dbtidysql run (starting the interpreter, importing the utility,
+loading the DB2 for LUW plugin, and finally reformatting a three line
+statement) is timed in a fresh interpreter, reporting the best of several runs.
+Then the modules imported by the whole run are listed with the time spent
+importing each, both by itself and including the modules it imported, in the
+manner of Python 3's -X importtime option. Run directly:
+
+    python tests/bench_import.py
+"""
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import os
+import sys
+import timeit
+import subprocess
+
+REPEAT = 10
+
+stages = [
+    ('interpreter', 'pass'),
+    ('import', 'import dbsuite.main.dbtidysql'),
+    ('load plugin', 'import dbsuite.main.dbtidysql, dbsuite.plugins; '
+        'dbsuite.plugins.load_plugin("db2.luw")()'),
+    ('reformat', 'import dbsuite.main.dbtidysql, dbsuite.plugins, dbsuite.highlighters; '
+        'dbsuite.highlighters.SQLHighlighter(dbsuite.plugins.load_plugin("db2.luw")(), '
+        'for_scripts=True).parse_to_string("SELECT A\\nFROM T\\nWHERE B = 1;\\n")'),
+    ]
+
+importtime = """
+import sys, __builtin__
+from timeit import default_timer
+original = __builtin__.__import__
+children = [0.0]
+rows = []
+def timed_import(name, *args, **kwargs):
+    before = len(sys.modules)
+    children.append(0.0)
+    start = default_timer()
+    try:
+        return original(name, *args, **kwargs)
+    finally:
+        elapsed = default_timer() - start
+        inner = children.pop()
+        children[-1] += elapsed
+        if len(sys.modules) > before:
+            rows.append((elapsed - inner, elapsed, name))
+__builtin__.__import__ = timed_import
+%s
+__builtin__.__import__ = original
+for row in rows:
+    sys.stdout.write('%%d %%d %%s\\n' %% (row[0] * 1000000, row[1] * 1000000, row[2]))
+""" % stages[-1][1]
+
+def run(code):
+    env = dict(os.environ)
+    paths = [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+    return subprocess.check_output([sys.executable, '-c', code], env=env)
+
+def main():
+    for label, code in stages:
+        best = min(timeit.repeat(lambda: run(code), number=1, repeat=REPEAT))
+        print('%-12s %8.1fms' % (label, best * 1000))
+    print()
+    print('%10s %10s  %s' % ('self [us]', 'cumulative', 'module'))
+    for line in run(importtime).decode('ascii').splitlines():
+        self_time, cumulative, name = line.split()
+        print('%10s %10s  %s' % (self_time, cumulative, name))
+
+if __name__ == '__main__':
+    main()
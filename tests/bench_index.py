@@ -0,0 +1,269 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the lookup tables built by InputPlugin from catalog rows.
+
+Generates a synthetic catalog (by default with 1,000,000 columns in 50,000
+tables, each with a couple of indexes, a primary key and a foreign key) and
+times the construction of all the grouped properties of InputPlugin (e.g.
+relation_cols, table_indexes, parent_keys) together with the peak memory used
+in doing so. This is compared with a copy of the previous implementation,
+which sorted and grouped every row set with itertools.groupby. Each run is
+performed in a fresh interpreter. Run directly:
+
+    python tests/bench_index.py [columns]
+"""
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import sys
+import random
+import resource
+import subprocess
+from itertools import chain, groupby
+from operator import attrgetter
+from timeit import default_timer
+
+from dbsuite.plugins import InputPlugin, cachedproperty
+from dbsuite.tuples import (
+    Table, Index, IndexCol, RelationCol, UniqueKey, UniqueKeyCol, ForeignKey,
+    ForeignKeyCol, RelationDep, ConstraintRef, IndexRef, RelationRef,
+    TableRef, TablespaceRef
+)
+
+COLUMNS = 1000000
+COLUMNS_PER_TABLE = 20
+
+grouped = (
+    'relation_dependencies',
+    'relation_dependents',
+    'index_cols',
+    'table_indexes',
+    'relation_cols',
+    'unique_keys',
+    'unique_key_cols',
+    'foreign_keys',
+    'foreign_key_cols',
+    'parent_keys',
+    'tablespace_tables',
+    'tablespace_indexes',
+    )
+
+
+class SyntheticPlugin(InputPlugin):
+    def __init__(self, columns):
+        super(SyntheticPlugin, self).__init__()
+        self.configure({})
+        random.seed(0)
+        count = columns // COLUMNS_PER_TABLE
+        tables = [
+            ('SCHEMA%d' % (i % 50), 'TABLE%d' % i)
+            for i in xrange(count)
+        ]
+        # Drivers return the tables in no particular order, but the columns
+        # of each table in order
+        random.shuffle(tables)
+        self.rows = {
+            'get_tables': [
+                Table(schema, name, 'OWNER', False, None, None,
+                    'TBSPACE%d' % (hash(name) % 20), None, 1000, 1000000)
+                for (schema, name) in tables
+            ],
+            'get_relation_cols': [
+                RelationCol(schema, name, 'COL%d' % col, 'SYSIBM', 'INTEGER',
+                    None, None, None, False, True, 100, 0, 'N', None, None)
+                for (schema, name) in tables
+                for col in xrange(COLUMNS_PER_TABLE)
+            ],
+            'get_indexes': [
+                Index(schema, '%s_IX%d' % (name, ix), 'OWNER', False, None,
+                    None, schema, name, 'TBSPACE%d' % ix, None, 1000, 10000,
+                    ix == 0)
+                for (schema, name) in tables
+                for ix in xrange(2)
+            ],
+            'get_index_cols': [
+                IndexCol(schema, '%s_IX%d' % (name, ix), 'COL%d' % col, 'A')
+                for (schema, name) in tables
+                for ix in xrange(2)
+                for col in xrange(ix, ix + 3)
+            ],
+            'get_unique_keys': [
+                UniqueKey(schema, name, 'PK', 'OWNER', False, None, None, True)
+                for (schema, name) in tables
+            ],
+            'get_unique_key_cols': [
+                UniqueKeyCol(schema, name, 'PK', 'COL0')
+                for (schema, name) in tables
+            ],
+            'get_foreign_keys': [
+                ForeignKey(schema, name, 'FK', 'OWNER', False, None, None,
+                    parent[0], parent[1], 'PK', 'A', 'A')
+                for ((schema, name), parent) in zip(tables, tables[1:])
+            ],
+            'get_foreign_key_cols': [
+                ForeignKeyCol(schema, name, 'FK', 'COL1', 'COL0')
+                for (schema, name) in tables[:-1]
+            ],
+            'get_view_dependencies': [
+                RelationDep(schema, name, dep[0], dep[1])
+                for ((schema, name), dep) in zip(tables, tables[1:])
+            ],
+        }
+
+    def retrieve(self, method):
+        return self.rows.get(method, [])
+
+
+class LegacyPlugin(SyntheticPlugin):
+    # A copy of the previous implementation of each grouped property
+
+    @cachedproperty
+    def relation_dependencies(self):
+        result = self.filter(self.retrieve('get_view_dependencies'), key=attrgetter('schema'))
+        result = self.filter(result, key=attrgetter('dep_schema'))
+        result = sorted(result, key=attrgetter('schema', 'name', 'dep_schema', 'dep_name'))
+        result = groupby(result, key=attrgetter('schema', 'name'))
+        return dict(
+            (RelationRef(*view), [RelationRef(d.dep_schema, d.dep_name) for d in deps])
+            for (view, deps) in result
+        )
+
+    @cachedproperty
+    def relation_dependents(self):
+        result = chain(
+            (
+                RelationDep(*(relation + dep))
+                for (relation, deps) in self.relation_dependencies.iteritems()
+                for dep in deps
+            ),
+            (
+                RelationDep(a.schema, a.name, a.base_schema, a.base_name)
+                for a in self.aliases
+            )
+        )
+        result = sorted(result, key=attrgetter('dep_schema', 'dep_name', 'schema', 'name'))
+        result = groupby(result, key=attrgetter('dep_schema', 'dep_name'))
+        return dict(
+            (RelationRef(*relation), [RelationRef(d.schema, d.name) for d in deps])
+            for (relation, deps) in result
+        )
+
+    @cachedproperty
+    def index_cols(self):
+        result = self.filter(self.retrieve('get_index_cols'), key=attrgetter('index_schema'))
+        result = groupby(result, key=attrgetter('index_schema', 'index_name'))
+        return dict((IndexRef(*index), list(cols)) for (index, cols) in result)
+
+    @cachedproperty
+    def table_indexes(self):
+        result = sorted(self.indexes, key=attrgetter('table_schema', 'table_name', 'schema', 'name'))
+        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
+        return dict((TableRef(*table), list(indexes)) for (table, indexes) in result)
+
+    @cachedproperty
+    def relation_cols(self):
+        result = self.filter(self.retrieve('get_relation_cols'), key=attrgetter('relation_schema'))
+        result = sorted(result, key=attrgetter('relation_schema', 'relation_name'))
+        result = groupby(result, key=attrgetter('relation_schema', 'relation_name'))
+        return dict((RelationRef(*relation), list(cols)) for (relation, cols) in result)
+
+    @cachedproperty
+    def unique_keys(self):
+        result = self.filter(self.retrieve('get_unique_keys'), key=attrgetter('table_schema'))
+        result = sorted(result, key=attrgetter('table_schema', 'table_name', 'name'))
+        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
+        return dict((TableRef(*table), list(keys)) for (table, keys) in result)
+
+    @cachedproperty
+    def unique_key_cols(self):
+        result = self.filter(self.retrieve('get_unique_key_cols'), key=attrgetter('const_schema'))
+        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        return dict((ConstraintRef(*key), list(cols)) for (key, cols) in result)
+
+    @cachedproperty
+    def foreign_keys(self):
+        result = self.filter(self.retrieve('get_foreign_keys'), key=attrgetter('table_schema'))
+        result = self.filter(result, key=attrgetter('const_schema'))
+        result = sorted(result, key=attrgetter('table_schema', 'table_name', 'name'))
+        result = groupby(result, key=attrgetter('table_schema', 'table_name'))
+        return dict((TableRef(*table), list(keys)) for (table, keys) in result)
+
+    @cachedproperty
+    def foreign_key_cols(self):
+        result = self.filter(self.retrieve('get_foreign_key_cols'), key=attrgetter('const_schema'))
+        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        return dict((ConstraintRef(*key), list(cols)) for (key, cols) in result)
+
+    @cachedproperty
+    def parent_keys(self):
+        result = (key for (table, keys) in self.foreign_keys.iteritems() for key in keys)
+        result = sorted(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        result = groupby(result, key=attrgetter('const_schema', 'const_table', 'const_name'))
+        return dict((ConstraintRef(*ukey), list(fkeys)) for (ukey, fkeys) in result)
+
+    @cachedproperty
+    def tablespace_tables(self):
+        result = sorted(self.tables, key=attrgetter('tbspace', 'schema', 'name'))
+        result = groupby(result, key=attrgetter('tbspace'))
+        return dict((TablespaceRef(tbspace), list(tables)) for (tbspace, tables) in result)
+
+    @cachedproperty
+    def tablespace_indexes(self):
+        result = sorted(self.indexes, key=attrgetter('tbspace', 'schema', 'name'))
+        result = groupby(result, key=attrgetter('tbspace'))
+        return dict((TablespaceRef(tbspace), list(indexes)) for (tbspace, indexes) in result)
+
+
+def build(mode, columns):
+    plugin = {'current': SyntheticPlugin, 'legacy': LegacyPlugin}[mode](int(columns))
+    # Build the (sorted) lists the grouped properties depend upon first, so
+    # that only the grouping itself is measured
+    plugin.tables
+    plugin.indexes
+    plugin.aliases
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = default_timer()
+    for name in grouped:
+        getattr(plugin, name)
+    elapsed = default_timer() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%f %d' % (elapsed, peak - before))
+
+def main():
+    columns = sys.argv[1] if len(sys.argv) > 1 else str(COLUMNS)
+    for mode in ('legacy', 'current'):
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--build', mode, columns])
+        elapsed, peak = output.split()
+        print('%-8s %8.2fs  %8.1fMb peak increase' % (
+            mode, float(elapsed), int(peak) / 1024))
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--build']:
+        build(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,126 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the memory used by the dbsuite.db object hierarchy.
+
+A synthetic input plugin produces a catalog (by default of 200,000 columns in
+10,000 tables), generating rows with freshly allocated strings as they are
+retrieved, as a database driver would. The peak memory of the process is
+measured after the rows have been retrieved, and again after the Database
+object hierarchy has been built from them, and both are reported in bytes per
+column. Each measurement is taken in a fresh interpreter. To compare with
+another version of dbsuite, run with PYTHONPATH pointing at its source. Run
+directly:
+
+    python tests/bench_memory.py [columns]
+"""
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import sys
+import logging
+import resource
+import subprocess
+
+COLUMNS = 200000
+COLUMNS_PER_TABLE = 20
+
+
+def peak():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def build(columns):
+    from dbsuite.db import Database
+    from dbsuite.plugins import InputPlugin
+    from dbsuite.tuples import Schema, Table, RelationCol, Datatype, Tablespace
+
+    # Returns a copy of value, as each string returned by a driver is a
+    # separate object
+    def s(value):
+        return (value + ' ')[:-1]
+
+    class SyntheticPlugin(InputPlugin):
+        # Rows are generated as they are retrieved, as from a driver
+        def __init__(self, columns):
+            super(SyntheticPlugin, self).__init__()
+            self.configure({})
+            self.name = 'SYNTHETIC'
+            self.count = columns // COLUMNS_PER_TABLE
+
+        def get_schemas(self):
+            for i in xrange(10):
+                yield Schema(s('SCHEMA%d' % i), s('OWNER'), False, None, None)
+            yield Schema(s('SYSIBM'), s('SYSIBM'), True, None, None)
+
+        def get_datatypes(self):
+            for (name, variable) in (('INTEGER', False), ('VARCHAR', True)):
+                yield Datatype(s('SYSIBM'), s(name), s('SYSIBM'), True, None,
+                    None, variable, False, None, None, None, None)
+
+        def get_tablespaces(self):
+            yield Tablespace(s('USERSPACE1'), s('SYSIBM'), False, None, None, s('Regular'))
+
+        def get_tables(self):
+            for i in xrange(self.count):
+                yield Table(s('SCHEMA%d' % (i % 10)), s('TABLE%d' % i),
+                    s('OWNER'), False, None, None, s('USERSPACE1'), None, 1000,
+                    100000)
+
+        def get_relation_cols(self):
+            for i in xrange(self.count):
+                for col in xrange(COLUMNS_PER_TABLE):
+                    yield RelationCol(s('SCHEMA%d' % (i % 10)), s('TABLE%d' % i),
+                        s('COLUMN%d' % col), s('SYSIBM'),
+                        s('VARCHAR' if col % 2 else 'INTEGER'),
+                        128 if col % 2 else None, None, 1208 if col % 2 else None,
+                        False, bool(col % 2), 1000, 0, s('N'), None, None)
+
+    logging.disable(logging.CRITICAL)
+    columns = int(columns)
+    start = peak()
+    plugin = SyntheticPlugin(columns)
+    plugin.prefetch()
+    for name in ('relation_cols', 'relation_dependents', 'table_indexes',
+            'relation_triggers', 'trigger_dependents', 'tablespace_tables',
+            'tablespace_indexes', 'parent_keys'):
+        getattr(plugin, name)
+    fetched = peak()
+    db = Database(plugin)
+    built = peak()
+    assert len(db.schemas['SCHEMA0'].tables['TABLE0'].field_list) == COLUMNS_PER_TABLE
+    assert db.find('SCHEMA1.TABLE1.COLUMN1').size == 128
+    print('%d %d' % ((fetched - start) / columns, (built - fetched) / columns))
+
+def main():
+    columns = sys.argv[1] if len(sys.argv) > 1 else str(COLUMNS)
+    output = subprocess.check_output([sys.executable, __file__, '--build', columns])
+    rows, objects = output.split()
+    print('rows     %6s bytes per column' % rows)
+    print('objects  %6s bytes per column' % objects)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--build']:
+        build(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,115 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the parser on large generated statements.
+
+Each SELECT statement is formatted with packrat memoization disabled and then
+enabled, reporting the best time of each and the memo hit rate. Then INSERT
+statements with increasing numbers of VALUES rows are formatted, reporting the
+time per row (which should remain constant) for formatting and for validating
+alone. Finally, long and deeply nested predicates are formatted, reporting the
+time per term (which should also remain constant). Run directly:
+
+    python tests/bench_parser.py
+"""
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import timeit
+
+from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
+from dbsuite.plugins.db2.luw.parser import DB2LUWScriptParser
+
+
+def nested_expressions(depth):
+    # Each level of parentheses is first tried (and fails) as a parenthesized
+    # search condition before being re-parsed as an expression
+    expr = 'A.X'
+    for i in range(depth):
+        expr = '(%s + %d)' % (expr, i)
+    return 'SELECT A.ID FROM A WHERE %s = 1;' % expr
+
+def nested_selects(depth):
+    cond = 'A.X = 1'
+    for i in range(depth):
+        cond = (
+            '(%s AND (B%d + (C%d * 2)) > (SELECT MAX(Y) FROM T%d '
+            'WHERE Z IN (1, 2, %d)))' % (cond, i, i, i, i))
+    return 'SELECT A.ID, COALESCE(A.NAME, \'x\') FROM A WHERE %s;' % cond
+
+def wide_select(columns):
+    return 'SELECT %s FROM A JOIN B ON A.ID = B.ID WHERE %s;' % (
+        ', '.join('COALESCE(A.C%d, (B.C%d + 1) * 2) AS R%d' % (i, i, i) for i in range(columns)),
+        ' OR '.join('((A.C%d) = %d)' % (i, i) for i in range(columns)),
+        )
+
+def insert_values(rows):
+    return 'INSERT INTO FOO (ID, NAME, VAL) VALUES %s;' % ', '.join(
+        "(%d, 'name %d', %d.5)" % (i, i, i) for i in range(rows))
+
+def long_predicate(terms):
+    return 'SELECT A FROM T WHERE %s;' % ' OR '.join(
+        'A%d = %d' % (i % 10, i) for i in range(terms))
+
+def nested_predicate(terms):
+    cond = 'A = 1'
+    for i in range(terms - 1):
+        cond = '(%s OR B = %d)' % (cond, i)
+    return 'SELECT A FROM T WHERE %s;' % cond
+
+statements = [
+    ('nested_expressions(40)', nested_expressions(40)),
+    ('nested_selects(20)', nested_selects(20)),
+    ('wide_select(500)', wide_select(500)),
+    ]
+
+def main():
+    for (label, sql) in statements:
+        tokens = DB2LUWTokenizer().parse(sql)
+        for memoize in (False, True):
+            parser = DB2LUWScriptParser()
+            parser.memoize = memoize
+            best = min(timeit.repeat(lambda: parser.parse(tokens), number=1, repeat=3))
+            lookups = parser.memo_hits + parser.memo_misses
+            print('%-24s memoize=%-5s %8.3fs  hit rate %5.1f%% (%d lookups)' % (
+                label, memoize, best,
+                parser.memo_hits * 100 / lookups if lookups else 0, lookups))
+    for rows in (1000, 10000, 100000):
+        tokens = DB2LUWTokenizer().parse(insert_values(rows))
+        parser = DB2LUWScriptParser()
+        for method in (parser.parse, parser.validate):
+            best = min(timeit.repeat(lambda: method(tokens), number=1, repeat=1))
+            print('insert_values(%d)%s %-8s %8.3fs  %6.1fus per row' % (
+                rows, ' ' * (7 - len(str(rows))), method.__name__, best,
+                best / rows * 1000000))
+    for func in (long_predicate, nested_predicate):
+        for terms in (5000, 50000):
+            tokens = DB2LUWTokenizer().parse(func(terms))
+            parser = DB2LUWScriptParser()
+            best = min(timeit.repeat(lambda: parser.parse(tokens), number=1, repeat=1))
+            label = '%s(%d)' % (func.__name__, terms)
+            print('%-24s %8.3fs  %6.1fus per term' % (
+                label, best, best / terms * 1000000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+from nose.tools import assert_raises
+
+import dbsuite.db
+from dbsuite.plugins import InputPlugin
+from dbsuite.tuples import (
+    Schema, Datatype, Table, View, Alias, RelationDep, Index, IndexCol,
+    RelationCol, UniqueKey, UniqueKeyCol, ForeignKey, ForeignKeyCol, Tablespace
+)
+
+
+class CatalogPlugin(InputPlugin):
+    # A plugin returning a small catalog of two schemas which reference each
+    # other, plus a system schema and an empty schema
+    def __init__(self):
+        super(CatalogPlugin, self).__init__()
+        self.configure({})
+        self.name = 'TEST'
+        self.rows = {
+            'get_schemas': [
+                Schema('EMPTY', 'OWNER', False, None, None),
+                Schema('S1', 'OWNER', False, None, None),
+                Schema('S2', 'OWNER', False, None, None),
+                Schema('SYSIBM', 'SYSIBM', True, None, None),
+            ],
+            'get_datatypes': [
+                Datatype('SYSIBM', 'INTEGER', 'SYSIBM', True, None, None,
+                    False, False, None, None, None, None),
+            ],
+            'get_tables': [
+                Table('S1', 'T1', 'OWNER', False, None, None, 'TS1', None, 10, 1024),
+                Table('S2', 'T2', 'OWNER', False, None, None, 'TS1', None, 10, 1024),
+            ],
+            'get_aliases': [
+                Alias('S2', 'A1', 'OWNER', False, None, None, 'S1', 'T1'),
+            ],
+            'get_views': [
+                View('S1', 'V1', 'OWNER', False, None, None, True,
+                    'CREATE VIEW S1.V1 AS SELECT A FROM S1.T1'),
+            ],
+            'get_view_dependencies': [
+                RelationDep('S1', 'V1', 'S1', 'T1'),
+            ],
+            'get_relation_cols': [
+                RelationCol('S1', 'T1', 'A', 'SYSIBM', 'INTEGER', None, None,
+                    None, False, False, 10, 0, 'N', None, None),
+                RelationCol('S1', 'T1', 'B', 'SYSIBM', 'INTEGER', None, None,
+                    None, False, True, 10, 0, 'N', None, None),
+                RelationCol('S1', 'V1', 'A', 'SYSIBM', 'INTEGER', None, None,
+                    None, False, False, 10, 0, 'N', None, None),
+                RelationCol('S2', 'T2', 'X', 'SYSIBM', 'INTEGER', None, None,
+                    None, False, True, 10, 0, 'N', None, None),
+                RelationCol('S2', 'T2', 'Y.Z', 'SYSIBM', 'INTEGER', None, None,
+                    None, False, True, 10, 0, 'N', None, None),
+            ],
+            'get_indexes': [
+                Index('S1', 'IX1', 'OWNER', False, None, None, 'S1', 'T1',
+                    'TS1', None, 10, 1024, True),
+            ],
+            'get_index_cols': [
+                IndexCol('S1', 'IX1', 'A', 'A'),
+            ],
+            'get_unique_keys': [
+                UniqueKey('S1', 'T1', 'PK', 'OWNER', False, None, None, True),
+            ],
+            'get_unique_key_cols': [
+                UniqueKeyCol('S1', 'T1', 'PK', 'A'),
+            ],
+            'get_foreign_keys': [
+                ForeignKey('S2', 'T2', 'FK', 'OWNER', False, None, None,
+                    'S1', 'T1', 'PK', 'A', 'A'),
+            ],
+            'get_foreign_key_cols': [
+                ForeignKeyCol('S2', 'T2', 'FK', 'X', 'A'),
+            ],
+            'get_tablespaces': [
+                Tablespace('TS1', 'OWNER', False, None, None, 'Regular'),
+                Tablespace('TS2', 'OWNER', False, None, None, 'Regular'),
+            ],
+        }
+
+    def retrieve(self, method):
+        return self.rows.get(method, [])
+
+
+def test_lazy_equivalent():
+    eager = dbsuite.db.Database(CatalogPlugin())
+    lazy = dbsuite.db.Database(CatalogPlugin(), lazy=True)
+    assert [s.name for s in eager.schema_list] == ['S1', 'S2', 'SYSIBM']
+    assert [t.name for t in eager.tablespace_list] == ['TS1']
+    assert [s.name for s in lazy.schema_list] == ['S1', 'S2', 'SYSIBM']
+    assert (
+        [(type(o), o.qualified_name) for o in lazy] ==
+        [(type(o), o.qualified_name) for o in eager]
+    )
+    assert lazy.find('S1.T1.A').nullable is False
+    assert lazy.schemas['S1'].tables['T1'].primary_key.dependent_list[0].qualified_name == 'S2.T2.FK'
+
+def test_lazy_find():
+    db = dbsuite.db.Database(CatalogPlugin(), lazy=True)
+    assert not any(schema._built for schema in db.schema_list)
+    field = db.find('S2.T2.X')
+    assert field.position == 1
+    assert [schema.name for schema in db.schema_list if schema._built] == ['S2']
+    # Following a reference to another schema builds that schema
+    assert field.relation.foreign_keys['FK'].ref_table.qualified_name == 'S1.T1'
+    assert [schema.name for schema in db.schema_list if schema._built] == ['S1', 'S2']
+    assert db.find('S1.NOTHING') is None
+    assert not hasattr(db.schemas['S1'], 'nothing')
+
+class ClosingPlugin(CatalogPlugin):
+    # Refuses to retrieve anything once closed, like a plugin whose
+    # connection has gone
+    def __init__(self):
+        super(ClosingPlugin, self).__init__()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def retrieve(self, method):
+        assert not self.closed, 'query %s after close' % method
+        return super(ClosingPlugin, self).retrieve(method)
+
+
+def test_lazy_closed():
+    # Everything is retrieved while a lazy database is constructed, even when
+    # the plugin doesn't retrieve in parallel
+    eager = dbsuite.db.Database(CatalogPlugin())
+    plugin = ClosingPlugin()
+    lazy = dbsuite.db.Database(plugin, lazy=True)
+    plugin.close()
+    assert lazy.find('S1.T1.A').nullable is False
+    assert (
+        [(type(o), o.qualified_name) for o in lazy] ==
+        [(type(o), o.qualified_name) for o in eager]
+    )
+
+def test_lazy_build_failure():
+    db = dbsuite.db.Database(CatalogPlugin(), lazy=True)
+    schema = db.schemas['S1']
+    def fail(self, schema, input, row):
+        raise AttributeError('_connection')
+    (dbsuite.db.View.__init__, init) = (fail, dbsuite.db.View.__init__)
+    try:
+        # A failed build must not look like a missing member, or leave the
+        # schema half-built
+        assert_raises(RuntimeError, getattr, schema, 'table_list')
+        assert not schema._built
+        assert_raises(RuntimeError, getattr, schema, 'datatype_list')
+        assert_raises(RuntimeError, db.find, 'S1.T1')
+    finally:
+        dbsuite.db.View.__init__ = init
+    assert schema.views['V1'].qualified_name == 'S1.V1'
+    assert db.find('S1.T1') is schema.tables['T1']
+
+def test_find():
+    for lazy in (False, True):
+        db = dbsuite.db.Database(CatalogPlugin(), lazy=lazy)
+        assert db.find('S1') is db.schemas['S1']
+        assert db.find('TS1') is db.tablespaces['TS1']
+        assert db.find('S1.IX1') is db.schemas['S1'].indexes['IX1']
+        assert db.find('S1.T1.PK') is db.schemas['S1'].tables['T1'].primary_key
+        # Quoted names may contain the separator
+        assert db.find('S2.T2."Y.Z"').position == 2
+        assert db.find('S2.T2.Y.Z') is None
+        assert db.find('S1.T1."A') is None
+        # Fields are found through aliases
+        assert db.find('S2.A1') is db.schemas['S2'].aliases['A1']
+        assert db.find('S2.A1.B') is db.find('S1.T1.B')
+        assert db.find_many(['S1.T1', 'NOTHING', 'S1.T1']) == {
+            'S1.T1': db.schemas['S1'].tables['T1'],
+            'NOTHING': None,
+        }
+
+def test_navigation():
+    db = dbsuite.db.Database(CatalogPlugin())
+    table = db.find('S2.T2')
+    x, yz = table.field_list
+    assert (x.parent_index, yz.parent_index) == (0, 1)
+    assert (x.prior, x.next, yz.next) == (None, yz, None)
+    assert (yz.first, yz.last) == (x, yz)
+    assert db.find('S1.T1').next is db.find('S1.V1')
+    # Proxies convert their identifiers on first access only
+    dependents = db.find('S1.T1').dependent_list
+    assert dependents._items is None
+    assert sorted(d.qualified_name for d in dependents) == ['S1.V1', 'S2.A1']
+    assert dependents[0] is dependents._items[0]
+    assert db.find('S1.V1') in dependents
+
+def test_objects():
+    db = dbsuite.db.Database(CatalogPlugin(), lazy=True)
+    fields = db.objects(dbsuite.db.Field)
+    assert [f.qualified_name for f in fields] == [
+        'S1.T1.A', 'S1.T1.B', 'S1.V1.A', 'S2.T2.X', 'S2.T2.Y.Z']
+    assert db.count(dbsuite.db.Relation) == 4
+    assert set(db.objects(dbsuite.db.Constraint)) == set(
+        [db.find('S1.T1.PK'), db.find('S2.T2.FK')])
+    assert db.count() == len(set(db))
+    assert db.objects(dbsuite.db.Relation) is db.objects(dbsuite.db.Relation)
+    assert db.size == db.schemas['S1'].size + db.schemas['S2'].size == 2048 + 1024
@@ -23,10 +23,13 @@ from __future__ import (
     division,
     )
 
+import sys
+
 from nose.tools import assert_raises
-from dbsuite.parser import ParseError
+from dbsuite.tokenizer import TokenBuffer, Token, TokenTypes as TT
+from dbsuite.parser import ParseError, _candidate_sites
 from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
-from dbsuite.plugins.db2.luw.parser import DB2LUWScriptParser
+from dbsuite.plugins.db2.luw.parser import DB2LUWParser, DB2LUWScriptParser
 
 def check(sql):
     tokenizer = DB2LUWTokenizer()
@@ -61,3 +64,119 @@ def test_create_index():
 def test_set_write():
     check("SET WRITE SUSPEND FOR DB;")
     check("SET WRITE RESUME FOR DATABASE;")
+
+def test_statement_dispatch():
+    check("DECLARE GLOBAL TEMPORARY TABLE T (A INTEGER) NOT LOGGED;")
+    check("DECLARE C1 CURSOR FOR SELECT * FROM FOO;")
+    check("RENAME TABLESPACE A TO B;")
+    check("RENAME TABLE FOO TO BAR;")
+    check("RELEASE TO SAVEPOINT S1;")
+    check("SET INTEGRITY FOR FOO IMMEDIATE CHECKED;")
+    check("CREATE USER TEMPORARY TABLESPACE UTS MANAGED BY AUTOMATIC STORAGE;")
+    check("SELECT 1 FROM \"CREATE\";")
+    check_fails("LOCK FOO;")
+    check_fails("ALTER FOO;")
+
+def test_candidates():
+    parser = DB2LUWParser()
+    templates = (TT.IDENTIFIER, 'VIEW', 'TABLE', (TT.KEYWORD, 'TABLE'), TT.STRING)
+    site = sys._getframe()
+    token = Token(TT.KEYWORD, 'TABLE', 'table', 1, 1)
+    assert parser._candidates(templates, token, site) == [TT.IDENTIFIER, 'TABLE', (TT.KEYWORD, 'TABLE')]
+    token = Token(TT.STRING, 'TABLE', "'TABLE'", 1, 1)
+    assert parser._candidates(templates, token, site) == ['TABLE', (TT.KEYWORD, 'TABLE'), TT.STRING]
+    token = Token(TT.NUMBER, 1, '1', 1, 1)
+    assert parser._candidates(templates, token, site) == []
+    assert parser._candidates(set(['TABLE', (TT.NUMBER, 1)]), token, site) == [(TT.NUMBER, 1)]
+
+def test_candidates_site():
+    # Literal lists are looked up by call site, so each site has its own table
+    # which is reused by later calls
+    parser = DB2LUWParser()
+    token = Token(TT.KEYWORD, 'TABLE', 'table', 1, 1)
+    def lookup():
+        return (
+            parser._candidates(['VIEW', 'TABLE'], token, sys._getframe()),
+            parser._candidates(['VIEW', 'INDEX'], token, sys._getframe()),
+            )
+    assert lookup() == (['TABLE'], [])
+    (code, tables) = _candidate_sites[id(lookup.__code__)]
+    assert code is lookup.__code__
+    assert len(tables) == 2
+    assert lookup() == (['TABLE'], [])
+    assert len(tables) == 2
+    # Lists which a rule modifies between calls are compared with the table
+    # last used at the site, and looked up by content when they differ
+    valid = ['VIEW', 'TABLE']
+    def expect():
+        return parser._candidates(valid, token, sys._getframe())
+    assert expect() == ['TABLE']
+    valid.remove('TABLE')
+    assert expect() == []
+    valid.append('TABLE')
+    assert expect() == ['TABLE']
+
+def test_compact_tokens():
+    sql = (
+        "CREATE TABLE FOO (ID INTEGER NOT NULL, NAME VARCHAR(20));\n"
+        "SELECT F.ID, 'str', 1.5 FROM FOO F WHERE ID = 1 -- comment\n;"
+        )
+    tokenizer = DB2LUWTokenizer()
+    expected = DB2LUWScriptParser().parse(tokenizer.parse(sql))
+    tokenizer.compact = True
+    actual = DB2LUWScriptParser().parse(tokenizer.parse(sql))
+    assert isinstance(actual, TokenBuffer)
+    assert list(actual) == expected
+
+def check_memoize(sql):
+    tokens = DB2LUWTokenizer().parse(sql)
+    expected = DB2LUWScriptParser().parse(tokens)
+    parser = DB2LUWScriptParser()
+    parser.memoize = True
+    assert parser.parse(tokens) == expected
+    assert parser.memo_misses > 0
+
+def test_memoize():
+    for sql in (
+            'SELECT A.ID FROM A WHERE ((((A.X + 1) + 2) * 3) = 1) OR ((A.Y) > 2);',
+            'SELECT * FROM A WHERE NOT ((A.X = 1) AND (A.Y IN (SELECT B FROM C WHERE (D) > (1))));',
+            'SELECT COALESCE(A, (B + 1) * 2), COUNT(*) FROM (SELECT 1 AS A, 2 AS B FROM T) AS X GROUP BY A, B;',
+            'INSERT INTO T VALUES (1, (2), ((3 + 4)));',
+            ):
+        yield check_memoize, sql
+    parser = DB2LUWScriptParser()
+    parser.memoize = True
+    assert_raises(ParseError, parser.parse, DB2LUWTokenizer().parse('SELECT * FROM A WHERE ((A = 1) AND;'))
+
+def significant(tokens):
+    return [token.source for token in tokens if token.type not in (TT.WHITESPACE, TT.COMMENT)]
+
+def check_nesting(sql, memoize):
+    tokens = DB2LUWTokenizer().parse(sql)
+    parser = DB2LUWScriptParser()
+    parser.memoize = memoize
+    assert significant(parser.parse(tokens)) == significant(tokens)
+
+def test_deep_nesting():
+    # Nesting far beyond what the recursion limit would permit with several
+    # Python stack frames per level
+    depth = 1000
+    expr = 'A'
+    cond = 'A = 1'
+    case = '0'
+    for i in range(depth):
+        expr = '(%s + %d)' % (expr, i)
+        cond = '(%s OR B = %d)' % (cond, i)
+        case = 'CASE WHEN A = %d THEN %d ELSE %s END' % (i, i, case)
+    yield check_nesting, 'SELECT %s FROM T;' % expr, False
+    yield check_nesting, 'SELECT A FROM T WHERE %s;' % cond, False
+    yield check_nesting, 'SELECT A FROM T WHERE %s;' % cond, True
+    yield check_nesting, 'SELECT %s FROM T;' % case, False
+    yield check_nesting, 'SELECT A FROM T WHERE A IN (%s, %s);' % (expr, expr), False
+    yield check_fails, 'SELECT A FROM T WHERE %s;' % cond[:-1]
+
+def test_long_predicate():
+    terms = 50000
+    sql = 'SELECT A FROM T WHERE %s;' % ' OR '.join('A%d = %d' % (i % 10, i) for i in range(terms))
+    tokens = DB2LUWTokenizer().parse(sql)
+    assert DB2LUWScriptParser().validate(tokens) == 1
@@ -0,0 +1,345 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import io
+import os
+import shutil
+import tempfile
+
+import dbsuite.parser
+import dbsuite.highlighters
+from nose.tools import assert_raises
+from dbsuite.tokenizer import Token, TokenTypes as TT
+from dbsuite.tokenizer import TokenBuffer
+from dbsuite.parser import (
+    ParseCache,
+    ParserProfile,
+    ParseError, format_tokens, convert_indent, merge_whitespace,
+    strip_whitespace, split_lines, split_ident)
+from dbsuite.highlighters import SQLHighlighter
+from dbsuite.plugins.db2.luw import InputPlugin
+from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
+from dbsuite.plugins.db2.luw.parser import DB2LUWScriptParser
+
+# The original whole-list implementations of the output pipeline, against
+# which the streaming pipeline is checked for byte-identical output
+
+def reference_recalc_positions(tokens):
+    line = 1
+    column = 1
+    for token in tokens:
+        yield Token(token.type, token.value, token.source, line, column)
+        for char in token.source:
+            if char == '\n':
+                line += 1
+                column = 1
+            else:
+                column += 1
+
+def reference_convert_valign(tokens):
+    indexes = []
+    aligncol = alignline = 0
+    more = True
+    while more:
+        result = []
+        more = False
+        for i, token in enumerate(reference_recalc_positions(tokens)):
+            line, col = token.line, token.column
+            result.append(token)
+            if token.type == TT.VALIGN:
+                if indexes and alignline == line:
+                    more = True
+                else:
+                    indexes.append(i)
+                    aligncol = max(aligncol, col)
+                    alignline = line
+            elif token.type == TT.VAPPLY:
+                for j in indexes:
+                    line, col = result[j].line, result[j].column
+                    result[j] = Token(TT.WHITESPACE, None, ' ' * (aligncol - col), 0, 0)
+                if indexes:
+                    result[-1] = Token(TT.WHITESPACE, None, '', 0, 0)
+                    indexes = []
+                    aligncol = alignline = 0
+        assert not indexes
+        tokens = result
+    return result
+
+def reference_finish(parser, output):
+    output = format_tokens(output, reformat=parser.reformat,
+        terminator=parser.terminator, statement=parser.statement,
+        namechars=set(parser.namechars))
+    if TT.WHITESPACE in parser.reformat:
+        output = reference_convert_valign(convert_indent(output, indent=parser.indent))
+    else:
+        output = (token for token in output if token.type not in (TT.INDENT, TT.VALIGN, TT.VAPPLY))
+    output = reference_recalc_positions(output)
+    output = merge_whitespace(output)
+    if TT.WHITESPACE in parser.reformat:
+        output = strip_whitespace(output)
+    if parser.line_split:
+        output = split_lines(output)
+    return list(output)
+
+class CapturingParser(DB2LUWScriptParser):
+    def _parse_finish(self):
+        self.raw_output = list(self._output)
+        super(CapturingParser, self)._parse_finish()
+
+statements = [
+    "SELECT 1 FROM FOO UNION SELECT 2 FROM BAR",
+    "SELECT A, B FROM BAZ MINUS ALL SELECT B, C FROM BAR ORDER BY 1 ASC",
+    "CREATE UNIQUE INDEX FOO_PK ON FOO(ID1, ID2 DESC)",
+    "CREATE TABLE FOO (ID INTEGER NOT NULL, NAME VARCHAR(20), \"Quoted\" CHAR(1) DEFAULT 'x', PRIMARY KEY (ID))",
+    "CREATE TABLE BAR (\n  A INT, -- a comment\n  LONGER_NAME DECIMAL(10, 2) NOT NULL WITH DEFAULT 0,\n  C CLOB(1M) /* another */ LOGGED\n)",
+    "DECLARE GLOBAL TEMPORARY TABLE T (A INTEGER, BB VARCHAR(10)) ON COMMIT PRESERVE ROWS NOT LOGGED",
+    "COMMENT ON FOO (ID IS 'The ID', NAME IS 'The name', \"Quoted\" IS 'Flag')",
+    "CREATE VIEW V AS SELECT F.ID, 'str', 1.5, 10., COALESCE(NAME, 'x') FROM FOO F WHERE ID = 1 AND (NAME LIKE 'A%' OR NAME IS NULL)",
+    "INSERT INTO FOO (ID, NAME) VALUES (1, 'a'), (2, 'b')",
+    "UPDATE FOO SET NAME = 'x', ID = ID + 1 WHERE ID BETWEEN 1 AND 10",
+    "MERGE INTO FOO F USING BAR B ON F.ID = B.ID WHEN MATCHED THEN UPDATE SET F.NAME = B.NAME WHEN NOT MATCHED THEN INSERT (ID, NAME) VALUES (B.ID, B.NAME)",
+    "CREATE PROCEDURE P (IN A INTEGER) LANGUAGE SQL BEGIN DECLARE X INTEGER; SET X = A; IF X > 1 THEN SET X = 1; END IF; END",
+    "SELECT CASE WHEN A = 1 THEN 'x' ELSE 'z' END, CAST(B AS VARCHAR(10)), CURRENT DATE, DATE(D) + 1 DAY FROM T",
+    "SELECT * FROM A LEFT OUTER JOIN B ON A.ID = B.ID INNER JOIN C ON C.ID = B.ID CROSS JOIN D",
+    "CONNECT TO SAMPLE USER BOB USING 'pass'",
+    "EXPORT TO 'foo.ixf' OF IXF SELECT * FROM FOO",
+    "SELECT X FROM T WHERE X = NAN",
+    ]
+
+corpus = [(sql + ';', ';') for sql in statements] + [
+    ('\n'.join(sql + ';' for sql in statements), ';'),
+    ('-- leading comment\n\n' + ';\n'.join(statements) + '\n-- trailing comment\n', ';'),
+    ('SELECT 1 FROM A; -- a\n; -- b\n;;SELECT 2 FROM B; /* c */\n--#SET TERMINATOR @\n'
+        'CREATE PROCEDURE P () BEGIN DECLARE X INTEGER; END @ -- d\n', ';'),
+    (io.open(os.path.join(os.path.dirname(__file__), '..', 'contrib',
+        'db2', 'luw', 'doccat_create.sql'), encoding='utf-8').read(), '!'),
+    ]
+
+def configure(parser, options):
+    (reformat, line_split, indent) = options
+    if not reformat:
+        parser.reformat = set()
+    parser.line_split = line_split
+    parser.indent = indent
+    return parser
+
+options = [
+    (True, False, ' ' * 4),
+    (True, True, '\t'),
+    (False, False, ' ' * 4),
+    (False, True, ' ' * 4),
+    ]
+
+def check_finish(sql, terminator, options):
+    parser = configure(CapturingParser(), options)
+    actual = parser.parse(DB2LUWTokenizer().parse(sql, terminator))
+    expected = reference_finish(parser, parser.raw_output)
+    # Compare representations as Decimal('NaN') != Decimal('NaN')
+    assert repr(actual) == repr(expected)
+    assert ''.join(token.source for token in actual) == ''.join(token.source for token in expected)
+
+def check_parse_iter(sql, terminator, options):
+    tokens = DB2LUWTokenizer().parse(sql, terminator)
+    expected = configure(DB2LUWScriptParser(), options).parse(tokens)
+    actual = list(configure(DB2LUWScriptParser(), options).parse_iter(tokens))
+    assert repr(actual) == repr(expected)
+
+def test_finish():
+    for (sql, terminator) in corpus:
+        for opts in options:
+            yield check_finish, sql, terminator, opts
+            yield check_parse_iter, sql, terminator, opts
+
+def test_parse_iter_errors():
+    tokens = DB2LUWTokenizer().parse('SELECT 1 FROM FOO;\nSELECT BAD SYNTAX (;')
+    output = DB2LUWScriptParser().parse_iter(tokens)
+    first = next(output)
+    assert first.source == 'SELECT'
+    assert_raises(ParseError, list, output)
+
+def check_parse_batches(sql, terminator, options, size):
+    tokenizer = DB2LUWTokenizer()
+    expected = configure(DB2LUWScriptParser(), options).parse(tokenizer.parse(sql, terminator))
+    spans = list(tokenizer.split(sql, terminator, terminators=True))
+    parser = configure(DB2LUWScriptParser(), options)
+    actual = parser.finish_batches(
+        parser.parse_batch(tokenizer.parse(
+            sql[spans[i][0]:spans[min(i + size, len(spans)) - 1][1]], spans[i][2]))
+        for i in range(0, len(spans), size)
+    )
+    assert repr(actual) == repr(expected)
+
+def test_parse_batches():
+    for (sql, terminator) in corpus:
+        # Compound statements terminated by the statement terminator can't be
+        # split; parsing such scripts in batches fails
+        if terminator == ';' and 'BEGIN' in sql:
+            continue
+        for opts in options:
+            yield check_parse_batches, sql, terminator, opts, 1
+            yield check_parse_batches, sql, terminator, opts, 3
+
+def test_parse_jobs():
+    highlighter = SQLHighlighter(InputPlugin(), for_scripts=True)
+    try:
+        (sql, terminator) = corpus[-1]
+        expected = highlighter.parse_to_string(sql, terminator, True)
+        assert highlighter.parse_to_string(sql, terminator, True, jobs=2) == expected
+        # The pool is reused by later calls, whatever their line_split
+        pool = highlighter._pool
+        assert pool is not None
+        expected = highlighter.parse_to_string(sql, terminator)
+        assert highlighter.parse_to_string(sql, terminator, jobs=2) == expected
+        assert highlighter._pool is pool
+        # Errors in a batch must result in the same output as parsing serially
+        sql = 'SELECT 1 FROM A;\nSELECT BAD SYNTAX (;\nSELECT 2 FROM B;'
+        expected = highlighter.parse_to_string(sql)
+        assert highlighter.parse_to_string(sql, jobs=3) == expected
+        assert highlighter._pool is not pool
+    finally:
+        highlighter.close()
+    assert highlighter._pool is None
+
+def test_parse_batch_boundaries():
+    highlighter = SQLHighlighter(InputPlugin(), for_scripts=True)
+    dbsuite.highlighters._init_worker(
+        dbsuite.highlighters._public_state(highlighter.tokenizer),
+        dbsuite.highlighters._public_state(highlighter.formatter))
+    parse_batch = dbsuite.highlighters._parse_batch
+    assert parse_batch(('SELECT 1 FROM A;', ';', ';', False)) is not None
+    assert parse_batch(('SELECT 1 FROM A;', ';', None, False)) is not None
+    # A batch which doesn't end with a terminator, or which ends with a
+    # different terminator in effect than the next batch begins with, was
+    # split where the tokenizer doesn't end a statement
+    assert parse_batch(('SELECT 1A@ FROM A', '@', '@', False)) is None
+    assert parse_batch(('SELECT 1 FROM A;', ';', '@', False)) is None
+
+def test_parse_cache():
+    path = tempfile.mkdtemp()
+    try:
+        tokenizer = DB2LUWTokenizer()
+        parser = DB2LUWScriptParser()
+        (sql, terminator) = corpus[-2]
+        expected = parser.parse(tokenizer.parse(sql))
+        parser.cache = ParseCache(path)
+        assert repr(parser.parse(tokenizer.parse(sql))) == repr(expected)
+        assert (parser.cache.hits, parser.cache.misses) == (0, 1)
+        # A new cache on the same directory finds the entry of the last
+        parser.cache = ParseCache(path)
+        assert repr(parser.parse(tokenizer.parse(sql))) == repr(expected)
+        tokenizer.compact = True
+        actual = parser.parse(tokenizer.parse(sql))
+        assert isinstance(actual, TokenBuffer)
+        assert [token.source for token in actual] == [token.source for token in expected]
+        assert (parser.cache.hits, parser.cache.misses) == (2, 0)
+        parser.indent = '\t'
+        assert parser.parse(tokenizer.parse(sql)) != expected
+        assert parser.cache.misses == 1
+        # Entries written by other versions of dbsuite are never used
+        options = parser.cache_options()
+        (dbsuite.parser.__version__, version) = ('0.0', dbsuite.parser.__version__)
+        try:
+            assert parser.cache_options() != options
+        finally:
+            dbsuite.parser.__version__ = version
+        # Least recently used entries are evicted once max_size is exceeded
+        cache = ParseCache(path, max_size=0)
+        cache.put(cache.key('foo'), expected)
+        assert cache.get(cache.key('foo')) is None
+        assert not any(os.listdir(os.path.join(path, d)) for d in os.listdir(path))
+        # A failed write leaves no temporary file behind
+        filename = cache._filename(cache.key('bar'))
+        os.makedirs(os.path.join(filename, 'blocked'))
+        assert_raises(OSError, cache.put, cache.key('bar'), expected)
+        assert os.listdir(os.path.dirname(filename)) == [os.path.basename(filename)]
+    finally:
+        shutil.rmtree(path)
+
+def test_highlighter_cache():
+    path = tempfile.mkdtemp()
+    try:
+        highlighter = SQLHighlighter(InputPlugin(), for_scripts=True)
+        (sql, terminator) = corpus[-2]
+        expected = highlighter.parse_to_string(sql, terminator)
+        highlighter.cache = ParseCache(path)
+        assert highlighter.parse_to_string(sql, terminator) == expected
+        assert highlighter.parse_to_string(sql, terminator) == expected
+        assert highlighter.parse_to_string(sql, terminator, line_split=True) == expected
+        assert (highlighter.cache.hits, highlighter.cache.misses) == (1, 2)
+        # Output which couldn't be parsed isn't cached, so errors are logged
+        # on every run
+        highlighter.parse_to_string('SELECT BAD SYNTAX (;')
+        highlighter.parse_to_string('SELECT BAD SYNTAX (;')
+        assert highlighter.cache.misses == 4
+    finally:
+        shutil.rmtree(path)
+
+def check_validate(sql, terminator):
+    tokens = DB2LUWTokenizer().parse(sql, terminator)
+    parser = DB2LUWScriptParser()
+    count = parser.validate(tokens)
+    assert count == sum(1 for token in parser.parse(tokens) if token.type == TT.STATEMENT)
+
+def test_validate():
+    for (sql, terminator) in corpus:
+        yield check_validate, sql, terminator
+
+def test_validate_errors():
+    tokens = DB2LUWTokenizer().parse('SELECT 1 FROM FOO;\nSELECT BAD SYNTAX (;')
+    parser = DB2LUWScriptParser()
+    assert_raises(ParseError, parser.validate, tokens)
+    try:
+        parser.parse(tokens)
+    except ParseError, e:
+        expected = str(e)
+    try:
+        parser.validate(tokens)
+    except ParseError, e:
+        assert str(e) == expected
+
+def test_parser_profile():
+    tokens = DB2LUWTokenizer().parse(corpus[-3][0])
+    parser = DB2LUWScriptParser()
+    expected = parser.parse(tokens)
+    profile = ParserProfile(parser)
+    with profile:
+        assert repr(parser.parse(tokens)) == repr(expected)
+    assert '_parse_top' not in parser.__dict__
+    report = profile.report()
+    assert report == sorted(report, key=lambda stats: stats.time, reverse=True)
+    stats = dict((stats.rule, stats) for stats in report)
+    assert stats['_parse_top'].calls == len(statements)
+    assert 0 < stats['_parse_top'].tokens < len(tokens)
+    assert sum(stats.backtracks for stats in report) > 0
+    assert '_parse_init' not in stats
+    report = profile.report(sort='calls', reverse=False)
+    assert report[-1].calls == max(stats.calls for stats in report)
+
+def test_split_ident():
+    assert split_ident('FOO') == ('FOO',)
+    assert split_ident('S.T.C') == ('S', 'T', 'C')
+    assert split_ident('S."My.Table"."A ""B"""') == ('S', 'My.Table', 'A "B"')
+    for name in ('', 'S.', '.T', 'S..T', 'S."T', 'S.T"C'):
+        assert_raises(ValueError, split_ident, name)
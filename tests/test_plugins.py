@@ -0,0 +1,296 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from nose.tools import assert_raises
+from dbsuite.plugins import InputPlugin, CatalogSnapshot, PluginConfigurationError
+from dbsuite.tuples import IndexCol, IndexRef, RelationDep, RelationRef
+import dbsuite.plugins.sqlite
+import dbsuite.plugins.db2.zos
+
+
+class FetchAllCursor(object):
+    # A cursor from a driver which isn't trusted with fetchmany()
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchmany(self, count):
+        raise AssertionError('fetchmany() called on an untrusted driver')
+
+    def fetchall(self):
+        return self.rows
+
+
+def check_fetch_some(arraysize):
+    plugin = InputPlugin()
+    plugin.configure({'arraysize': arraysize})
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE T (ID INTEGER NOT NULL, NAME VARCHAR(20))')
+    expected = [(i, 'name %d' % i) for i in range(2500)]
+    connection.executemany('INSERT INTO T VALUES (?, ?)', expected)
+    cursor = connection.cursor()
+    cursor.execute('SELECT ID, NAME FROM T ORDER BY ID')
+    rows = plugin.fetch_some(cursor)
+    if int(arraysize):
+        # Rows are retrieved as the generator is consumed
+        assert next(rows) == expected[0]
+        assert len(cursor.fetchmany(int(arraysize))) == int(arraysize)
+        assert len(list(rows)) == 2500 - int(arraysize) - 1
+    else:
+        assert list(rows) == expected
+    assert list(plugin.fetch_some(FetchAllCursor(expected))) == expected
+
+def test_fetch_some():
+    for arraysize in ('0', '1', '1000'):
+        yield check_fetch_some, arraysize
+    assert_raises(PluginConfigurationError, InputPlugin().configure, {'arraysize': '-1'})
+
+
+def check_schema_filter(include, exclude, padded=False):
+    plugin = InputPlugin()
+    plugin.configure({'include': include, 'exclude': exclude})
+    connection = sqlite3.connect(':memory:')
+    connection.execute('PRAGMA case_sensitive_like = ON')
+    names = ['APP', 'APP_X', 'APPX', 'APPXY', 'SYSCAT', 'SYSIBM', 'A%B', 'A!B', 'AXB', 'app']
+    if padded:
+        # Emulate a blank-padded CHAR(8) catalog column, as in DB2, which
+        # comparisons (but not LIKE) treat as equal to the unpadded name
+        connection.execute('CREATE TABLE S (NAME VARCHAR(20) COLLATE RTRIM NOT NULL)')
+        rows = ((name.ljust(8),) for name in names)
+    else:
+        connection.execute('CREATE TABLE S (NAME VARCHAR(20) NOT NULL)')
+        rows = ((name,) for name in names)
+    connection.executemany('INSERT INTO S VALUES (?)', rows)
+    expected = sorted(plugin.filter(names))
+    actual = sorted(name.rstrip() for (name,) in connection.execute(
+        'SELECT NAME FROM S WHERE %s' % plugin.schema_filter('NAME')))
+    if '[' in include + exclude:
+        # [seq] patterns aren't translated, so filter() must finish the job
+        assert set(actual) >= set(expected)
+        actual = sorted(plugin.filter(actual))
+    assert actual == expected, '%r != %r' % (actual, expected)
+    assert plugin.schema_filter('NAME', filtered=False) == '1 = 1'
+
+def test_schema_filter():
+    for (include, exclude) in (
+            ('', ''),
+            ('APP', ''),
+            ('APP,SYSCAT', ''),
+            ('APP*', ''),
+            ('APP?', 'APP_X'),
+            ('A%B,A!B', ''),
+            ('A?B', ''),
+            ('', 'SYS*,A%B'),
+            ('*', 'APP??'),
+            ('[AS]*', 'APP'),
+            ('A*', '[!S]%B'),
+            ):
+        yield check_schema_filter, include, exclude
+        yield check_schema_filter, include, exclude, True
+
+class QueryRecorder(object):
+    # Stands in for a connection (and its cursors), recording the queries
+    # executed and returning no rows
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.queries.append(sql)
+
+    def fetchall(self):
+        return []
+
+def test_zos_schema_filter():
+    # Every branch of the z/OS queries for schema objects must apply the filter
+    plugin = dbsuite.plugins.db2.zos.InputPlugin()
+    plugin.configure({'database': 'DB', 'include': 'APP'})
+    for (method, field) in plugin.snapshot_fields.iteritems():
+        if field is None or method == 'get_datatypes':
+            continue
+        plugin.connection = QueryRecorder()
+        list(getattr(plugin, method)())
+        for sql in plugin.connection.queries:
+            assert sql.count("= 'APP'") == sql.count('UNION ALL') + 1, method
+
+
+class RowsPlugin(InputPlugin):
+    # A plugin which returns fixed rows from its get_*() methods
+    def __init__(self, **rows):
+        super(RowsPlugin, self).__init__()
+        self.configure({})
+        self.rows = rows
+
+    def retrieve(self, method):
+        return self.rows.get(method, [])
+
+def test_grouping():
+    plugin = RowsPlugin(
+        # Columns of an index which the driver didn't return contiguously
+        get_index_cols=[
+            IndexCol('S', 'IX1', 'B', 'A'),
+            IndexCol('S', 'IX2', 'A', 'A'),
+            IndexCol('S', 'IX1', 'A', 'D'),
+        ],
+        get_view_dependencies=[
+            RelationDep('S', 'V2', 'S', 'T2'),
+            RelationDep('S', 'V1', 'S', 'T2'),
+            RelationDep('S', 'V1', 'S', 'T1'),
+        ],
+    )
+    assert plugin.index_cols == {
+        IndexRef('S', 'IX1'): [IndexCol('S', 'IX1', 'B', 'A'), IndexCol('S', 'IX1', 'A', 'D')],
+        IndexRef('S', 'IX2'): [IndexCol('S', 'IX2', 'A', 'A')],
+    }
+    assert all(isinstance(key, IndexRef) for key in plugin.index_cols)
+    assert plugin.relation_dependencies == {
+        RelationRef('S', 'V1'): [RelationRef('S', 'T1'), RelationRef('S', 'T2')],
+        RelationRef('S', 'V2'): [RelationRef('S', 'T2')],
+    }
+    assert plugin.relation_dependents == {
+        RelationRef('S', 'T1'): [RelationRef('S', 'V1')],
+        RelationRef('S', 'T2'): [RelationRef('S', 'V1'), RelationRef('S', 'V2')],
+    }
+
+
+class SQLitePlugin(dbsuite.plugins.sqlite.InputPlugin):
+    # Several of the SQLite plugin's queries are still placeholders; these
+    # are replaced by a query which returns nothing (but must still run on the
+    # connection of the calling thread to satisfy sqlite3)
+    def nothing(self):
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT 1 WHERE 0 = 1')
+        return self.fetch_some(cursor)
+
+    get_indexes = get_index_cols = get_relation_cols = nothing
+    get_unique_keys = get_unique_key_cols = nothing
+    get_foreign_keys = get_foreign_key_cols = get_checks = get_check_cols = nothing
+    get_functions = get_procedures = get_routine_params = nothing
+    get_triggers = get_trigger_dependencies = get_tablespaces = nothing
+
+    def connect(self):
+        self.threads.add(threading.current_thread().name)
+        return super(SQLitePlugin, self).connect()
+
+def extract(filename, parallel):
+    plugin = SQLitePlugin()
+    plugin.threads = set()
+    plugin.configure({'database': filename, 'parallel': parallel})
+    plugin.open()
+    try:
+        plugin.prefetch()
+        return (
+            dict((name, getattr(plugin, name)) for name in plugin.prefetch_properties),
+            plugin.threads,
+        )
+    finally:
+        plugin.close()
+
+def test_prefetch():
+    path = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(path, 'test.db')
+        connection = sqlite3.connect(filename)
+        for i in range(20):
+            connection.execute('CREATE TABLE T%d (ID INTEGER NOT NULL)' % i)
+            connection.execute('CREATE VIEW V%d AS SELECT ID FROM T%d' % (i, i))
+        connection.commit()
+        connection.close()
+        (expected, threads) = extract(filename, '1')
+        assert len(expected['tables']) == len(expected['views']) == 20
+        assert threads == set([threading.current_thread().name])
+        (actual, threads) = extract(filename, '4')
+        assert actual == expected
+        assert len(threads) == 5
+        assert threading.current_thread().name in threads
+    finally:
+        shutil.rmtree(path)
+
+def refresh(filename, snapshot):
+    plugin = SQLitePlugin()
+    plugin.threads = set()
+    plugin.configure({'database': filename})
+    plugin.open()
+    try:
+        plugin.refresh(snapshot)
+        return (plugin, [table.name for table in plugin.tables], plugin.take_snapshot())
+    finally:
+        plugin.close()
+
+def test_snapshot():
+    path = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(path, 'test.db')
+        connection = sqlite3.connect(filename)
+        connection.execute('CREATE TABLE T1 (ID INTEGER NOT NULL)')
+        connection.commit()
+        store = CatalogSnapshot(os.path.join(path, 'snapshots'))
+        assert store.load('test') is None
+        (plugin, tables, snapshot) = refresh(filename, None)
+        assert tables == ['T1']
+        store.save('test', snapshot)
+        assert store.load('test') == snapshot
+        # An unchanged database is not queried again
+        def fail(self):
+            raise AssertionError('get_tables() called for an unchanged schema')
+        SQLitePlugin.get_tables = fail
+        try:
+            (plugin, tables, snapshot) = refresh(filename, store.load('test'))
+        finally:
+            del SQLitePlugin.get_tables
+        assert tables == ['T1']
+        assert snapshot == store.load('test')
+        # A snapshot taken by another version of dbsuite is not used
+        (dbsuite.plugins.__version__, version) = ('0.0', dbsuite.plugins.__version__)
+        SQLitePlugin.get_tables = fail
+        try:
+            assert_raises(AssertionError, refresh, filename, store.load('test'))
+        finally:
+            del SQLitePlugin.get_tables
+            dbsuite.plugins.__version__ = version
+        connection.execute('CREATE TABLE T2 (ID INTEGER NOT NULL)')
+        connection.commit()
+        connection.close()
+        (plugin, tables, snapshot) = refresh(filename, store.load('test'))
+        assert tables == ['T1', 'T2']
+        assert snapshot['signatures'] != store.load('test')['signatures']
+        with open(store._filename('test'), 'wb') as f:
+            f.write(b'garbage')
+        assert store.load('test') is None
+        # A failed save leaves no temporary file behind
+        os.makedirs(os.path.join(store._filename('blocked'), 'blocked'))
+        assert_raises(OSError, store.save, 'blocked', snapshot)
+        assert sorted(os.listdir(store.path)) == sorted([
+            os.path.basename(store._filename('test')),
+            os.path.basename(store._filename('blocked'))])
+    finally:
+        shutil.rmtree(path)
@@ -0,0 +1,234 @@
+# vim: set et sw=4 sts=4:
+
+# Copyright 2012 Dave Hughes.
+#
+# This file is part of dbsuite.
+#
+# dbsuite is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# dbsuite is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# dbsuite.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (
+    unicode_literals,
+    print_function,
+    absolute_import,
+    division,
+    )
+
+import io
+
+from nose.tools import assert_raises
+from dbsuite.tokenizer import SQL92Tokenizer, TokenBuffer, TokenError, TokenTypes as TT
+from dbsuite.plugins.db2.zos.tokenizer import DB2ZOSTokenizer
+from dbsuite.plugins.db2.luw.tokenizer import DB2LUWTokenizer
+
+corpus = [
+    '',
+    'SELECT * FROM SYSCAT.TABLES;',
+    "select a, b as \"Quoted \"\"Name\"\"\"\nfrom foo\nwhere c = 'it''s' and d <> 1;",
+    'SELECT 1, 1.5, .5, 1., 1E5, 1.5e-3, 12e+2, 3.4.5 FROM T;',
+    'VALUES (1 + 2 - 3 * 4 / 5) || \'x\';',
+    'A<B AND A<=B AND A>=B AND A>B AND A=B AND A<>B',
+    'SELECT -- comment\n1 -- another\r\n, 2 --last',
+    'SELECT 1\r\nFROM\r\n  T\rWHERE\r\rX = ?;\r\n',
+    "'multi\r\nline\rstring\n'",
+    "'unterminated",
+    '"unterminated',
+    '"broken\nquote"',
+    'label: BEGIN "Other Label": END',
+    '/* c comment */ SELECT /* spanning\r\nlines */ 1',
+    '/* outer /* nested */ still comment */ 1',
+    '/* unterminated',
+    'SELECT X\'4142\', x\'41\', N\'graphic\', G\'text\', GX\'00410042\' FROM XYZ',
+    'SELECT X\'414\', X, XY, NX, GX, NAME, GRAPHIC FROM T',
+    "SELECT U&'\\0041\\\\', UX'0041', USER, U FROM T",
+    'SELECT INFINITY, NAN, SNAN, INFINITE FROM T',
+    'A..B, F(X => 1), ARR[1], {CALL}',
+    'SELECT A FROM B WHERE C != 1 AND D ^= 2 AND E !> 3 AND F !< 4',
+    'SELECT # FROM %',
+    'SELECT A | B',
+    'CREATE PROCEDURE P() BEGIN SELECT 1; END@\nSELECT $A@ FROM @T@',
+    '\t \t\n\n  \r\n\r\n',
+    'SELECT 1\0 SELECT 2',
+    'SELECT 1 FROM T; -- trailing; comment',
+    'SELECT 1 -- note; x\nFROM T',
+    'SELECT 1A@ FROM T@',
+    'SELECT :@X FROM T@',
+    ]
+
+def tokenize(cls, engine, sql, terminator, line_split):
+    tokenizer = cls()
+    tokenizer.engine = engine
+    tokenizer.raise_errors = False
+    return tokenizer.parse(sql, terminator, line_split)
+
+def check_equivalent(cls, sql, terminator=';', line_split=False):
+    expected = tokenize(cls, 'jump', sql, terminator, line_split)
+    actual = tokenize(cls, 'regex', sql, terminator, line_split)
+    # Compare representations as Decimal('NaN') != Decimal('NaN')
+    assert repr(actual) == repr(expected), '%s: %r != %r' % (cls.__name__, actual, expected)
+
+def test_engines_equivalent():
+    for cls in (SQL92Tokenizer, DB2ZOSTokenizer, DB2LUWTokenizer):
+        for sql in corpus:
+            for terminator in (';', '@', '\n', '!!'):
+                yield check_equivalent, cls, sql, terminator, False
+                yield check_equivalent, cls, sql, terminator, True
+
+def test_engines_equivalent_options():
+    for options in (
+            {'multiline_str': False},
+            {'sql_comments': False},
+            {'c_comments': True, 'c_comments_nested': False},
+            {'cpp_comments': True},
+            {'space_chars': ' \t'},
+            ):
+        def cls():
+            result = SQL92Tokenizer()
+            result.__dict__.update(options)
+            return result
+        cls.__name__ = str('SQL92Tokenizer(%r)' % options)
+        for sql in corpus + ['SELECT A // comment\n/ B', 'A /* B */ / C']:
+            yield check_equivalent, cls, sql
+
+def test_regex_engine_errors():
+    tokenizer = DB2LUWTokenizer()
+    tokenizer.engine = 'regex'
+    assert_raises(TokenError, tokenizer.parse, "SELECT 'unterminated")
+    tokenizer.engine = 'foo'
+    assert_raises(ValueError, tokenizer.parse, 'SELECT 1')
+
+def test_luw_special_values():
+    tokens = DB2LUWTokenizer().parse('INFINITY NAN SNAN')
+    assert [token.type for token in tokens if token.type != TT.WHITESPACE] == [TT.NUMBER] * 3
+
+def check_iter_equivalent(cls, engine, sql, terminator, chunk_size):
+    tokenizer = cls()
+    tokenizer.engine = engine
+    tokenizer.raise_errors = False
+    expected = tokenizer.parse(sql, terminator, True)
+    actual = list(tokenizer.parse_iter(io.StringIO(sql), terminator, True, chunk_size))
+    assert repr(actual) == repr(expected), '%s: %r != %r' % (cls.__name__, actual, expected)
+
+def test_parse_iter_equivalent():
+    for cls in (SQL92Tokenizer, DB2LUWTokenizer):
+        for engine in ('jump', 'regex'):
+            for sql in corpus:
+                for chunk_size in (1, 3, 16):
+                    yield check_iter_equivalent, cls, engine, sql, ';', chunk_size
+            yield check_iter_equivalent, cls, engine, corpus[24], '@', 1
+
+def test_parse_iter_errors():
+    tokenizer = DB2LUWTokenizer()
+    sql = "SELECT 'a string spanning several chunks' FROM T;"
+    assert len(list(tokenizer.parse_iter(io.StringIO(sql), chunk_size=4))) == 8
+    tokens = tokenizer.parse_iter(io.StringIO(sql + "\nSELECT 'unterminated"), chunk_size=4)
+    assert_raises(TokenError, list, tokens)
+
+def check_compact_equivalent(cls, sql, line_split):
+    tokenizer = cls()
+    tokenizer.raise_errors = False
+    expected = tokenizer.parse(sql, ';', line_split)
+    tokenizer.compact = True
+    actual = tokenizer.parse(sql, ';', line_split)
+    assert isinstance(actual, TokenBuffer)
+    assert repr(list(actual)) == repr(expected), '%s: %r != %r' % (cls.__name__, list(actual), expected)
+    assert repr(actual[-3:]) == repr(expected[-3:])
+
+def test_compact_equivalent():
+    for cls in (SQL92Tokenizer, DB2LUWTokenizer):
+        for sql in corpus:
+            yield check_compact_equivalent, cls, sql, False
+            yield check_compact_equivalent, cls, sql, True
+
+def test_line_split_lone_cr():
+    tokens = SQL92Tokenizer().parse("SELECT 'a\rb' \rFROM T", ';', True)
+    assert [(token.value, token.source, token.line, token.column) for token in tokens] == [
+        ('SELECT', 'SELECT', 1, 1),
+        (None, ' ', 1, 7),
+        ('a\n', "'a\r", 1, 8),
+        ('b', "b'", 2, 1),
+        (None, ' \r', 2, 3),
+        ('FROM', 'FROM', 3, 1),
+        (None, ' ', 3, 5),
+        ('T', 'T', 3, 6),
+        ]
+
+def test_token_buffer():
+    tokens = SQL92Tokenizer().parse('SELECT a\r\n  FROM b\rWHERE c = 1')
+    buf = TokenBuffer.from_tokens(tokens)
+    assert len(buf) == len(tokens)
+    assert buf == tokens
+    assert buf[-1] == tokens[-1]
+    del buf[4:]
+    assert len(buf) == 4
+    assert buf == tokens[:4]
+    assert_raises(IndexError, lambda: buf[4])
+    assert_raises(TypeError, buf.__delitem__, 0)
+
+script = """\
+-- A DB2 script which changes terminator
+CREATE TABLE FOO (ID INTEGER NOT NULL, "Semi;Colon" CHAR(1));
+INSERT INTO FOO VALUES (1, ';'), (2, '@');
+--#SET TERMINATOR @
+CREATE PROCEDURE BAR()
+BEGIN
+    /* A comment; with /* nested; */ semi-colons */
+    DECLARE X INTEGER; -- another;
+    SET X = 1;
+END @
+--#set terminator !!
+SELECT '!!' FROM FOO!!
+SELECT 1 FROM FOO WHERE X = 1!!
+--#SET TERMINATOR ;
+COMMIT;
+"""
+
+def check_statements_equivalent(cls, sql, terminator):
+    tokenizer = cls()
+    tokenizer.raise_errors = False
+    expected = tokenizer.parse(sql, terminator)
+    statements = list(tokenizer.parse_statements(sql, terminator))
+    actual = [token for statement in statements for token in statement]
+    assert repr(actual) == repr(expected), '%s: %r != %r' % (cls.__name__, actual, expected)
+    # Every statement but the last must end with a terminator
+    for statement in statements[:-1]:
+        assert statement[-1].type == TT.TERMINATOR
+
+def test_parse_statements_equivalent():
+    for cls in (SQL92Tokenizer, DB2ZOSTokenizer, DB2LUWTokenizer):
+        for sql in corpus + [script]:
+            for terminator in (';', '@'):
+                yield check_statements_equivalent, cls, sql, terminator
+
+def test_split():
+    spans = list(DB2LUWTokenizer().split(script))
+    statements = [script[start:end].strip() for (start, end) in spans]
+    assert len(statements) == 7
+    assert statements[2].endswith('END @')
+    assert statements[3].endswith("SELECT '!!' FROM FOO!!")
+    assert statements[5].endswith('COMMIT;')
+    assert statements[6] == ''
+    assert ''.join(script[start:end] for (start, end) in spans) == script
+    assert list(SQL92Tokenizer().split('SELECT 1; ')) == [(0, 9), (9, 10)]
+    # Terminators within a line comment must not end a statement
+    sql = 'SELECT 1 FROM T; -- trailing; comment'
+    assert [sql[start:end] for (start, end) in DB2LUWTokenizer().split(sql)] == [
+        'SELECT 1 FROM T;', ' -- trailing; comment']
+    sql = 'SELECT 1 -- note; x\nFROM T'
+    assert list(DB2LUWTokenizer().split(sql)) == [(0, len(sql))]
+    # Terminators consumed by an identifier or parameter must not end a
+    # statement
+    assert list(DB2LUWTokenizer().split('SELECT 1A@ FROM T@', '@')) == [(0, 18)]
+    assert list(DB2LUWTokenizer().split('SELECT :@X FROM T@', '@')) == [(0, 18)]
+    assert list(DB2LUWTokenizer().split('SELECT 1.E@ FROM T@', '@')) == [(0, 11), (11, 19)]
+    terminators = [t for (start, end, t) in DB2LUWTokenizer().split(script, terminators=True)]
+    assert terminators == [';', ';', ';', '@', '!!', '!!', ';']